@@ -2,12 +2,13 @@
 #  All rights reserved.
 # ------------------------------------------------------------------------------
 from pathlib import PosixPath
-from typing import ClassVar, override
+from typing import AsyncGenerator, ClassVar, Generator
 
 from pydantic import SecretStr, BaseModel, ConfigDict, model_validator
 
 from .source_config import SourceConfig
-from ..database.db_util import get_engine, get_by_statement
+from ..database.db_util import get_engine, get_by_statement, iter_by_statement
+from ..utils import aiter_in_thread, override
 
 
 UNSET_DEFAULT = b'x_unset'
@@ -81,6 +82,36 @@ class DatabaseConfig(SourceConfig):
                     sql_params_dict
                 )
 
+    def iter_by_statement(
+        self,
+        stmt: str,
+        sql_params_dict: dict | None = None,
+        yield_per: int = 1000,
+    ) -> Generator[dict, None, None]:
+        """
+            Streams the rows of the statement, fetching `yield_per` rows at a time. The fetches block, in async code
+            (e.g. as the data of an import) use aiter_by_statement instead.
+        """
+        with self.get_engine().connect() as connection:
+            with connection.begin():
+                yield from iter_by_statement(
+                    connection,
+                    stmt,
+                    sql_params_dict,
+                    yield_per=yield_per,
+                )
+
+    def aiter_by_statement(
+        self,
+        stmt: str,
+        sql_params_dict: dict | None = None,
+        yield_per: int = 1000,
+    ) -> AsyncGenerator[dict, None]:
+        """
+            iter_by_statement without blocking the event loop, the rows are fetched in a thread of their own.
+        """
+        return aiter_in_thread(self.iter_by_statement(stmt, sql_params_dict, yield_per), chunk_size=yield_per)
+
 
 class MockDbConfig(DatabaseConfig):
     name: ClassVar[str] = 'mock-db'
@@ -95,6 +126,10 @@ class MockDbConfig(DatabaseConfig):
     def get_by_statement(self, stmt: str, sql_params_dict: dict | None = None):
         return []
 
+    @override
+    def iter_by_statement(self, stmt: str, sql_params_dict: dict | None = None, yield_per: int = 1000):
+        yield from ()
+
 
 class PyMySqlSslConnectArgs(BaseModel):
     model_config = ConfigDict(extra='allow')
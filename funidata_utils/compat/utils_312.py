@@ -1,6 +1,6 @@
 from collections import defaultdict
 from functools import reduce
-from typing import Callable, Any
+from typing import Callable, Any, override  # noqa: F401 ("Unused import")
 
 
 def group_by[T](
@@ -4,6 +4,13 @@ from typing import Callable, Any, TypeVar
 
 
 T = TypeVar('T')
+F = TypeVar('F', bound=Callable)
+
+
+def override(method: F) -> F:
+    # typing.override of Python 3.12, marks the method for type checkers only
+    method.__override__ = True
+    return method
 
 
 def group_by(
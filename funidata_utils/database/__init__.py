@@ -2,4 +2,4 @@
 #  All rights reserved.
 # ------------------------------------------------------------------------------
 
-from .db_util import (get_engine, get_by_statement)
+from .db_util import (get_engine, get_by_statement, iter_by_statement)
@@ -3,6 +3,8 @@
 # ------------------------------------------------------------------------------
 
 import json
+from typing import Generator
+
 from sqlalchemy import create_engine, text
 
 
@@ -37,3 +39,17 @@ def get_by_statement(session, stmt: str, sql_params_dict: dict | None = None) ->
             text(stmt), sql_params_dict or {}
         ).all()
     ]
+
+
+def iter_by_statement(
+    session,
+    stmt: str,
+    sql_params_dict: dict | None = None,
+    yield_per: int = 1000,
+) -> Generator[dict, None, None]:
+    # Streams the rows with a server side cursor, fetching yield_per rows at a time
+    result = session.execute(
+        text(stmt).execution_options(yield_per=yield_per), sql_params_dict or {}
+    )
+    for x in result:
+        yield {**x._mapping}
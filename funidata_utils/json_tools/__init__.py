@@ -3,5 +3,15 @@
 # ------------------------------------------------------------------------------
 
 from .jsonl_utils import (
-    read_jsonl
+    read_jsonl,
+    iter_jsonl,
+    group_jsonl_by_key_on_disk,
+)
+from .jsonl_writer import (
+    JsonlWriter,
+)
+from .patch_diff import (
+    get_patch_payload,
+    iter_patch_payloads,
+    aiter_patch_payloads,
 )
@@ -0,0 +1,46 @@
+#  Copyright (c) 2025 Funidata Oy.
+#  All rights reserved.
+# ------------------------------------------------------------------------------
+
+import hashlib
+from typing import Any, Collection
+
+import simplejson
+
+from .json_encoder import CustomJsonEncoder
+
+
+# Read-only fields that Sisu maintains itself, they never describe a change in the sent data
+DEFAULT_IGNORED_FIELDS = frozenset({'metadata'})
+
+
+def normalize_value(value: Any) -> Any:
+    """
+        The value as it is compared and hashed: None fields dropped from the objects and tuples made lists.
+    """
+    # None and a missing field mean the same for Sisu, so both hash the same
+    if isinstance(value, dict):
+        return {k: normalize_value(v) for k, v in value.items() if v is not None}
+
+    if isinstance(value, (list, tuple)):
+        return [normalize_value(v) for v in value]
+
+    return value
+
+
+def canonical_json(entity: dict, ignored_fields: Collection[str] = DEFAULT_IGNORED_FIELDS) -> str:
+    return simplejson.dumps(
+        normalize_value({k: v for k, v in entity.items() if k not in ignored_fields}),
+        cls=CustomJsonEncoder,
+        sort_keys=True,
+        separators=(',', ':'),
+        ensure_ascii=False,
+    )
+
+
+def content_hash(entity: dict, ignored_fields: Collection[str] = DEFAULT_IGNORED_FIELDS) -> str:
+    """
+        Stable hash of the entity's content: keys sorted, None values dropped and `ignored_fields` left out.
+        The order of lists is part of the content.
+    """
+    return hashlib.blake2b(canonical_json(entity, ignored_fields).encode('utf-8'), digest_size=16).hexdigest()
@@ -4,6 +4,11 @@
 
 import json
 import logging
+import tempfile
+import zlib
+from typing import IO, Generator
+
+from ..utils import group_by
 
 
 logger = logging.getLogger(__name__)
@@ -20,3 +25,39 @@ def read_jsonl(jsonl_file_path: str) -> list[dict]:
         logger.exception(f"File {jsonl_file_path} not found.")
         raise e
     return list_of_dicts
+
+
+def iter_jsonl(fp: IO) -> Generator[dict, None, None]:
+    for line in fp:
+        if line.strip():
+            yield json.loads(line)
+
+
+def group_jsonl_by_key_on_disk(
+    fp: IO,
+    key: str,
+    bucket_count: int = 64,
+) -> Generator[list[dict], None, None]:
+    """
+        Groups the entities of an unsorted JSONL file by `key` without reading the whole file into memory.
+        Lines are first partitioned into `bucket_count` temporary files by a hash of the key, and each bucket
+        is then grouped in memory, so only about 1/bucket_count of the file is held in memory at a time.
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        buckets = [open(f'{tmp_dir}/{index}.jsonl', 'w+b') for index in range(bucket_count)]
+        try:
+            for line in fp:
+                if not line.strip():
+                    continue
+
+                entity = json.loads(line)
+                _line = line.encode('utf-8') if isinstance(line, str) else line
+                bucket = buckets[zlib.crc32(repr(entity[key]).encode('utf-8')) % bucket_count]
+                bucket.write(_line if _line.endswith(b'\n') else _line + b'\n')
+
+            for bucket in buckets:
+                bucket.seek(0)
+                yield from group_by(list(iter_jsonl(bucket)), lambda x: x[key]).values()
+        finally:
+            for bucket in buckets:
+                bucket.close()
@@ -0,0 +1,175 @@
+#  Copyright (c) 2025 Funidata Oy.
+#  All rights reserved.
+# ------------------------------------------------------------------------------
+
+import gzip
+import json
+import logging
+import os
+from pathlib import Path
+from typing import IO, Any, Callable, Iterable, Literal
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUFFER_SIZE = 1024 * 1024
+
+
+def encode_json_line(entity: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(entity, option=orjson.OPT_APPEND_NEWLINE)
+
+    return json.dumps(entity, ensure_ascii=False, separators=(',', ':')).encode('utf-8') + b'\n'
+
+
+def _get_shard_path(path: Path, index: int) -> Path:
+    # attainments.jsonl.gz -> attainments.00001.jsonl.gz
+    name, _, suffixes = path.name.partition('.')
+    return path.with_name(f'{name}.{index:05d}.{suffixes}' if suffixes else f'{name}.{index:05d}')
+
+
+class JsonlWriter:
+    """
+        Buffered JSON lines writer with optional gzip / zstd compression and rotation into several files.
+
+        Pages of entities are encoded (with orjson when installed) and written with a single call per page.
+        With `max_entities_per_file` or `max_bytes_per_file` (uncompressed) the output is sharded into numbered
+        files next to `path`, e.g. `attainments.00000.jsonl.gz`, `attainments.00001.jsonl.gz`. zstd compression
+        requires the `zstandard` package.
+    """
+
+    def __init__(
+        self,
+        path: str | os.PathLike,
+        compression: Literal['gzip', 'zstd'] | None = None,
+        compression_level: int | None = None,
+        max_entities_per_file: int | None = None,
+        max_bytes_per_file: int | None = None,
+        buffer_size: int = DEFAULT_BUFFER_SIZE,
+        encoder: Callable[[Any], bytes] = encode_json_line,
+    ):
+        if compression == 'zstd' and zstandard is None:
+            raise Exception("zstd compression requires the zstandard package: pip install funidata-utils[zstd]")
+        if compression not in (None, 'gzip', 'zstd'):
+            raise Exception(f'Unsupported compression: {compression}')
+
+        self.path = Path(path)
+        self.compression = compression
+        self.compression_level = compression_level
+        self.max_entities_per_file = max_entities_per_file
+        self.max_bytes_per_file = max_bytes_per_file
+        self.buffer_size = buffer_size
+        self.encoder = encoder
+
+        self.paths: list[Path] = []
+        self.entities_written = 0
+        self.bytes_written = 0
+        self._raw: IO | None = None
+        self._stream: IO | None = None
+        self._file_entities = 0
+        self._file_bytes = 0
+
+    @property
+    def _rotates(self) -> bool:
+        return self.max_entities_per_file is not None or self.max_bytes_per_file is not None
+
+    def _open(self):
+        path = _get_shard_path(self.path, len(self.paths)) if self._rotates else self.path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._raw = open(path, 'wb', buffering=self.buffer_size)
+        match self.compression:
+            case 'gzip':
+                self._stream = gzip.GzipFile(
+                    fileobj=self._raw, mode='wb', compresslevel=self.compression_level or 6,
+                )
+            case 'zstd':
+                self._stream = zstandard.ZstdCompressor(level=self.compression_level or 3).stream_writer(
+                    self._raw, closefd=False,
+                )
+            case _:
+                self._stream = self._raw
+
+        self.paths.append(path)
+        logger.debug("Writing JSON lines to %s", path)
+
+    def _close_file(self):
+        if self._stream is not None and self._stream is not self._raw:
+            self._stream.close()
+        if self._raw is not None:
+            self._raw.close()
+        self._stream = None
+        self._raw = None
+        self._file_entities = 0
+        self._file_bytes = 0
+
+    def _would_overflow(self, pending_entities: int, pending_bytes: int) -> bool:
+        # A single entity larger than max_bytes_per_file still gets a file of its own
+        if self._file_entities + pending_entities == 0:
+            return False
+
+        return (
+            (self.max_entities_per_file is not None
+             and self._file_entities + pending_entities >= self.max_entities_per_file)
+            or (self.max_bytes_per_file is not None and self._file_bytes + pending_bytes > self.max_bytes_per_file)
+        )
+
+    def _write_lines(self, lines: list[bytes]):
+        if not lines:
+            return
+
+        if self._stream is None:
+            self._open()
+
+        data = b''.join(lines)
+        self._stream.write(data)
+        self._file_entities += len(lines)
+        self._file_bytes += len(data)
+        self.entities_written += len(lines)
+        self.bytes_written += len(data)
+
+    def write_entities(self, entities: Iterable[Any]):
+        lines = []
+        lines_size = 0
+        for entity in entities:
+            line = self.encoder(entity)
+            if self._rotates and self._would_overflow(len(lines), lines_size + len(line)):
+                # The current file is full, the rest of the page goes into the next one
+                self._write_lines(lines)
+                self._close_file()
+                lines = []
+                lines_size = 0
+
+            lines.append(line)
+            lines_size += len(line)
+
+        self._write_lines(lines)
+
+    def write_entity(self, entity: Any):
+        self.write_entities([entity])
+
+    def flush(self):
+        if self._stream is None:
+            return
+
+        self._stream.flush()
+        if self._stream is not self._raw:
+            self._raw.flush()
+
+    def close(self):
+        self._close_file()
+
+    def __enter__(self) -> 'JsonlWriter':
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,104 @@
+#  Copyright (c) 2025 Funidata Oy.
+#  All rights reserved.
+# ------------------------------------------------------------------------------
+
+from typing import Any, AsyncGenerator, AsyncIterable, Callable, Collection, Generator, Iterable, Mapping, Sequence
+
+from .content_hash import DEFAULT_IGNORED_FIELDS, normalize_value
+from ..utils import batch_iterable
+
+
+KnownEntities = Mapping[Any, dict] | Callable[[Sequence[Any]], Mapping[Any, dict]]
+
+
+def get_patch_payload(
+    current: dict | None,
+    desired: dict,
+    ignored_fields: Collection[str] = DEFAULT_IGNORED_FIELDS,
+    clear_missing_fields: bool = False,
+) -> dict | None:
+    """
+        The `id` and the top-level fields of `desired` that differ from `current`, None when nothing changed.
+
+        Nested objects are compared as a whole and sent whole when anything in them changed. A field set to None
+        in `desired` is sent as None to clear it, a field missing from `desired` is left as is, unless
+        `clear_missing_fields` is set. Without a current state the whole desired entity is returned.
+    """
+    if current is None:
+        return desired
+
+    patch = {
+        field: value for field, value in desired.items()
+        if field != 'id' and field not in ignored_fields
+        and normalize_value(value) != normalize_value(current.get(field))
+    }
+    if clear_missing_fields:
+        patch |= {
+            field: None for field, value in current.items()
+            if field not in desired and field not in ignored_fields and value is not None
+        }
+
+    if not patch:
+        return None
+
+    return {'id': desired['id']} | patch
+
+
+def _get_patch_payloads(
+    entities: list[dict],
+    known_entities: KnownEntities,
+    ignored_fields: Collection[str],
+    clear_missing_fields: bool,
+) -> list[dict]:
+    if not entities:
+        return []
+
+    if isinstance(known_entities, Mapping):
+        current_by_id = known_entities
+    else:
+        current_by_id = known_entities([entity['id'] for entity in entities])
+
+    patches = []
+    for entity in entities:
+        patch = get_patch_payload(current_by_id.get(entity['id']), entity, ignored_fields, clear_missing_fields)
+        if patch is not None:
+            patches.append(patch)
+
+    return patches
+
+
+def iter_patch_payloads(
+    entities: Iterable[dict],
+    known_entities: KnownEntities,
+    ignored_fields: Collection[str] = DEFAULT_IGNORED_FIELDS,
+    clear_missing_fields: bool = False,
+    lookup_batch_size: int = 1000,
+) -> Generator[dict, None, None]:
+    """
+        Minimal PATCH payloads for the entities, unchanged entities are dropped.
+
+        The current state is a mapping of id -> entity, or a callable returning the entities for a list of ids,
+        e.g. `partial(mirror.get_many, StudyRights)` for a local export mirror, looked up `lookup_batch_size` ids
+        at a time.
+    """
+    for entities_batch in batch_iterable(entities, lookup_batch_size):
+        yield from _get_patch_payloads(entities_batch, known_entities, ignored_fields, clear_missing_fields)
+
+
+async def aiter_patch_payloads(
+    entities: AsyncIterable[dict],
+    known_entities: KnownEntities,
+    ignored_fields: Collection[str] = DEFAULT_IGNORED_FIELDS,
+    clear_missing_fields: bool = False,
+    lookup_batch_size: int = 1000,
+) -> AsyncGenerator[dict, None]:
+    entities_batch = []
+    async for entity in entities:
+        entities_batch.append(entity)
+        if len(entities_batch) >= lookup_batch_size:
+            for patch in _get_patch_payloads(entities_batch, known_entities, ignored_fields, clear_missing_fields):
+                yield patch
+            entities_batch = []
+
+    for patch in _get_patch_payloads(entities_batch, known_entities, ignored_fields, clear_missing_fields):
+        yield patch
@@ -6,3 +6,15 @@ from .httpx_requests import (
     send_get_httpx,
     send_post_with_binary_err_search_httpx,
 )
+from .client_manager import (
+    SisuClientManager,
+)
+from .concurrency import (
+    AdaptiveConcurrencyLimiter,
+)
+from .import_report import (
+    ImportReport,
+)
+from .retries import (
+    RetryPolicy,
+)
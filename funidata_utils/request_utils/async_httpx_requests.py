@@ -3,17 +3,26 @@
 # ------------------------------------------------------------------------------
 
 import asyncio
-import json
 import logging
-import typing
-from typing import Tuple, Any, Callable, Literal
+import time
+from contextlib import aclosing
+from functools import partial
+from typing import Tuple, Any, Callable, Literal, Awaitable, Iterable, Generator, AsyncIterable, AsyncGenerator
 
 import httpx
 
-from ..utils import flatten, group_by, batch
+from .client_manager import DEFAULT_TIMEOUT, get_async_proxy_mounts
+from .concurrency import AdaptiveConcurrencyLimiter
+from .batch_planner import (
+    EncodedBatch, GroupPacking, OversizedGroupPolicy, plan_encoded_batches, pack_groups_balanced,
+)
+from .encoded_payload import EncodedPayload, PayloadView, is_grouped_view, flatten_view
+from .import_report import ACCEPTED_RESPONSE_CODES, ResponseRecorder, parse_error_json, get_failing_ids
+from .retries import RetryPolicy, send_with_retries
+from ..utils import group_by, batch, as_async_iterable, abatch_iterable
 
 
-ACCEPTED_RESPONSE_CODES = {200, 201, 202, 204}
+JSON_HEADERS = {'Content-Type': 'application/json'}
 logger = logging.getLogger(__name__)
 
 
@@ -42,31 +51,128 @@ def _collect_suitable_batches_grouped_by_key(
     return batches
 
 
+def _iter_batches_grouped_by_key(
+    groups: Iterable[list[dict]],
+    sorting_function: Callable = None,
+    batch_size_trigger: int = 500,
+) -> Generator[list[list[dict]], None, None]:
+    # Lazy version of _collect_suitable_batches_grouped_by_key for groups that are produced one at a time
+    current_batch = []
+    current_batch_size = 0
+
+    for values in groups:
+        current_batch.append(values)
+        current_batch_size += len(values)
+        if current_batch_size >= batch_size_trigger:
+            yield sorting_function(current_batch) if sorting_function else current_batch
+            current_batch = []
+            current_batch_size = 0
+
+    if current_batch:
+        yield sorting_function(current_batch) if sorting_function else current_batch
+
+
+async def _aiter_batches(
+    items: Iterable[dict] | AsyncIterable[dict],
+    batch_size: int,
+    group_by_key: str | None = None,
+) -> AsyncGenerator[list[dict] | list[list[dict]], None]:
+    if not group_by_key:
+        async for _batch in abatch_iterable(items, batch_size):
+            yield _batch
+        return
+
+    # Items are expected to arrive grouped by group_by_key, consecutive items with the same key form one group
+    current_batch = []
+    current_batch_size = 0
+    current_group = []
+    async for item in as_async_iterable(items):
+        if current_group and item[group_by_key] != current_group[0][group_by_key]:
+            current_batch.append(current_group)
+            current_batch_size += len(current_group)
+            current_group = []
+            if current_batch_size >= batch_size:
+                yield current_batch
+                current_batch = []
+                current_batch_size = 0
+
+        current_group.append(item)
+
+    if current_group:
+        current_batch.append(current_group)
+
+    if current_batch:
+        yield current_batch
+
+
 async def send_get_httpx(
     path: str,
     auth: Tuple[str, str] | None = None,
     proxies: dict | None = None,
     params: dict | None = None,
     allow_redirects: bool = False,
+    client: httpx.AsyncClient | None = None,
+    retry_policy: RetryPolicy | None = None,
+    concurrency_limiter: AdaptiveConcurrencyLimiter | asyncio.Semaphore | None = None,
 ) -> httpx.Response:
-    proxy_mounts = {
-        "http://": httpx.AsyncHTTPTransport(proxy=proxies.get('http')),
-        "https://": httpx.AsyncHTTPTransport(proxy=proxies.get('https')),
-    } if proxies else None
-    client = httpx.AsyncClient(mounts=proxy_mounts, auth=auth)
-    response = await client.get(
-        path,
-        auth=auth,
-        params=params,
-        timeout=600,
-        follow_redirects=allow_redirects,
+    if client is None:
+        async with httpx.AsyncClient(mounts=get_async_proxy_mounts(proxies), auth=auth) as _client:
+            return await send_get_httpx(
+                path=path,
+                auth=auth,
+                params=params,
+                allow_redirects=allow_redirects,
+                client=_client,
+                retry_policy=retry_policy,
+                concurrency_limiter=concurrency_limiter,
+            )
+
+    response = await _limited(
+        partial(
+            client.get,
+            path,
+            auth=auth,
+            params=params,
+            timeout=600,
+            follow_redirects=allow_redirects,
+        ),
+        concurrency_limiter=concurrency_limiter,
+        retry_policy=retry_policy,
     )
     return response
 
 
-async def _binary_search_enabled_post_httpx(
+async def _limited(
+    send: Callable[[], Awaitable[httpx.Response]],
+    concurrency_limiter: AdaptiveConcurrencyLimiter | asyncio.Semaphore | None = None,
+    _state: dict | None = None,
+    retry_policy: RetryPolicy | None = None,
+) -> httpx.Response:
+    async def _timed_send() -> httpx.Response:
+        started = time.perf_counter()
+        response = await send()
+        if _state is not None:
+            _state['request_seconds'] = _state.get('request_seconds', 0) + time.perf_counter() - started
+        return response
+
+    async def _attempt() -> httpx.Response:
+        if concurrency_limiter is None:
+            return await _timed_send()
+
+        if isinstance(concurrency_limiter, asyncio.Semaphore):
+            async with concurrency_limiter:
+                return await _timed_send()
+
+        return await concurrency_limiter.run(_timed_send)
+
+    # Every attempt goes through the limiter, but the backoff between attempts does not hold a slot
+    return await send_with_retries(_attempt, retry_policy)
+
+
+async def _binary_search_step(
     path: str,
-    payload: list[dict] | list[list[dict]],
+    encoded: EncodedPayload,
+    view: PayloadView,
     client: httpx.AsyncClient,
     auth: Tuple[str, str] | None = None,
     params: dict | None = None,
@@ -74,35 +180,41 @@ async def _binary_search_enabled_post_httpx(
     binary_search_max_depth: int | None = None,
     binary_err_search_sublists: bool = True,
     method: Literal['POST', 'PATCH'] = 'POST',
+    concurrency_limiter: AdaptiveConcurrencyLimiter | asyncio.Semaphore | None = None,
+    parallel_sub_search: bool = False,
+    report: ResponseRecorder | None = None,
+    retry_policy: RetryPolicy | None = None,
     _state: dict[
-                Literal['max_seen_depth', 'sent_requests'], int
+                Literal['max_seen_depth', 'sent_requests', 'request_seconds'], int | float
             ] | None = None,
 ) -> list[httpx.Response]:
-    is_complex_list_of_batches = False
-    if isinstance(payload, list) and all(isinstance(x, list) for x in payload[::3]):
-        is_complex_list_of_batches = True
+    is_complex_list_of_batches = is_grouped_view(view)
 
-    match method:
-        case 'POST':
-            _request_payload = flatten(payload) if is_complex_list_of_batches else payload
-            logger.debug("Sending POST with %d items to %s", len(_request_payload), path)
-            response = await client.post(
-                path,
-                auth=auth,
-                json=_request_payload,
-                params=params,
-                timeout=120,
-            )
+    def _final(err_json: dict | None = None) -> list[httpx.Response]:
+        if report is None:
+            return [response]
 
-        case 'PATCH':
-            _request_payload = flatten(payload) if is_complex_list_of_batches else payload
-            logger.debug("Sending PATCH with %d items to %s", len(_request_payload), path)
-            response = await client.patch(
-                path,
-                auth=auth,
-                json=_request_payload,
-                params=params,
-                timeout=120,
+        # Record the outcome and let go of the response, and with it the request body
+        report.add_response(response, [encoded.ids[_index] for _index in _request_indexes], err_json)
+        return [response] if report.keep_responses else []
+
+    match method:
+        case 'POST' | 'PATCH':
+            _request_indexes = flatten_view(view) if is_complex_list_of_batches else view
+            logger.debug("Sending %s with %d items to %s", method, len(_request_indexes), path)
+            response = await _limited(
+                partial(
+                    client.request,
+                    method,
+                    path,
+                    auth=auth,
+                    content=encoded.body(_request_indexes),
+                    headers=JSON_HEADERS,
+                    params=params,
+                ),
+                concurrency_limiter=concurrency_limiter,
+                _state=_state,
+                retry_policy=retry_policy,
             )
 
         case _:
@@ -112,24 +224,54 @@ async def _binary_search_enabled_post_httpx(
         _state['sent_requests'] = _state.get('sent_requests', 0) + 1
         _state['max_seen_depth'] = max(_state.get('max_seen_depth', 0), binary_search_depth)
 
+    if response.status_code == 413 and len(_request_indexes) > 1:
+        # The body was too large, not the data invalid: halve it whatever the search depth, keeping groups whole
+        # for as long as there are several of them
+        _split_view = flatten_view(view) if is_complex_list_of_batches and len(view) == 1 else view
+        responses = []
+        for _sub_batch in encoded.split_view(_split_view):
+            responses += await _binary_search_step(
+                path=path,
+                encoded=encoded,
+                view=_sub_batch,
+                auth=auth,
+                params=params,
+                client=client,
+                binary_search_depth=binary_search_depth,
+                binary_search_max_depth=binary_search_max_depth,
+                binary_err_search_sublists=binary_err_search_sublists,
+                method=method,
+                concurrency_limiter=concurrency_limiter,
+                parallel_sub_search=parallel_sub_search,
+                report=report,
+                retry_policy=retry_policy,
+                _state=_state,
+            )
+        return responses
+
     if (
         binary_search_max_depth == 0 or
         (binary_search_max_depth and binary_search_depth >= binary_search_max_depth)
         or response.status_code in ACCEPTED_RESPONSE_CODES
     ):
-        return [response]
+        return _final()
+
+    if retry_policy and retry_policy.is_retryable_response(response):
+        # Retries ran out on a transient failure, splitting the batch would only add load on a struggling server
+        return _final()
 
     if not is_complex_list_of_batches:
-        if len(payload) <= 1:
-            return [response]
+        if len(view) <= 1:
+            return _final()
     else:
-        if len(payload) <= 1 and not binary_err_search_sublists:
-            return [response]
+        if len(view) <= 1 and not binary_err_search_sublists:
+            return _final()
         # Final batch, cannot split into further batches, but can split into sublist if enabled
-        if len(payload) == 1 and binary_err_search_sublists:
-            return await _binary_search_enabled_post_httpx(
+        if len(view) == 1 and binary_err_search_sublists:
+            return await _binary_search_step(
                 path=path,
-                payload=flatten(payload),
+                encoded=encoded,
+                view=flatten_view(view),
                 auth=auth,
                 params=params,
                 client=client,
@@ -137,126 +279,141 @@ async def _binary_search_enabled_post_httpx(
                 binary_search_max_depth=binary_search_max_depth,
                 binary_err_search_sublists=False,
                 method=method,
+                concurrency_limiter=concurrency_limiter,
+                parallel_sub_search=parallel_sub_search,
+                report=report,
+                retry_policy=retry_policy,
                 _state=_state
             )
 
+    err_json = parse_error_json(response)
     failing_ids = []
     if 400 <= response.status_code < 500:
         # Try to find the "failingIds" from the response of 400-status codes
-        try:
-            err_json = response.json()
-            if isinstance(err_json, str):
-                err_json = json.loads(err_json)
-
-            if err_json.get('failingIds'):
-                failing_ids = err_json['failingIds']
-        except Exception:
-            pass
+        failing_ids = get_failing_ids(err_json)
 
     # If everything is failed, stop.
-    # _request_payload here is the flattened payload, aka "amount of entities sent equals amount of failing ids"
-    if len(failing_ids) == len(_request_payload):
-        return [response]
-
-    # try to convert the payload into "failed" and "not failed" lists
-    first_batch = []
-    second_batch = []
-    if failing_ids:
-        if is_complex_list_of_batches:
-            # If we are in the context of "complex" aka grouped data: [ [person_1_1, person_1_2], [person_2_1] ]
-            if binary_err_search_sublists:
-                # If we allow searching sublists, we can split entities by passing/failing directly
-                for subset in payload:
-                    for _entity in subset:
-                        if _entity.get('id') in failing_ids:
-                            first_batch.append(_entity)
-                        else:
-                            second_batch.append(_entity)
-            else:
-                # If we don't allow sublist searching, split according to existence of fail in a batch
-                for subset in payload:
-                    subset_ids = {x.get('id') for x in subset}
-                    if any(_id in subset_ids for _id in failing_ids):
-                        first_batch.append(subset)
-                    else:
-                        second_batch.append(subset)
-        else:
-            # Payload is not a list of lists, can directly check against it.
-            for x in payload:
-                if x.get('id') in failing_ids:
-                    first_batch.append(x)
-                else:
-                    second_batch.append(x)
+    # _request_indexes here is the flattened view, aka "amount of entities sent equals amount of failing ids"
+    if len(failing_ids) == len(_request_indexes):
+        return _final(err_json)
 
-    # If we were unable to create a split at all, continue with default behavior.
-    if len(first_batch) == 0 or len(second_batch) == 0:
-        first_batch = payload[::2]
-        second_batch = payload[1::2]
+    # Failing entities apart from the rest when Sisu named them, otherwise in halves
+    first_batch, second_batch = encoded.split_view(view, failing_ids, split_groups=binary_err_search_sublists)
 
-    first_half_responses = await _binary_search_enabled_post_httpx(
+    _sub_searches = [
+        _binary_search_step(
+            path=path,
+            encoded=encoded,
+            view=_sub_batch,
+            auth=auth,
+            params=params,
+            client=client,
+            binary_search_depth=binary_search_depth + 1,
+            binary_search_max_depth=binary_search_max_depth,
+            binary_err_search_sublists=binary_err_search_sublists,
+            method=method,
+            concurrency_limiter=concurrency_limiter,
+            parallel_sub_search=parallel_sub_search,
+            report=report,
+            retry_policy=retry_policy,
+            _state=_state,
+        )
+        for _sub_batch in (first_batch, second_batch)
+    ]
+    if parallel_sub_search:
+        # Sibling halves are independent, so search them concurrently. Each request still goes through the
+        # concurrency limiter, so the global amount of parallel requests stays bounded.
+        first_half_responses, second_half_responses = await asyncio.gather(*_sub_searches)
+    else:
+        first_half_responses = await _sub_searches[0]
+        second_half_responses = await _sub_searches[1]
+
+    return first_half_responses + second_half_responses
+
+
+async def _binary_search_enabled_post_httpx(
+    path: str,
+    payload: list[dict] | list[list[dict]] | EncodedBatch,
+    client: httpx.AsyncClient,
+    auth: Tuple[str, str] | None = None,
+    params: dict | None = None,
+    binary_search_depth: int = 0,
+    binary_search_max_depth: int | None = None,
+    binary_err_search_sublists: bool = True,
+    method: Literal['POST', 'PATCH'] = 'POST',
+    concurrency_limiter: AdaptiveConcurrencyLimiter | asyncio.Semaphore | None = None,
+    parallel_sub_search: bool = False,
+    report: ResponseRecorder | None = None,
+    retry_policy: RetryPolicy | None = None,
+    body_envelope: str | None = None,
+    _state: dict[
+                Literal[
+                    'max_seen_depth', 'sent_requests', 'request_seconds', 'wall_clock_seconds',
+                    'wall_clock_saved_seconds',
+                ], int | float
+            ] | None = None,
+) -> list[httpx.Response]:
+    started = time.perf_counter()
+    # Every entity is serialized once, the search only passes around views of indexes to the encoded entities
+    encoded, view = payload if isinstance(payload, EncodedBatch) else EncodedPayload.encode(payload)
+    encoded.envelope = body_envelope
+    responses = await _binary_search_step(
         path=path,
-        payload=first_batch,
-        auth=auth,
-        params=params,
+        encoded=encoded,
+        view=view,
         client=client,
-        binary_search_depth=binary_search_depth + 1,
-        binary_search_max_depth=binary_search_max_depth,
-        binary_err_search_sublists=binary_err_search_sublists,
-        method=method,
-        _state=_state,
-    )
-    second_half_responses = await _binary_search_enabled_post_httpx(
-        path=path,
-        payload=second_batch,
         auth=auth,
         params=params,
-        client=client,
-        binary_search_depth=binary_search_depth + 1,
+        binary_search_depth=binary_search_depth,
         binary_search_max_depth=binary_search_max_depth,
         binary_err_search_sublists=binary_err_search_sublists,
         method=method,
-        _state=_state
+        concurrency_limiter=concurrency_limiter,
+        parallel_sub_search=parallel_sub_search,
+        report=report,
+        retry_policy=retry_policy,
+        _state=_state,
     )
-    return first_half_responses + second_half_responses
 
+    if _state is not None:
+        # request_seconds is what the search would have taken with every request sent one after another
+        _state['wall_clock_seconds'] = _state.get('wall_clock_seconds', 0) + time.perf_counter() - started
+        _state['wall_clock_saved_seconds'] = max(
+            0.0, _state.get('request_seconds', 0) - _state['wall_clock_seconds']
+        )
 
-async def send_post_with_binary_err_search_httpx(
+    return responses
+
+
+def _payload_batches(
     path: str,
-    payload: list[dict],
+    payload: list[dict] | Iterable[dict] | AsyncIterable[dict],
     group_by_key: str | None = None,
-    auth: Tuple[str, str] | None = None,
-    proxies: dict | None = None,
-    params: dict | None = None,
     batch_size: int | None = None,
-    binary_search_max_depth: int | None = None,
-    binary_err_search_sublists: bool = True,
-    method: Literal['POST', 'PATCH'] = 'POST',
-    max_parallel_requests: int = 1,
-) -> list[httpx.Response]:
-    if len(payload) <= 0:
-        raise Exception(f"Payload missing when attempting to POST to : {path}")
+    allow_empty_payload: bool = False,
+    group_packing: GroupPacking = 'greedy',
+    oversized_groups: OversizedGroupPolicy = 'alone',
+) -> Iterable[list[dict] | list[list[dict]]] | AsyncIterable[list[dict] | list[list[dict]]]:
+    if not isinstance(payload, list):
+        # Generators, cursors and async iterables are consumed lazily, only as fast as the batches get sent.
+        # With group_by_key the items have to arrive grouped by the key, and the groups are batched greedily.
+        if group_packing != 'greedy':
+            raise Exception(
+                f"group_packing '{group_packing}' needs all the groups up front, give the payload as a list"
+            )
+        if not batch_size:
+            raise Exception(f"batch_size is required when sending an iterable payload to : {path}")
 
-    proxy_mounts = None
-    if proxies:
-        proxy_mounts = {
-            "http://": httpx.AsyncHTTPTransport(proxy=proxies.get('http')),
-            "https://": httpx.AsyncHTTPTransport(proxy=proxies.get('https')),
-        }
+        return _aiter_batches(payload, batch_size, group_by_key)
 
-    client = httpx.AsyncClient(mounts=proxy_mounts, auth=auth)
-    semaphore = asyncio.Semaphore(max_parallel_requests)
+    if len(payload) <= 0:
+        if allow_empty_payload:
+            return []
 
-    async def _with_sem(coro: typing.Coroutine):
-        async with semaphore:
-            return await coro
+        raise Exception(f"Payload missing when attempting to POST to : {path}")
 
     if group_by_key:
         items_by_key = group_by(payload, lambda x: x[group_by_key])
-        batches = _collect_suitable_batches_grouped_by_key(
-            items_by_key=items_by_key,
-            sorting_function=None,
-            batch_size_trigger=batch_size,
-        )
         """
         Creates a structure that contains the grouped data as lists of the original groups 
         that then reside in lists approximately of the size batch_size
@@ -268,51 +425,378 @@ async def send_post_with_binary_err_search_httpx(
             [ [7,8], [10,11,12,13,14] ],
         ]
         """
-        _tasks = [
-            _with_sem(_binary_search_enabled_post_httpx(
+        if group_packing == 'balanced':
+            # Evenly sized batches within batch_size, so parallel workers finish at about the same time
+            return pack_groups_balanced(list(items_by_key.values()), batch_size, oversized_groups)
+
+        return _collect_suitable_batches_grouped_by_key(
+            items_by_key=items_by_key,
+            sorting_function=None,
+            batch_size_trigger=batch_size,
+        )
+
+    # Is not group_by'ed -> If batch size is not configured, try sending everything
+    if not batch_size:
+        return [payload]
+
+    # When batch size is configured, batch the payloads
+    return batch(payload, batch_size)
+
+
+async def _iter_indexed_batch_results(
+    path: str,
+    batches: Iterable[list[dict] | list[list[dict]]] | AsyncIterable[list[dict] | list[list[dict]]],
+    auth: Tuple[str, str] | None = None,
+    proxies: dict | None = None,
+    params: dict | None = None,
+    binary_search_max_depth: int | None = None,
+    binary_err_search_sublists: bool = True,
+    method: Literal['POST', 'PATCH'] = 'POST',
+    max_parallel_requests: int = 1,
+    client: httpx.AsyncClient | None = None,
+    concurrency_limiter: AdaptiveConcurrencyLimiter | asyncio.Semaphore | None = None,
+    parallel_sub_search: bool = False,
+    max_pending_batches: int | None = None,
+    report: ResponseRecorder | None = None,
+    retry_policy: RetryPolicy | None = None,
+    max_batch_bytes: int | None = None,
+    body_envelope: str | None = None,
+    allow_empty_payload: bool = False,
+) -> AsyncGenerator[tuple[int, list[httpx.Response]], None]:
+    """
+        iter_batch_results_with_binary_err_search_httpx, yielding the results with the index of their batch.
+    """
+    if client is None:
+        # No shared client given, use a short-lived one and make sure its connections get closed
+        async with httpx.AsyncClient(
+            mounts=get_async_proxy_mounts(proxies), auth=auth, timeout=DEFAULT_TIMEOUT,
+        ) as _client:
+            batch_results = _iter_indexed_batch_results(
                 path=path,
-                payload=_batch,
-                params=params,
+                batches=batches,
                 auth=auth,
-                client=client,
-                binary_search_depth=0,
+                params=params,
                 binary_search_max_depth=binary_search_max_depth,
                 binary_err_search_sublists=binary_err_search_sublists,
                 method=method,
-            ))
-            for _batch in batches
-        ]
-        results = await asyncio.gather(*_tasks)
-        return flatten(results)
+                max_parallel_requests=max_parallel_requests,
+                client=_client,
+                concurrency_limiter=concurrency_limiter,
+                parallel_sub_search=parallel_sub_search,
+                max_pending_batches=max_pending_batches,
+                report=report,
+                retry_policy=retry_policy,
+                max_batch_bytes=max_batch_bytes,
+                body_envelope=body_envelope,
+                allow_empty_payload=allow_empty_payload,
+            )
+            async with aclosing(batch_results):
+                async for indexed_results in batch_results:
+                    yield indexed_results
+        return
+
+    if isinstance(concurrency_limiter, AdaptiveConcurrencyLimiter):
+        worker_count = concurrency_limiter.max_limit
+    elif isinstance(concurrency_limiter, asyncio.Semaphore):
+        # A Semaphore has no public capacity, so its permits free at the start are taken as the capacity. The
+        # semaphore gates every request, extra workers of a semaphore shared with other imports just wait on it.
+        worker_count = max(concurrency_limiter._value, max_parallel_requests)
+    else:
+        worker_count = max_parallel_requests
+    max_pending_batches = max(max_pending_batches or worker_count + 1, worker_count)
+
+    # The workers bound the amount of batches sent at a time. A given limiter replaces max_parallel_requests, and
+    # with parallel sub searches one batch can have several requests in flight, so then every request is gated.
+    request_limiter = concurrency_limiter or (asyncio.Semaphore(max_parallel_requests) if parallel_sub_search else None)
+
+    room = asyncio.Semaphore(max_pending_batches)
+    batch_queue: asyncio.Queue = asyncio.Queue()
+    result_queue: asyncio.Queue = asyncio.Queue()
+    _done = object()
+
+    async def _produce():
+        sent_batches = 0
+        # Every request-sized batch is numbered in the input order, so the results can be put back in that order
+        batch_index = 0
+        try:
+            batch_iterator = aiter(as_async_iterable(batches))
+            while True:
+                await room.acquire()
+                _batch = await anext(batch_iterator, None)
+                if _batch is None:
+                    break
+
+                if max_batch_bytes:
+                    # Batches over the size limit go out as several requests, each of them taking a pending slot
+                    for index, encoded_batch in enumerate(plan_encoded_batches(_batch, max_batch_bytes, body_envelope)):
+                        if index:
+                            await room.acquire()
+                        await batch_queue.put((batch_index, encoded_batch))
+                        batch_index += 1
+                else:
+                    await batch_queue.put((batch_index, _batch))
+                    batch_index += 1
+                sent_batches += 1
+
+            if sent_batches == 0 and not allow_empty_payload:
+                raise Exception(f"Payload missing when attempting to POST to : {path}")
+        except Exception as e:
+            result_queue.put_nowait(e)
+        finally:
+            for _ in range(worker_count):
+                batch_queue.put_nowait(_done)
+
+    async def _work():
+        try:
+            while (queued := await batch_queue.get()) is not _done:
+                batch_index, _batch = queued
+                result_queue.put_nowait((batch_index, await _binary_search_enabled_post_httpx(
+                    path=path,
+                    payload=_batch,
+                    params=params,
+                    auth=auth,
+                    client=client,
+                    binary_search_depth=0,
+                    binary_search_max_depth=binary_search_max_depth,
+                    binary_err_search_sublists=binary_err_search_sublists,
+                    method=method,
+                    concurrency_limiter=request_limiter,
+                    parallel_sub_search=parallel_sub_search,
+                    report=report,
+                    retry_policy=retry_policy,
+                    body_envelope=body_envelope,
+                )))
+        except Exception as e:
+            result_queue.put_nowait(e)
+        finally:
+            result_queue.put_nowait(_done)
+
+    tasks = [asyncio.create_task(_produce())] + [asyncio.create_task(_work()) for _ in range(worker_count)]
+    try:
+        finished_workers = 0
+        while finished_workers < worker_count:
+            results = await result_queue.get()
+            if results is _done:
+                finished_workers += 1
+                continue
+
+            if isinstance(results, Exception):
+                raise results
+
+            room.release()
+            yield results
+    finally:
+        for task in tasks:
+            task.cancel()
+        # Let the cancelled tasks unwind, so no request or batch is left behind when the iteration stops early
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def iter_batch_results_with_binary_err_search_httpx(
+    path: str,
+    batches: Iterable[list[dict] | list[list[dict]]] | AsyncIterable[list[dict] | list[list[dict]]],
+    auth: Tuple[str, str] | None = None,
+    proxies: dict | None = None,
+    params: dict | None = None,
+    binary_search_max_depth: int | None = None,
+    binary_err_search_sublists: bool = True,
+    method: Literal['POST', 'PATCH'] = 'POST',
+    max_parallel_requests: int = 1,
+    client: httpx.AsyncClient | None = None,
+    concurrency_limiter: AdaptiveConcurrencyLimiter | asyncio.Semaphore | None = None,
+    parallel_sub_search: bool = False,
+    max_pending_batches: int | None = None,
+    report: ResponseRecorder | None = None,
+    retry_policy: RetryPolicy | None = None,
+    max_batch_bytes: int | None = None,
+    body_envelope: str | None = None,
+    allow_empty_payload: bool = False,
+) -> AsyncGenerator[list[httpx.Response], None]:
+    """
+        Sends the batches with a pool of workers and yields the responses of each batch as soon as it is done.
+
+        A producer pulls batches from the (async) iterable into a queue that the workers consume. A new batch is
+        only pulled when fewer than `max_pending_batches` batches are queued, being sent or waiting to be yielded,
+        so a slow consumer slows down the reading of the input instead of piling up batches and responses.
+        With `max_batch_bytes` the batches are also split by the size of their request bodies, using the entities
+        encoded once for sending. This applies to batches from a list, an iterable or a file alike. With a
+        `body_envelope` the batches are sent as the only field of an object, e.g. `{"ids": [...]}` for the delete
+        endpoints.
+        The amount of workers is `max_parallel_requests`, or the capacity of a given `concurrency_limiter`: the
+        maximum limit of an AdaptiveConcurrencyLimiter, or the free permits of an asyncio.Semaphore at the start
+        (if more than `max_parallel_requests`).
+        Results are yielded in completion order, which is the input order with a single worker. The list returning
+        `send_batches_with_binary_err_search_httpx` and `send_post_with_binary_err_search_httpx` keep the batch order.
+        With a `report` the final responses are recorded into it instead, and each batch yields an empty list unless
+        the report keeps the responses.
+    """
+    indexed_results = _iter_indexed_batch_results(
+        path=path,
+        batches=batches,
+        auth=auth,
+        proxies=proxies,
+        params=params,
+        binary_search_max_depth=binary_search_max_depth,
+        binary_err_search_sublists=binary_err_search_sublists,
+        method=method,
+        max_parallel_requests=max_parallel_requests,
+        client=client,
+        concurrency_limiter=concurrency_limiter,
+        parallel_sub_search=parallel_sub_search,
+        max_pending_batches=max_pending_batches,
+        report=report,
+        retry_policy=retry_policy,
+        max_batch_bytes=max_batch_bytes,
+        body_envelope=body_envelope,
+        allow_empty_payload=allow_empty_payload,
+    )
+    async with aclosing(indexed_results):
+        async for _, results in indexed_results:
+            yield results
 
-    # Is not group_by'ed -> If batch size is not configured, try sending everything
-    if not batch_size:
-        return await _binary_search_enabled_post_httpx(
-            path=path,
-            payload=payload,
-            params=params,
-            auth=auth,
-            client=client,
-            binary_search_depth=0,
-            binary_search_max_depth=binary_search_max_depth,
-            binary_err_search_sublists=binary_err_search_sublists,
-            method=method,
-        )
 
-    # When batch size is configured, batch the payloads
-    _tasks = [
-        _with_sem(_binary_search_enabled_post_httpx(
-            path=path,
-            payload=batched_payload,
-            params=params,
-            auth=auth,
-            client=client,
-            binary_search_depth=0,
-            binary_search_max_depth=binary_search_max_depth,
-            binary_err_search_sublists=binary_err_search_sublists,
-            method=method,
-        ))
-        for batched_payload in batch(payload, batch_size)
-    ]
-    results = await asyncio.gather(*_tasks)
-    return flatten(results)
+async def collect_results_in_batch_order(
+    indexed_results: AsyncIterable[tuple[int, list[httpx.Response]]],
+) -> list[httpx.Response]:
+    results_by_index = {}
+    async with aclosing(indexed_results):
+        async for batch_index, results in indexed_results:
+            results_by_index[batch_index] = results
+
+    return [response for batch_index in sorted(results_by_index) for response in results_by_index[batch_index]]
+
+
+async def iter_post_with_binary_err_search_httpx(
+    path: str,
+    payload: list[dict] | Iterable[dict] | AsyncIterable[dict],
+    group_by_key: str | None = None,
+    auth: Tuple[str, str] | None = None,
+    proxies: dict | None = None,
+    params: dict | None = None,
+    batch_size: int | None = None,
+    binary_search_max_depth: int | None = None,
+    binary_err_search_sublists: bool = True,
+    method: Literal['POST', 'PATCH'] = 'POST',
+    max_parallel_requests: int = 1,
+    client: httpx.AsyncClient | None = None,
+    concurrency_limiter: AdaptiveConcurrencyLimiter | asyncio.Semaphore | None = None,
+    parallel_sub_search: bool = False,
+    max_pending_batches: int | None = None,
+    report: ResponseRecorder | None = None,
+    retry_policy: RetryPolicy | None = None,
+    max_batch_bytes: int | None = None,
+    body_envelope: str | None = None,
+    group_packing: GroupPacking = 'greedy',
+    oversized_groups: OversizedGroupPolicy = 'alone',
+    allow_empty_payload: bool = False,
+) -> AsyncGenerator[list[httpx.Response], None]:
+    batch_results = iter_batch_results_with_binary_err_search_httpx(
+        path=path,
+        batches=_payload_batches(
+            path, payload, group_by_key, batch_size, allow_empty_payload, group_packing, oversized_groups,
+        ),
+        auth=auth,
+        proxies=proxies,
+        params=params,
+        binary_search_max_depth=binary_search_max_depth,
+        binary_err_search_sublists=binary_err_search_sublists,
+        method=method,
+        max_parallel_requests=max_parallel_requests,
+        client=client,
+        concurrency_limiter=concurrency_limiter,
+        parallel_sub_search=parallel_sub_search,
+        max_pending_batches=max_pending_batches,
+        report=report,
+        retry_policy=retry_policy,
+        max_batch_bytes=max_batch_bytes,
+        body_envelope=body_envelope,
+        allow_empty_payload=allow_empty_payload,
+    )
+    async with aclosing(batch_results):
+        async for results in batch_results:
+            yield results
+
+
+async def send_post_with_binary_err_search_httpx(
+    path: str,
+    payload: list[dict] | Iterable[dict] | AsyncIterable[dict],
+    group_by_key: str | None = None,
+    auth: Tuple[str, str] | None = None,
+    proxies: dict | None = None,
+    params: dict | None = None,
+    batch_size: int | None = None,
+    binary_search_max_depth: int | None = None,
+    binary_err_search_sublists: bool = True,
+    method: Literal['POST', 'PATCH'] = 'POST',
+    max_parallel_requests: int = 1,
+    client: httpx.AsyncClient | None = None,
+    concurrency_limiter: AdaptiveConcurrencyLimiter | asyncio.Semaphore | None = None,
+    parallel_sub_search: bool = False,
+    max_pending_batches: int | None = None,
+    report: ResponseRecorder | None = None,
+    retry_policy: RetryPolicy | None = None,
+    max_batch_bytes: int | None = None,
+    body_envelope: str | None = None,
+    group_packing: GroupPacking = 'greedy',
+    oversized_groups: OversizedGroupPolicy = 'alone',
+) -> list[httpx.Response]:
+    # The responses are returned in the order of the batches, whatever order the batches finish in
+    return await collect_results_in_batch_order(_iter_indexed_batch_results(
+        path=path,
+        batches=_payload_batches(path, payload, group_by_key, batch_size, False, group_packing, oversized_groups),
+        auth=auth,
+        proxies=proxies,
+        params=params,
+        binary_search_max_depth=binary_search_max_depth,
+        binary_err_search_sublists=binary_err_search_sublists,
+        method=method,
+        max_parallel_requests=max_parallel_requests,
+        client=client,
+        concurrency_limiter=concurrency_limiter,
+        parallel_sub_search=parallel_sub_search,
+        max_pending_batches=max_pending_batches,
+        report=report,
+        retry_policy=retry_policy,
+        max_batch_bytes=max_batch_bytes,
+        body_envelope=body_envelope,
+    ))
+
+
+async def send_batches_with_binary_err_search_httpx(
+    path: str,
+    batches: Iterable[list[dict] | list[list[dict]]] | AsyncIterable[list[dict] | list[list[dict]]],
+    auth: Tuple[str, str] | None = None,
+    proxies: dict | None = None,
+    params: dict | None = None,
+    binary_search_max_depth: int | None = None,
+    binary_err_search_sublists: bool = True,
+    method: Literal['POST', 'PATCH'] = 'POST',
+    max_parallel_requests: int = 1,
+    client: httpx.AsyncClient | None = None,
+    concurrency_limiter: AdaptiveConcurrencyLimiter | asyncio.Semaphore | None = None,
+    parallel_sub_search: bool = False,
+    max_pending_batches: int | None = None,
+    report: ResponseRecorder | None = None,
+    retry_policy: RetryPolicy | None = None,
+    max_batch_bytes: int | None = None,
+    body_envelope: str | None = None,
+) -> list[httpx.Response]:
+    return await collect_results_in_batch_order(_iter_indexed_batch_results(
+        path=path,
+        batches=batches,
+        auth=auth,
+        proxies=proxies,
+        params=params,
+        binary_search_max_depth=binary_search_max_depth,
+        binary_err_search_sublists=binary_err_search_sublists,
+        method=method,
+        max_parallel_requests=max_parallel_requests,
+        client=client,
+        concurrency_limiter=concurrency_limiter,
+        parallel_sub_search=parallel_sub_search,
+        max_pending_batches=max_pending_batches,
+        report=report,
+        retry_policy=retry_policy,
+        max_batch_bytes=max_batch_bytes,
+        body_envelope=body_envelope,
+    ))
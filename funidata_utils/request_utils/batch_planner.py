@@ -0,0 +1,121 @@
+#  Copyright (c) 2025 Funidata Oy.
+#  All rights reserved.
+# ------------------------------------------------------------------------------
+
+import heapq
+import math
+from typing import Literal, NamedTuple
+
+from .encoded_payload import EncodedPayload, PayloadView, is_grouped_view
+
+
+GroupPacking = Literal['greedy', 'balanced']
+OversizedGroupPolicy = Literal['alone', 'split', 'raise']
+
+
+class EncodedBatch(NamedTuple):
+    encoded: EncodedPayload
+    view: PayloadView
+
+
+def split_view_by_size(encoded: EncodedPayload, view: PayloadView, max_batch_bytes: int) -> list[PayloadView]:
+    """
+        Splits the view into consecutive views whose request bodies, including the envelope of the payload, stay
+        within `max_batch_bytes`. Groups are kept whole, and an entity or a group larger than the limit gets a view
+        of its own.
+    """
+    grouped = is_grouped_view(view)
+    # The opening bracket and the envelope around the array
+    empty_bytes = 1 + encoded.envelope_size()
+    views = []
+    current = []
+    current_bytes = empty_bytes
+    for item in view:
+        # Each fragment takes a separator or the closing bracket on top of its own size
+        item_bytes = sum(len(encoded.fragments[i]) + 1 for i in item) if grouped else len(encoded.fragments[item]) + 1
+        if current and current_bytes + item_bytes > max_batch_bytes:
+            views.append(current)
+            current = []
+            current_bytes = empty_bytes
+
+        current.append(item)
+        current_bytes += item_bytes
+
+    if current:
+        views.append(current)
+
+    if len(views) == 1:
+        return [view]
+
+    return views
+
+
+def plan_encoded_batches(
+    payload: list[dict] | list[list[dict]],
+    max_batch_bytes: int | None = None,
+    envelope: str | None = None,
+) -> list[EncodedBatch]:
+    """
+        Encodes the batch once and splits it further by the size of the request body, when `max_batch_bytes` is
+        given. The entity count of the batch is capped by the batching before this.
+    """
+    encoded, view = EncodedPayload.encode(payload)
+    encoded.envelope = envelope
+    if not max_batch_bytes:
+        return [EncodedBatch(encoded, view)]
+
+    return [EncodedBatch(encoded, _view) for _view in split_view_by_size(encoded, view, max_batch_bytes)]
+
+
+def pack_groups_balanced(
+    groups: list[list[dict]],
+    max_batch_size: int,
+    oversized_groups: OversizedGroupPolicy = 'alone',
+) -> list[list[list[dict]]]:
+    """
+        Packs the groups into as few batches of at most `max_batch_size` items as the groups allow, evening out
+        the batch sizes: the groups are placed largest first, each into the least filled batch it fits in.
+        Batches keep the groups in their original order.
+
+        A group larger than `max_batch_size` is sent in a batch of its own ('alone'), cut into pieces of at most
+        `max_batch_size` items that are packed like the other groups ('split'), or rejected ('raise').
+    """
+    # (position, group) pairs, the position keeps the original order of the groups and of the pieces of a group
+    packable = []
+    oversized = []
+    for index, group in enumerate(groups):
+        if len(group) <= max_batch_size:
+            packable.append(((index, 0), group))
+            continue
+
+        match oversized_groups:
+            case 'alone':
+                oversized.append([((index, 0), group)])
+            case 'split':
+                packable += [
+                    ((index, offset), group[offset:offset + max_batch_size])
+                    for offset in range(0, len(group), max_batch_size)
+                ]
+            case 'raise':
+                raise Exception(f'Group of {len(group)} items does not fit into a batch of {max_batch_size}')
+            case _:
+                raise Exception(f'Unsupported oversized group policy: {oversized_groups}')
+
+    batch_count = max(math.ceil(sum(len(group) for _, group in packable) / max_batch_size), 1)
+    batches = [[] for _ in range(batch_count)]
+    fill = [(0, batch_index) for batch_index in range(batch_count)]
+    for position, group in sorted(packable, key=lambda x: len(x[1]), reverse=True):
+        size, batch_index = fill[0]
+        if size + len(group) <= max_batch_size:
+            heapq.heapreplace(fill, (size + len(group), batch_index))
+        else:
+            # Does not fit even into the least filled batch
+            batch_index = len(batches)
+            batches.append([])
+            heapq.heappush(fill, (len(group), batch_index))
+
+        batches[batch_index].append((position, group))
+
+    packed = [sorted(_batch, key=lambda x: x[0]) for _batch in batches + oversized if _batch]
+    packed.sort(key=lambda _batch: _batch[0][0])
+    return [[group for _, group in _batch] for _batch in packed]
@@ -0,0 +1,127 @@
+#  Copyright (c) 2025 Funidata Oy.
+#  All rights reserved.
+# ------------------------------------------------------------------------------
+
+import logging
+from typing import Tuple, TYPE_CHECKING
+
+import httpx
+
+if TYPE_CHECKING:
+    from ..auth.source_config import SourceConfig
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LIMITS = httpx.Limits(max_connections=20, max_keepalive_connections=20, keepalive_expiry=30)
+# Seconds a request to Sisu may take, the import requests go with the timeout of their client
+DEFAULT_TIMEOUT = 120
+
+
+def get_proxy_mounts(
+    proxies: dict | None,
+    limits: httpx.Limits = DEFAULT_LIMITS,
+) -> dict[str, httpx.HTTPTransport] | None:
+    if not proxies:
+        return None
+
+    return {
+        "http://": httpx.HTTPTransport(proxy=proxies.get('http'), limits=limits),
+        "https://": httpx.HTTPTransport(proxy=proxies.get('https'), limits=limits),
+    }
+
+
+def get_async_proxy_mounts(
+    proxies: dict | None,
+    limits: httpx.Limits = DEFAULT_LIMITS,
+) -> dict[str, httpx.AsyncHTTPTransport] | None:
+    if not proxies:
+        return None
+
+    return {
+        "http://": httpx.AsyncHTTPTransport(proxy=proxies.get('http'), limits=limits),
+        "https://": httpx.AsyncHTTPTransport(proxy=proxies.get('https'), limits=limits),
+    }
+
+
+class SisuClientManager:
+    """
+        Owns pooled httpx clients for a single Sisu host / proxy configuration.
+
+        One client is kept per authentication tuple, so export and integration users get their own
+        connection pools, and keep-alive connections are reused across calls that share the manager.
+        Close the manager with `close` / `aclose`, or use it as a (async) context manager:
+
+            async with SisuClientManager(sisu_config) as client_manager:
+                await import_to_sisu(..., client_manager=client_manager)
+    """
+
+    def __init__(
+        self,
+        source_config: 'SourceConfig',
+        limits: httpx.Limits = DEFAULT_LIMITS,
+        timeout: httpx.Timeout | float | None = DEFAULT_TIMEOUT,
+        transport: httpx.BaseTransport | None = None,
+        async_transport: httpx.AsyncBaseTransport | None = None,
+    ):
+        self.host = source_config.host
+        self.proxies = source_config.proxies
+        self.limits = limits
+        self.timeout = timeout
+        self._transport = transport
+        self._async_transport = async_transport
+        self._clients: dict[Tuple[str, str] | None, httpx.Client] = {}
+        self._async_clients: dict[Tuple[str, str] | None, httpx.AsyncClient] = {}
+
+    def get_client(self, auth: Tuple[str, str] | None = None) -> httpx.Client:
+        client = self._clients.get(auth)
+        if client is None or client.is_closed:
+            logger.debug("Creating pooled sync client for %s", self.host)
+            client = httpx.Client(
+                auth=auth,
+                mounts=get_proxy_mounts(self.proxies, self.limits),
+                limits=self.limits,
+                timeout=self.timeout,
+                transport=self._transport,
+            )
+            self._clients[auth] = client
+
+        return client
+
+    def get_async_client(self, auth: Tuple[str, str] | None = None) -> httpx.AsyncClient:
+        client = self._async_clients.get(auth)
+        if client is None or client.is_closed:
+            logger.debug("Creating pooled async client for %s", self.host)
+            client = httpx.AsyncClient(
+                auth=auth,
+                mounts=get_async_proxy_mounts(self.proxies, self.limits),
+                limits=self.limits,
+                timeout=self.timeout,
+                transport=self._async_transport,
+            )
+            self._async_clients[auth] = client
+
+        return client
+
+    def close(self):
+        for client in self._clients.values():
+            client.close()
+        self._clients = {}
+
+    async def aclose(self):
+        for client in self._async_clients.values():
+            await client.aclose()
+        self._async_clients = {}
+        self.close()
+
+    def __enter__(self) -> 'SisuClientManager':
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    async def __aenter__(self) -> 'SisuClientManager':
+        return self
+
+    async def __aexit__(self, *args):
+        await self.aclose()
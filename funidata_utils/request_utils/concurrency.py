@@ -0,0 +1,109 @@
+#  Copyright (c) 2025 Funidata Oy.
+#  All rights reserved.
+# ------------------------------------------------------------------------------
+
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable
+
+import httpx
+
+
+logger = logging.getLogger(__name__)
+
+BACKOFF_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+        AIMD (additive increase, multiplicative decrease) limiter for concurrent requests.
+
+        The limit grows by `increase_step` per limit's worth of healthy responses (roughly one step per round-trip
+        window), and is multiplied by `decrease_factor` when a response has a status code in `backoff_status_codes`
+        or the request times out. Responses slower than `latency_threshold` seconds hold the limit where it is.
+        Only requests started after the latest decrease can cause another decrease, so one burst of failures
+        halves the limit once instead of collapsing it to `min_limit`.
+    """
+
+    def __init__(
+        self,
+        min_limit: int = 1,
+        max_limit: int = 32,
+        initial_limit: int | None = None,
+        increase_step: float = 1.0,
+        decrease_factor: float = 0.5,
+        latency_threshold: float | None = None,
+        backoff_status_codes: frozenset[int] = BACKOFF_STATUS_CODES,
+    ):
+        if not 1 <= min_limit <= max_limit:
+            raise ValueError(f'Invalid limits: min_limit={min_limit}, max_limit={max_limit}')
+        if not 0 < decrease_factor < 1:
+            raise ValueError(f'decrease_factor must be between 0 and 1, got {decrease_factor}')
+
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.latency_threshold = latency_threshold
+        self.backoff_status_codes = backoff_status_codes
+
+        self._limit = float(min(max(initial_limit or min_limit, min_limit), max_limit))
+        self._in_flight = 0
+        self._epoch = 0
+        self._condition = asyncio.Condition()
+
+    @property
+    def current_limit(self) -> int:
+        return max(self.min_limit, int(self._limit))
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def __repr__(self):
+        return f'{type(self).__name__}(current_limit={self.current_limit}, in_flight={self._in_flight})'
+
+    async def acquire(self) -> int:
+        async with self._condition:
+            await self._condition.wait_for(lambda: self._in_flight < self.current_limit)
+            self._in_flight += 1
+            return self._epoch
+
+    async def release(self):
+        async with self._condition:
+            self._in_flight -= 1
+            self._condition.notify_all()
+
+    def on_success(self, elapsed: float):
+        if self.latency_threshold is not None and elapsed > self.latency_threshold:
+            return
+
+        self._limit = min(float(self.max_limit), self._limit + self.increase_step / self._limit)
+
+    def on_overload(self, epoch: int):
+        if epoch != self._epoch:
+            # Already backed off for requests that were in flight at the same time
+            return
+
+        self._epoch += 1
+        self._limit = max(float(self.min_limit), self._limit * self.decrease_factor)
+        logger.debug("Backing off, concurrency limit is now %d", self.current_limit)
+
+    async def run(self, send: Callable[[], Awaitable[httpx.Response]]) -> httpx.Response:
+        epoch = await self.acquire()
+        started = time.perf_counter()
+        try:
+            response = await send()
+            if response.status_code in self.backoff_status_codes:
+                self.on_overload(epoch)
+            else:
+                self.on_success(time.perf_counter() - started)
+
+            return response
+        except httpx.TimeoutException:
+            self.on_overload(epoch)
+            raise
+        finally:
+            # Limit changes are applied before releasing, so waiters see the new limit right away
+            await self.release()
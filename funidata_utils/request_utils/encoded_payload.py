@@ -0,0 +1,124 @@
+#  Copyright (c) 2025 Funidata Oy.
+#  All rights reserved.
+# ------------------------------------------------------------------------------
+
+import json
+from itertools import chain
+from typing import Any, Collection, Sequence
+
+
+IndexView = range | list[int]
+PayloadView = IndexView | list[IndexView]
+
+
+def encode_entity(entity: Any) -> bytes:
+    # Same compact encoding httpx uses for `json=`
+    return json.dumps(entity, ensure_ascii=False, separators=(",", ":"), allow_nan=False).encode('utf-8')
+
+
+def is_grouped_view(view: PayloadView) -> bool:
+    return all(not isinstance(x, int) for x in view[::3])
+
+
+def flatten_view(view: PayloadView) -> list[int]:
+    if is_grouped_view(view):
+        return list(chain.from_iterable(view))
+
+    return list(view)
+
+
+class EncodedPayload:
+    """
+        Entities of one batch, each serialized to JSON bytes exactly once.
+
+        Splitting a batch only handles views of indexes into `fragments` (ranges or lists of indexes, or lists of
+        those for grouped batches), and request bodies are assembled by joining the pre-encoded fragments.
+        With an `envelope` the array is sent as the only field of an object, e.g. `{"ids": [...]}`.
+    """
+    __slots__ = ('fragments', 'ids', 'envelope')
+
+    def __init__(self, fragments: list[bytes], ids: list[Any], envelope: str | None = None):
+        self.fragments = fragments
+        self.ids = ids
+        self.envelope = envelope
+
+    @classmethod
+    def encode(cls, payload: list[dict] | list[list[dict]]) -> tuple['EncodedPayload', PayloadView]:
+        """
+            Encodes a flat or grouped payload, returning the encoded entities and a view with the original structure:
+            [ {a}, {b}, {c} ]           -> range(0, 3)
+            [ [{a}, {b}], [{c}] ]       -> [ range(0, 2), range(2, 3) ]
+        """
+        encoded = cls([], [])
+        if not payload or not all(isinstance(x, list) for x in payload[::3]):
+            encoded._extend(payload)
+            return encoded, range(len(payload))
+
+        view = []
+        for group in payload:
+            start = len(encoded.fragments)
+            encoded._extend(group)
+            view.append(range(start, len(encoded.fragments)))
+
+        return encoded, view
+
+    def _extend(self, entities: Sequence[Any]):
+        for entity in entities:
+            self.fragments.append(encode_entity(entity))
+            self.ids.append(entity.get('id') if isinstance(entity, dict) else entity)
+
+    def _envelope_prefix(self) -> bytes:
+        return b'{' + encode_entity(self.envelope) + b':' if self.envelope is not None else b''
+
+    def envelope_size(self) -> int:
+        # Bytes the envelope adds around the array
+        return len(self._envelope_prefix()) + 1 if self.envelope is not None else 0
+
+    def body(self, indexes: Sequence[int]) -> bytes:
+        body = b'[' + b','.join([self.fragments[i] for i in indexes]) + b']'
+        if self.envelope is not None:
+            return self._envelope_prefix() + body + b'}'
+
+        return body
+
+    def size(self, indexes: Sequence[int]) -> int:
+        # Size of the request body for the indexes, including the brackets, separators and envelope
+        return sum(len(self.fragments[i]) for i in indexes) + max(len(indexes), 1) + 1 + self.envelope_size()
+
+    def split_view(
+        self,
+        view: PayloadView,
+        failing_ids: Collection[Any] = (),
+        split_groups: bool = True,
+    ) -> tuple[PayloadView, PayloadView]:
+        """
+            Splits the view for the next step of the binary error search: the failing entities (or the groups
+            containing them, when groups are not to be split) apart from the rest, or in halves when the failing ids
+            cannot tell them apart.
+        """
+        first_batch = []
+        second_batch = []
+        if failing_ids:
+            failing_id_set = set(failing_ids)
+            if not is_grouped_view(view):
+                # View is not a list of lists, can directly check against it.
+                for _index in view:
+                    (first_batch if self.ids[_index] in failing_id_set else second_batch).append(_index)
+            elif split_groups:
+                # If we allow searching sublists, we can split entities by passing/failing directly
+                for subset in view:
+                    for _index in subset:
+                        (first_batch if self.ids[_index] in failing_id_set else second_batch).append(_index)
+            else:
+                # If we don't allow sublist searching, split according to existence of fail in a batch
+                for subset in view:
+                    if any(self.ids[_index] in failing_id_set for _index in subset):
+                        first_batch.append(subset)
+                    else:
+                        second_batch.append(subset)
+
+        # If we were unable to create a split at all, continue with default behavior.
+        if len(first_batch) == 0 or len(second_batch) == 0:
+            return view[::2], view[1::2]
+
+        return first_batch, second_batch
@@ -2,13 +2,26 @@
 #  All rights reserved.
 # ------------------------------------------------------------------------------
 
-from typing import Tuple, Any, Callable, Literal
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Tuple, Any, Callable, Iterable, Literal
 
 import httpx
-from ..utils import flatten, group_by
 
+from .batch_planner import (
+    EncodedBatch, GroupPacking, OversizedGroupPolicy, plan_encoded_batches, pack_groups_balanced,
+)
+from .client_manager import get_proxy_mounts
+from .encoded_payload import EncodedPayload, PayloadView, is_grouped_view, flatten_view
+from .import_report import ACCEPTED_RESPONSE_CODES, ResponseRecorder, parse_error_json, get_failing_ids
+from .retries import RetryPolicy, send_with_retries_sync
+from ..utils import group_by
 
-ACCEPTED_RESPONSE_CODES = {200, 201, 202, 204}
+
+JSON_HEADERS = {'Content-Type': 'application/json'}
+logger = logging.getLogger(__name__)
 
 
 def batch(iterable, steps=1):
@@ -47,24 +60,48 @@ def send_get_httpx(
     auth: Tuple[str, str] | None = None,
     proxies: dict | None = None,
     params: dict | None = None,
+    client: httpx.Client | None = None,
+    retry_policy: RetryPolicy | None = None,
 ) -> httpx.Response:
-    proxy_mounts = {
-        "http://": httpx.HTTPTransport(proxy=proxies.get('http')),
-        "https://": httpx.HTTPTransport(proxy=proxies.get('https')),
-    } if proxies else None
-    client = httpx.Client(mounts=proxy_mounts, auth=auth)
-    response = client.get(
-        path,
-        auth=auth,
-        params=params,
-        timeout=600,
+    if client is None:
+        with httpx.Client(mounts=get_proxy_mounts(proxies), auth=auth) as _client:
+            return send_get_httpx(
+                path=path,
+                auth=auth,
+                params=params,
+                client=_client,
+                retry_policy=retry_policy,
+            )
+
+    response = send_with_retries_sync(
+        partial(
+            client.get,
+            path,
+            auth=auth,
+            params=params,
+            timeout=600,
+        ),
+        retry_policy,
     )
     return response
 
 
-def _binary_search_enabled_post_httpx(
+class _SynchronizedRecorder:
+    # Worker threads record their final responses one at a time
+    def __init__(self, report: ResponseRecorder):
+        self.report = report
+        self.keep_responses = report.keep_responses
+        self._lock = threading.Lock()
+
+    def add_response(self, response: httpx.Response, ids: Iterable[Any], err_json: dict | None = None):
+        with self._lock:
+            self.report.add_response(response, ids, err_json)
+
+
+def _binary_search_step(
     path: str,
-    payload: list[dict] | list[list[dict]],
+    encoded: EncodedPayload,
+    view: PayloadView,
     client: httpx.Client,
     auth: Tuple[str, str] | None = None,
     params: dict | None = None,
@@ -72,51 +109,84 @@ def _binary_search_enabled_post_httpx(
     binary_search_max_depth: int | None = None,
     binary_err_search_sublists: bool = True,
     method: Literal['POST', 'PATCH'] = 'POST',
+    report: ResponseRecorder | None = None,
+    retry_policy: RetryPolicy | None = None,
 ) -> list[httpx.Response]:
-    is_complex_list_of_batches = False
-    if isinstance(payload, list) and all(isinstance(x, list) for x in payload[::3]):
-        is_complex_list_of_batches = True
+    is_complex_list_of_batches = is_grouped_view(view)
+
+    def _final(err_json: dict | None = None) -> list[httpx.Response]:
+        if report is None:
+            return [response]
+
+        # Record the outcome and let go of the response, and with it the request body
+        report.add_response(response, [encoded.ids[_index] for _index in _request_indexes], err_json)
+        return [response] if report.keep_responses else []
 
     match method:
-        case 'POST':
-            response = client.post(
-                path,
-                auth=auth,
-                json=flatten(payload) if is_complex_list_of_batches else payload,
-                params=params,
-                timeout=60,
+        case 'POST' | 'PATCH':
+            _request_indexes = flatten_view(view) if is_complex_list_of_batches else view
+            logger.debug("Sending %s with %d items to %s", method, len(_request_indexes), path)
+            response = send_with_retries_sync(
+                partial(
+                    client.request,
+                    method,
+                    path,
+                    auth=auth,
+                    content=encoded.body(_request_indexes),
+                    headers=JSON_HEADERS,
+                    params=params,
+                    timeout=60,
+                ),
+                retry_policy,
             )
 
-        case 'PATCH':
-            response = client.patch(
-                path,
+        case _:
+            raise Exception(f'Unsupported method: {method}')
+
+    if response.status_code == 413 and len(_request_indexes) > 1:
+        # The body was too large, not the data invalid: halve it whatever the search depth
+        _split_view = flatten_view(view) if is_complex_list_of_batches and len(view) == 1 else view
+        responses = []
+        for _sub_batch in encoded.split_view(_split_view):
+            responses += _binary_search_step(
+                path=path,
+                encoded=encoded,
+                view=_sub_batch,
                 auth=auth,
-                json=flatten(payload) if is_complex_list_of_batches else payload,
                 params=params,
-                timeout=60,
+                client=client,
+                binary_search_depth=binary_search_depth,
+                binary_search_max_depth=binary_search_max_depth,
+                binary_err_search_sublists=binary_err_search_sublists,
+                method=method,
+                report=report,
+                retry_policy=retry_policy,
             )
-
-        case _:
-            raise Exception(f'Unsupported method: {method}')
+        return responses
 
     if (
         binary_search_max_depth == 0 or
         (binary_search_max_depth and binary_search_depth >= binary_search_max_depth)
         or response.status_code in ACCEPTED_RESPONSE_CODES
     ):
-        return [response]
+        return _final()
+
+    if retry_policy and retry_policy.is_retryable_response(response):
+        # Retries ran out on a transient failure, splitting the batch would only add load on a struggling server
+        return _final()
 
     if not is_complex_list_of_batches:
-        if len(payload) <= 1:
-            return [response]
+        if len(view) <= 1:
+            return _final()
     else:
-        if len(payload) <= 1 and not binary_err_search_sublists:
-            return [response]
+        if len(view) <= 1 and not binary_err_search_sublists:
+            return _final()
 
-        if len(payload) == 1 and binary_err_search_sublists:
-            return _binary_search_enabled_post_httpx(
+        if len(view) == 1 and binary_err_search_sublists:
+            return _binary_search_step(
                 path=path,
-                payload=flatten(payload),
+                encoded=encoded,
+                view=flatten_view(view),
                 auth=auth,
                 params=params,
                 client=client,
@@ -124,64 +194,82 @@ def _binary_search_enabled_post_httpx(
                 binary_search_max_depth=binary_search_max_depth,
                 binary_err_search_sublists=False,
                 method=method,
+                report=report,
+                retry_policy=retry_policy,
             )
 
-    first_half_responses = _binary_search_enabled_post_httpx(
+    err_json = parse_error_json(response)
+    failing_ids = []
+    if 400 <= response.status_code < 500:
+        failing_ids = get_failing_ids(err_json)
+
+    # Every entity sent failed, there is nothing to split
+    if len(failing_ids) == len(_request_indexes):
+        return _final(err_json)
+
+    # Failing entities apart from the rest when Sisu named them, otherwise in halves
+    first_batch, second_batch = encoded.split_view(view, failing_ids, split_groups=binary_err_search_sublists)
+
+    responses = []
+    for _sub_batch in (first_batch, second_batch):
+        responses += _binary_search_step(
+            path=path,
+            encoded=encoded,
+            view=_sub_batch,
+            auth=auth,
+            params=params,
+            client=client,
+            binary_search_depth=binary_search_depth + 1,
+            binary_search_max_depth=binary_search_max_depth,
+            binary_err_search_sublists=binary_err_search_sublists,
+            method=method,
+            report=report,
+            retry_policy=retry_policy,
+        )
+
+    return responses
+
+
+def _binary_search_enabled_post_httpx(
+    path: str,
+    payload: list[dict] | list[list[dict]] | EncodedBatch,
+    client: httpx.Client,
+    auth: Tuple[str, str] | None = None,
+    params: dict | None = None,
+    binary_search_depth: int = 0,
+    binary_search_max_depth: int | None = None,
+    binary_err_search_sublists: bool = True,
+    method: Literal['POST', 'PATCH'] = 'POST',
+    report: ResponseRecorder | None = None,
+    retry_policy: RetryPolicy | None = None,
+) -> list[httpx.Response]:
+    # Every entity is serialized once, the search only passes around views of indexes to the encoded entities
+    encoded, view = payload if isinstance(payload, EncodedBatch) else EncodedPayload.encode(payload)
+    return _binary_search_step(
         path=path,
-        payload=payload[::2],
-        auth=auth,
-        params=params,
+        encoded=encoded,
+        view=view,
         client=client,
-        binary_search_depth=binary_search_depth + 1,
-        binary_search_max_depth=binary_search_max_depth,
-        binary_err_search_sublists=binary_err_search_sublists,
-        method=method,
-    )
-    second_half_responses = _binary_search_enabled_post_httpx(
-        path=path,
-        payload=payload[1::2],
         auth=auth,
         params=params,
-        client=client,
-        binary_search_depth=binary_search_depth + 1,
+        binary_search_depth=binary_search_depth,
         binary_search_max_depth=binary_search_max_depth,
         binary_err_search_sublists=binary_err_search_sublists,
         method=method,
+        report=report,
+        retry_policy=retry_policy,
     )
-    return first_half_responses + second_half_responses
 
 
-def send_post_with_binary_err_search_httpx(
-    path: str,
+def _payload_batches(
     payload: list[dict],
     group_by_key: str | None = None,
-    auth: Tuple[str, str] | None = None,
-    proxies: dict | None = None,
-    params: dict | None = None,
     batch_size: int | None = None,
-    binary_search_max_depth: int | None = None,
-    binary_err_search_sublists: bool = True,
-    method: Literal['POST', 'PATCH'] = 'POST',
-) -> list[httpx.Response]:
-    if len(payload) <= 0:
-        raise Exception(f"Payload missing when attempting to POST to : {path}")
-
-    proxy_mounts = None
-    if proxies:
-        proxy_mounts = {
-            "http://": httpx.HTTPTransport(proxy=proxies.get('http')),
-            "https://": httpx.HTTPTransport(proxy=proxies.get('https')),
-        }
-
-    client = httpx.Client(mounts=proxy_mounts, auth=auth)
-
+    group_packing: GroupPacking = 'greedy',
+    oversized_groups: OversizedGroupPolicy = 'alone',
+) -> list[list[dict]] | list[list[list[dict]]]:
     if group_by_key:
         items_by_key = group_by(payload, lambda x: x[group_by_key])
-        batches = _collect_suitable_batches_grouped_by_key(
-            items_by_key=items_by_key,
-            sorting_function=None,
-            batch_size_trigger=batch_size,
-        )
         """
         Creates a structure that contains the grouped data as lists of the original groups 
         that then reside in lists approximately of the size batch_size
@@ -193,51 +281,110 @@ def send_post_with_binary_err_search_httpx(
             [ [7,8], [10,11,12,13,14] ],
         ]
         """
-        responses = []
+        if group_packing == 'balanced':
+            # Evenly sized batches within batch_size, so parallel workers finish at about the same time
+            return pack_groups_balanced(list(items_by_key.values()), batch_size, oversized_groups)
 
-        for _batch in batches:
-            batch_responses = _binary_search_enabled_post_httpx(
+        return _collect_suitable_batches_grouped_by_key(
+            items_by_key=items_by_key,
+            sorting_function=None,
+            batch_size_trigger=batch_size,
+        )
+
+    # Is not group_by'ed -> If batch size is not configured, try sending everything
+    if not batch_size:
+        return [payload]
+
+    # When batch size is configured, batch the payload
+    return list(batch(payload, batch_size))
+
+
+def send_post_with_binary_err_search_httpx(
+    path: str,
+    payload: list[dict],
+    group_by_key: str | None = None,
+    auth: Tuple[str, str] | None = None,
+    proxies: dict | None = None,
+    params: dict | None = None,
+    batch_size: int | None = None,
+    binary_search_max_depth: int | None = None,
+    binary_err_search_sublists: bool = True,
+    method: Literal['POST', 'PATCH'] = 'POST',
+    client: httpx.Client | None = None,
+    max_parallel_requests: int = 1,
+    report: ResponseRecorder | None = None,
+    retry_policy: RetryPolicy | None = None,
+    max_batch_bytes: int | None = None,
+    group_packing: GroupPacking = 'greedy',
+    oversized_groups: OversizedGroupPolicy = 'alone',
+) -> list[httpx.Response]:
+    """
+        Sends the payload in batches, searching the failing entities of rejected batches.
+
+        With `max_parallel_requests` above one the batches are sent from a pool of threads sharing the client,
+        e.g. one from `SisuClientManager.get_client`. The responses are returned in the order of the batches.
+        With `max_batch_bytes` the batches are also split by the size of their request bodies.
+        With `group_packing='balanced'` grouped payloads are packed into evenly sized batches of at most `batch_size`
+        items, see `pack_groups_balanced`.
+        With a `report` the final responses are recorded into it instead, unless the report keeps the responses.
+    """
+    if len(payload) <= 0:
+        raise Exception(f"Payload missing when attempting to POST to : {path}")
+
+    if client is None:
+        with httpx.Client(mounts=get_proxy_mounts(proxies), auth=auth) as _client:
+            return send_post_with_binary_err_search_httpx(
                 path=path,
-                payload=_batch,
-                params=params,
+                payload=payload,
+                group_by_key=group_by_key,
                 auth=auth,
-                client=client,
-                binary_search_depth=0,
+                params=params,
+                batch_size=batch_size,
                 binary_search_max_depth=binary_search_max_depth,
                 binary_err_search_sublists=binary_err_search_sublists,
                 method=method,
+                client=_client,
+                max_parallel_requests=max_parallel_requests,
+                report=report,
+                retry_policy=retry_policy,
+                max_batch_bytes=max_batch_bytes,
+                group_packing=group_packing,
+                oversized_groups=oversized_groups,
             )
-            responses += batch_responses
-        return responses
 
-    # Is not group_by'ed -> If batch size is not configured, try sending everything
-    if not batch_size:
-        return _binary_search_enabled_post_httpx(
-            path=path,
-            payload=payload,
-            params=params,
-            auth=auth,
-            client=client,
-            binary_search_depth=0,
-            binary_search_max_depth=binary_search_max_depth,
-            binary_err_search_sublists=binary_err_search_sublists,
-            method=method,
-        )
+    batches = _payload_batches(payload, group_by_key, batch_size, group_packing, oversized_groups)
+    if max_batch_bytes:
+        # Batches over the size limit go out as several requests
+        batches = [
+            encoded_batch for _batch in batches for encoded_batch in plan_encoded_batches(_batch, max_batch_bytes)
+        ]
+    worker_count = min(max_parallel_requests, len(batches))
+    if report is not None and worker_count > 1:
+        report = _SynchronizedRecorder(report)
+
+    send_batch = partial(
+        _binary_search_enabled_post_httpx,
+        path,
+        params=params,
+        auth=auth,
+        client=client,
+        binary_search_depth=0,
+        binary_search_max_depth=binary_search_max_depth,
+        binary_err_search_sublists=binary_err_search_sublists,
+        method=method,
+        report=report,
+        retry_policy=retry_policy,
+    )
 
-    # When batch size is configured, batch the payload
     responses = []
-    for batched_payload in batch(payload, batch_size):
-        batch_responses = _binary_search_enabled_post_httpx(
-            path=path,
-            payload=batched_payload,
-            params=params,
-            auth=auth,
-            client=client,
-            binary_search_depth=0,
-            binary_search_max_depth=binary_search_max_depth,
-            binary_err_search_sublists=binary_err_search_sublists,
-            method=method,
-        )
-        responses += batch_responses
+    if worker_count <= 1:
+        for _batch in batches:
+            responses += send_batch(payload=_batch)
+        return responses
+
+    # httpx.Client is thread-safe, the threads share its connection pool
+    with ThreadPoolExecutor(max_workers=worker_count, thread_name_prefix='sisu-request') as executor:
+        for batch_responses in executor.map(lambda _batch: send_batch(payload=_batch), batches):
+            responses += batch_responses
 
     return responses
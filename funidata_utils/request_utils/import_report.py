@@ -0,0 +1,178 @@
+#  Copyright (c) 2025 Funidata Oy.
+#  All rights reserved.
+# ------------------------------------------------------------------------------
+
+import json
+import sys
+from array import array
+from collections import Counter
+from typing import Any, Generator, Iterable, Protocol
+
+import httpx
+
+
+ACCEPTED_RESPONSE_CODES = {200, 201, 202, 204}
+
+
+def parse_error_json(response: httpx.Response) -> dict | None:
+    if response.status_code in ACCEPTED_RESPONSE_CODES:
+        return None
+
+    try:
+        err_json = response.json()
+        if isinstance(err_json, str):
+            err_json = json.loads(err_json)
+    except Exception:
+        return None
+
+    return err_json if isinstance(err_json, dict) else None
+
+
+def get_failing_ids(err_json: dict | None) -> list:
+    if not err_json or not err_json.get('failingIds'):
+        return []
+
+    return err_json['failingIds']
+
+
+def _get_error_code(err_json: dict | None) -> str | None:
+    if not err_json:
+        return None
+
+    for key in ('errorCode', 'code', 'reason'):
+        if isinstance(err_json.get(key), str):
+            return err_json[key]
+
+    return None
+
+
+class ResponseRecorder(Protocol):
+    # Whether the import still returns the responses after they have been recorded
+    keep_responses: bool
+
+    def add_response(self, response: httpx.Response, ids: Iterable[Any], err_json: dict | None = None):
+        ...
+
+
+def _intern(value: Any) -> Any:
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class ImportReport:
+    """
+        Compact outcome of an import: the final status code and error code of every entity, plus counters.
+
+        Pass a report to the import functions to record the final responses of the binary error search into it
+        instead of returning them. The responses (and the request bodies they reference) are dropped right after
+        parsing, and per entity only a status code and an index to an interned error code are kept in arrays.
+        Entities listed in `failingIds` of their final response are the ones Sisu reported as invalid, the rest of
+        a rejected batch were not imported because of them. Entities without an id get an outcome of their own by
+        their position, they are counted but cannot be looked up. `final_responses` counts the final responses
+        recorded, the bisection steps and retries before them are not counted.
+    """
+    keep_responses = False
+
+    def __init__(self):
+        self._index_by_id: dict[Any, int] = {}
+        self._ids: list = []
+        self._statuses = array('H')
+        self._error_code_indexes = array('H')
+        self._failing = bytearray()
+        self._error_codes: list[str | None] = [None]
+        self._error_code_index_by_code: dict[str, int] = {}
+        self.counts_by_status_code: Counter[int] = Counter()
+        self.counts_by_error_code: Counter[str] = Counter()
+        self.final_responses = 0
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, _id: Any) -> bool:
+        return _id in self._index_by_id
+
+    def __repr__(self):
+        return f'{type(self).__name__}(entities={len(self)}, counts_by_status_code={dict(self.counts_by_status_code)})'
+
+    def _error_code_index(self, error_code: str | None) -> int:
+        if error_code is None:
+            return 0
+
+        index = self._error_code_index_by_code.get(error_code)
+        if index is None:
+            index = len(self._error_codes)
+            self._error_codes.append(sys.intern(error_code))
+            self._error_code_index_by_code[error_code] = index
+
+        return index
+
+    def add(self, ids: Iterable[Any], status_code: int, error_code: str | None = None, failing_ids: Iterable = ()):
+        _error_code_index = self._error_code_index(error_code)
+        _failing_ids = set(failing_ids)
+        for _id in ids:
+            _id = _intern(_id)
+            is_failing = 1 if _id in _failing_ids else 0
+            index = self._index_by_id.get(_id) if _id is not None else None
+            if index is None:
+                if _id is not None:
+                    self._index_by_id[_id] = len(self._ids)
+                self._ids.append(_id)
+                self._statuses.append(status_code)
+                self._error_code_indexes.append(_error_code_index)
+                self._failing.append(is_failing)
+                self.counts_by_status_code[status_code] += 1
+                if error_code is not None:
+                    self.counts_by_error_code[error_code] += 1
+                continue
+
+            # Same entity sent again, the latest outcome wins
+            self.counts_by_status_code[self._statuses[index]] -= 1
+            if self._error_code_indexes[index]:
+                self.counts_by_error_code[self._error_codes[self._error_code_indexes[index]]] -= 1
+            self._statuses[index] = status_code
+            self._error_code_indexes[index] = _error_code_index
+            self._failing[index] = is_failing
+            self.counts_by_status_code[status_code] += 1
+            if error_code is not None:
+                self.counts_by_error_code[error_code] += 1
+
+    def add_response(self, response: httpx.Response, ids: Iterable[Any], err_json: dict | None = None):
+        if err_json is None:
+            err_json = parse_error_json(response)
+
+        self.final_responses += 1
+        self.add(
+            ids=ids,
+            status_code=response.status_code,
+            error_code=_get_error_code(err_json),
+            failing_ids=get_failing_ids(err_json),
+        )
+
+    def status(self, _id: Any) -> int | None:
+        index = self._index_by_id.get(_id)
+        return None if index is None else self._statuses[index]
+
+    def error_code(self, _id: Any) -> str | None:
+        index = self._index_by_id.get(_id)
+        return None if index is None else self._error_codes[self._error_code_indexes[index]]
+
+    @property
+    def accepted_count(self) -> int:
+        return sum(count for status_code, count in self.counts_by_status_code.items()
+                   if status_code in ACCEPTED_RESPONSE_CODES)
+
+    @property
+    def rejected_count(self) -> int:
+        return len(self) - self.accepted_count
+
+    def rejected_ids(self) -> list:
+        return [
+            _id for _id, status_code in zip(self._ids, self._statuses) if status_code not in ACCEPTED_RESPONSE_CODES
+        ]
+
+    def failing_ids(self) -> list:
+        # Only the entities Sisu named in failingIds, not the ones rejected along with them
+        return [_id for _id, is_failing in zip(self._ids, self._failing) if is_failing]
+
+    def items(self) -> Generator[tuple[Any, int, str | None], None, None]:
+        for _id, status_code, error_code_index in zip(self._ids, self._statuses, self._error_code_indexes):
+            yield _id, status_code, self._error_codes[error_code_index]
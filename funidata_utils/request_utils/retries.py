@@ -0,0 +1,136 @@
+#  Copyright (c) 2025 Funidata Oy.
+#  All rights reserved.
+# ------------------------------------------------------------------------------
+
+import asyncio
+import logging
+import random
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable
+
+import httpx
+from pydantic import BaseModel, ConfigDict
+
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUS_CODES = frozenset({429, 502, 503, 504})
+RETRY_EXCEPTIONS = (httpx.TimeoutException, httpx.NetworkError, httpx.RemoteProtocolError)
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    # Retry-After is either delay seconds or an HTTP date
+    if not value:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class RetryPolicy(BaseModel):
+    """
+        Retries of transient failures: responses with a status code in `retry_status_codes`, and timeouts and
+        connection errors when `retry_transport_errors` is set.
+
+        Attempt n waits a random time between 0 and min(`backoff_max`, `backoff_base` * 2 ** (n - 1)) seconds
+        ("full jitter"), or without `jitter` the upper bound itself. A `Retry-After` header of a retryable response
+        replaces the backoff when `respect_retry_after` is set, capped to `max_retry_after` seconds.
+    """
+    model_config = ConfigDict(frozen=True)
+
+    max_attempts: int = 5
+    retry_status_codes: frozenset[int] = RETRY_STATUS_CODES
+    retry_transport_errors: bool = True
+    backoff_base: float = 0.5
+    backoff_max: float = 30.0
+    jitter: bool = True
+    respect_retry_after: bool = True
+    max_retry_after: float = 120.0
+
+    def is_retryable_response(self, response: httpx.Response) -> bool:
+        return response.status_code in self.retry_status_codes
+
+    def is_retryable_exception(self, exception: Exception) -> bool:
+        return self.retry_transport_errors and isinstance(exception, RETRY_EXCEPTIONS)
+
+    def get_delay(self, attempt: int, response: httpx.Response | None = None) -> float:
+        if response is not None and self.respect_retry_after:
+            retry_after = parse_retry_after(response.headers.get('Retry-After'))
+            if retry_after is not None:
+                return min(retry_after, self.max_retry_after)
+
+        delay = min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1))
+        return random.uniform(0, delay) if self.jitter else delay
+
+
+DEFAULT_RETRY_POLICY = RetryPolicy()
+
+
+async def send_with_retries(
+    send: Callable[[], Awaitable[httpx.Response]],
+    retry_policy: RetryPolicy | None = None,
+) -> httpx.Response:
+    if retry_policy is None:
+        return await send()
+
+    attempt = 1
+    while True:
+        try:
+            response = await send()
+        except Exception as e:
+            if attempt >= retry_policy.max_attempts or not retry_policy.is_retryable_exception(e):
+                raise
+
+            delay = retry_policy.get_delay(attempt)
+            logger.info("Retrying in %.2f s after %s (attempt %d)", delay, type(e).__name__, attempt)
+        else:
+            if attempt >= retry_policy.max_attempts or not retry_policy.is_retryable_response(response):
+                return response
+
+            delay = retry_policy.get_delay(attempt, response)
+            logger.info("Retrying in %.2f s after status %d (attempt %d)", delay, response.status_code, attempt)
+
+        await asyncio.sleep(delay)
+        attempt += 1
+
+
+def send_with_retries_sync(
+    send: Callable[[], httpx.Response],
+    retry_policy: RetryPolicy | None = None,
+) -> httpx.Response:
+    if retry_policy is None:
+        return send()
+
+    attempt = 1
+    while True:
+        try:
+            response = send()
+        except Exception as e:
+            if attempt >= retry_policy.max_attempts or not retry_policy.is_retryable_exception(e):
+                raise
+
+            delay = retry_policy.get_delay(attempt)
+            logger.info("Retrying in %.2f s after %s (attempt %d)", delay, type(e).__name__, attempt)
+        else:
+            if attempt >= retry_policy.max_attempts or not retry_policy.is_retryable_response(response):
+                return response
+
+            delay = retry_policy.get_delay(attempt, response)
+            logger.info("Retrying in %.2f s after status %d (attempt %d)", delay, response.status_code, attempt)
+
+        time.sleep(delay)
+        attempt += 1
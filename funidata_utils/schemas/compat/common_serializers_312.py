@@ -1,4 +1,11 @@
 # Python > 3.12 implementations
+import json
+
+from pydantic_core import to_jsonable_python
+
+
+def _canonical_json(value) -> str:
+    return json.dumps(to_jsonable_python(value, fallback=str), sort_keys=True)
 
 
 def serialize_as_list[typevar](v: set[typevar] | list[typevar] | None) -> list[typevar] | None:
@@ -6,7 +13,14 @@ def serialize_as_list[typevar](v: set[typevar] | list[typevar] | None) -> list[t
         return None
 
     try:
-        return list(set(v))
+        # Sorted, so the serialized order (and e.g. content hashes) does not depend on the set iteration order
+        return sorted(set(v))
+    except TypeError:
+        pass
+
+    try:
+        # Not comparable, deduplicated and sorted by their canonical JSON instead
+        return sorted(dict.fromkeys(v), key=_canonical_json)
     except Exception as e:
         # If it can't be hashed to set, just return as list
         return list(v)
@@ -1,15 +1,29 @@
+import json
 from typing import TypeVar
 
+from pydantic_core import to_jsonable_python
+
 
 T = TypeVar('T')
 
 
+def _canonical_json(value) -> str:
+    return json.dumps(to_jsonable_python(value, fallback=str), sort_keys=True)
+
+
 def serialize_as_list(v: set[T] | list[T] | None) -> list[T] | None:
     if v is None:
         return None
 
     try:
-        return list(set(v))
+        # Sorted, so the serialized order (and e.g. content hashes) does not depend on the set iteration order
+        return sorted(set(v))
+    except TypeError:
+        pass
+
+    try:
+        # Not comparable, deduplicated and sorted by their canonical JSON instead
+        return sorted(dict.fromkeys(v), key=_canonical_json)
     except Exception as e:
         # If it can't be hashed to set, just return as list
         return list(v)
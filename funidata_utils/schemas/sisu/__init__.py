@@ -15,6 +15,8 @@ from .attainment import (
     CustomCourseUnitAttainment,
     CustomModuleAttainment,
     DegreeProgrammeAttainment,
+    AssessmentItemAttainment,
+    Attainment,
 )
 from .mobility_period import MobilityPeriod
 from .thesis import Thesis
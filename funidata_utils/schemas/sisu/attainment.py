@@ -4,10 +4,11 @@
 
 import datetime
 from abc import ABC
-from typing import Literal, Annotated, Union, Self
+from typing import Any, Literal, Annotated, Union, Self
 
 from pydantic import (
     BaseModel, conlist, Field, model_validator, field_validator, conset, field_serializer, AfterValidator,
+    Discriminator, Tag,
 )
 
 from .base import HashableBaseModel
@@ -216,7 +217,33 @@ class DegreeProgrammeAttainment(Attainment):
 
 
 class AssessmentItemAttainment(Attainment):
+    type: Literal['AssessmentItemAttainment'] = 'AssessmentItemAttainment'
     courseUnitId: str
     courseUnitGroupId: str
     assessmentItemId: str
-    courseUnitRealisationId: str | None
\ No newline at end of file
+    courseUnitRealisationId: str | None
+
+
+_ATTAINMENT_TYPES = {
+    'AssessmentItemAttainment', 'CourseUnitAttainment', 'CustomCourseUnitAttainment', 'CustomModuleAttainment',
+    'DegreeProgrammeAttainment',
+}
+
+
+def _attainment_type(value: Any) -> str:
+    _type = value.get('type') if isinstance(value, dict) else getattr(value, 'type', None)
+    # ModuleAttainments do not have a model of their own, they are validated as plain Attainments
+    return _type if _type in _ATTAINMENT_TYPES else 'Attainment'
+
+
+attainment = Annotated[
+    Union[
+        Annotated[AssessmentItemAttainment, Tag('AssessmentItemAttainment')],
+        Annotated[CourseUnitAttainment, Tag('CourseUnitAttainment')],
+        Annotated[CustomCourseUnitAttainment, Tag('CustomCourseUnitAttainment')],
+        Annotated[CustomModuleAttainment, Tag('CustomModuleAttainment')],
+        Annotated[DegreeProgrammeAttainment, Tag('DegreeProgrammeAttainment')],
+        Annotated[Attainment, Tag('Attainment')],
+    ],
+    Discriminator(_attainment_type),
+]
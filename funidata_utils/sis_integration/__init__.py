@@ -3,9 +3,18 @@
 # ------------------------------------------------------------------------------
 
 from .exports import export_from_sisu
+from .async_exports import export_from_sisu_async
+from .export_orchestrator import export_resources_from_sisu
+from .sqlite_mirror import SqliteExportMirror
+from .import_ledger import ImportLedger
+from .preflight_validation import PreflightValidator
+from .checkpoints import (
+    CheckpointStore, JsonFileCheckpointStore, SqliteCheckpointStore,
+)
 from .async_imports import (
     import_to_sisu, patch_to_sisu,
 )
+from .import_scheduler import import_resources_to_sisu
 from .async_deletes import (
     soft_delete_from_sisu
 )
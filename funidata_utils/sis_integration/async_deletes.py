@@ -2,6 +2,7 @@
 #  All rights reserved.
 # ------------------------------------------------------------------------------
 
+import asyncio
 import logging
 from enum import StrEnum
 from typing import overload, Literal, TYPE_CHECKING
@@ -11,7 +12,9 @@ import httpx
 from .protocols import SisImportable, SisPatchable, SisLegacyImportable, SisLegacyPatchable, SisDeletable
 from ..auth.sis_auth import SisuConfig
 from ..request_utils.async_httpx_requests import send_post_with_binary_err_search_httpx
-from ..utils import batch
+from ..request_utils.client_manager import SisuClientManager
+from ..request_utils.concurrency import AdaptiveConcurrencyLimiter
+from ..request_utils.retries import RetryPolicy, DEFAULT_RETRY_POLICY
 
 
 logger = logging.getLogger(__name__)
@@ -36,7 +39,10 @@ async def soft_delete_from_sisu(
     group_by_key: None,
     binary_err_search_sublists: Literal[False],
     max_parallel_requests: int,
-    method_override: DeleteMethodOverride | None
+    method_override: DeleteMethodOverride | None,
+    client_manager: SisuClientManager | None,
+    concurrency_limiter: AdaptiveConcurrencyLimiter | asyncio.Semaphore | None,
+    parallel_sub_search: bool,
 ) -> list[httpx.Response]:
     ...
 
@@ -52,7 +58,10 @@ async def soft_delete_from_sisu(
     group_by_key: str | None,
     binary_err_search_sublists: bool,
     max_parallel_requests: int,
-    method_override: DeleteMethodOverride | None
+    method_override: DeleteMethodOverride | None,
+    client_manager: SisuClientManager | None,
+    concurrency_limiter: AdaptiveConcurrencyLimiter | asyncio.Semaphore | None,
+    parallel_sub_search: bool,
 ) -> list[httpx.Response]:
     ...
 
@@ -68,7 +77,10 @@ async def soft_delete_from_sisu(
     group_by_key: str | None,
     binary_err_search_sublists: bool,
     max_parallel_requests: int,
-    method_override: DeleteMethodOverride | None
+    method_override: DeleteMethodOverride | None,
+    client_manager: SisuClientManager | None,
+    concurrency_limiter: AdaptiveConcurrencyLimiter | asyncio.Semaphore | None,
+    parallel_sub_search: bool,
 ) -> list[httpx.Response]:
     ...
 
@@ -84,6 +96,10 @@ async def soft_delete_from_sisu(
     binary_err_search_sublists: bool = False,
     max_parallel_requests: int = 1,
     method_override: DeleteMethodOverride | None = DeleteMethodOverride.Automatic,
+    client_manager: SisuClientManager | None = None,
+    concurrency_limiter: AdaptiveConcurrencyLimiter | asyncio.Semaphore | None = None,
+    retry_policy: RetryPolicy | None = DEFAULT_RETRY_POLICY,
+    parallel_sub_search: bool = False,
 ) -> list[httpx.Response]:
     if not batch_size or batch_size == UNSET_BATCH_SIZE:
         if use_legacy_import:
@@ -103,7 +119,13 @@ async def soft_delete_from_sisu(
                 batch_size=_batch_size,
                 sisu_config=sisu_config,
                 resource=resource,
-                data=data
+                data=data,
+                binary_search_max_depth=binary_search_max_depth,
+                max_parallel_requests=max_parallel_requests,
+                client_manager=client_manager,
+                concurrency_limiter=concurrency_limiter,
+                retry_policy=retry_policy,
+                parallel_sub_search=parallel_sub_search,
             )
 
         case DeleteMethodOverride.Patch:
@@ -117,6 +139,10 @@ async def soft_delete_from_sisu(
                 group_by_key=group_by_key,
                 max_parallel_requests=max_parallel_requests,
                 use_legacy_import=True if use_legacy_import else False,
+                client_manager=client_manager,
+                concurrency_limiter=concurrency_limiter,
+                retry_policy=retry_policy,
+                parallel_sub_search=parallel_sub_search,
             )
             return responses
 
@@ -133,6 +159,10 @@ async def soft_delete_from_sisu(
                 group_by_key=group_by_key,
                 method='POST',
                 max_parallel_requests=max_parallel_requests,
+                client=client_manager.get_async_client(sisu_config.get_integration_auth()) if client_manager else None,
+                concurrency_limiter=concurrency_limiter,
+                retry_policy=retry_policy,
+                parallel_sub_search=parallel_sub_search,
             )
 
         case DeleteMethodOverride.Automatic | None:
@@ -141,7 +171,13 @@ async def soft_delete_from_sisu(
                     batch_size=_batch_size,
                     sisu_config=sisu_config,
                     resource=resource,
-                    data=data
+                    data=data,
+                    binary_search_max_depth=binary_search_max_depth,
+                    max_parallel_requests=max_parallel_requests,
+                    client_manager=client_manager,
+                    concurrency_limiter=concurrency_limiter,
+                    retry_policy=retry_policy,
+                    parallel_sub_search=parallel_sub_search,
                 )
 
             if isinstance(resource, SisPatchable) or isinstance(resource, SisLegacyPatchable):
@@ -155,6 +191,10 @@ async def soft_delete_from_sisu(
                     group_by_key=group_by_key,
                     max_parallel_requests=max_parallel_requests,
                     use_legacy_import=True if use_legacy_import else False,
+                    client_manager=client_manager,
+                    concurrency_limiter=concurrency_limiter,
+                    retry_policy=retry_policy,
+                    parallel_sub_search=parallel_sub_search,
                 )
                 return responses
 
@@ -170,6 +210,10 @@ async def soft_delete_from_sisu(
                 group_by_key=group_by_key,
                 method='POST',
                 max_parallel_requests=max_parallel_requests,
+                client=client_manager.get_async_client(sisu_config.get_integration_auth()) if client_manager else None,
+                concurrency_limiter=concurrency_limiter,
+                retry_policy=retry_policy,
+                parallel_sub_search=parallel_sub_search,
             )
 
             return responses
@@ -180,37 +224,35 @@ async def _delete_with_delete_endpoint(
     sisu_config: SisuConfig,
     batch_size: int | None,
     data: list[dict],
+    binary_search_max_depth: int | None = 0,
+    max_parallel_requests: int = 1,
+    client_manager: SisuClientManager | None = None,
+    concurrency_limiter: AdaptiveConcurrencyLimiter | asyncio.Semaphore | None = None,
+    retry_policy: RetryPolicy | None = DEFAULT_RETRY_POLICY,
+    parallel_sub_search: bool = False,
 ) -> list[httpx.Response]:
-    _batches = batch(data, steps=batch_size)
-    responses = []
-
-    for _batch in _batches:
-        _path_postfix = resource.delete.endpoint
-        _delete_ids_list = list(set([x['id'] for x in _batch]))
-        _delete_data = {
-            'ids': _delete_ids_list,
-        }
-
-        proxy_mounts = None
-        if sisu_config.proxies:
-            proxy_mounts = {
-                "http://": httpx.AsyncHTTPTransport(proxy=sisu_config.proxies.get('http')),
-                "https://": httpx.AsyncHTTPTransport(proxy=sisu_config.proxies.get('https')),
-            }
-
-        client = httpx.AsyncClient(mounts=proxy_mounts, auth=sisu_config.get_integration_auth())
-
-        _path = f"{sisu_config.host}{_path_postfix}"
-        logger.debug("Sending POST with %d ids to %s", len(_delete_ids_list), _path)
-        response = await client.post(
-            _path,
-            auth=sisu_config.get_integration_auth(),
-            json=_delete_data,
-            timeout=120,
-        )
-        responses.append(response)
-
-    return responses
+    # Each id once, in the original order
+    _delete_ids = list(dict.fromkeys(x['id'] for x in data))
+    if not _delete_ids:
+        return []
+
+    # Sent as {"ids": [...]} with the same worker pool and failing id search as the imports
+    return await send_post_with_binary_err_search_httpx(
+        path=f"{sisu_config.host}{resource.delete.endpoint}",
+        payload=_delete_ids,
+        auth=sisu_config.get_integration_auth(),
+        proxies=sisu_config.proxies,
+        batch_size=batch_size,
+        binary_search_max_depth=binary_search_max_depth,
+        binary_err_search_sublists=False,
+        method='POST',
+        max_parallel_requests=max_parallel_requests,
+        client=client_manager.get_async_client(sisu_config.get_integration_auth()) if client_manager else None,
+        concurrency_limiter=concurrency_limiter,
+        retry_policy=retry_policy,
+        parallel_sub_search=parallel_sub_search,
+        body_envelope='ids',
+    )
 
 
 async def _delete_with_patch(
@@ -223,6 +265,10 @@ async def _delete_with_patch(
     binary_err_search_sublists: bool,
     binary_search_max_depth: int | None,
     max_parallel_requests: int,
+    client_manager: SisuClientManager | None = None,
+    concurrency_limiter: AdaptiveConcurrencyLimiter | asyncio.Semaphore | None = None,
+    retry_policy: RetryPolicy | None = DEFAULT_RETRY_POLICY,
+    parallel_sub_search: bool = False,
 ) -> list[httpx.Response]:
     # Maximum theoretical import payload size
     _batch_size = min(batch_size, 10000)
@@ -239,6 +285,10 @@ async def _delete_with_patch(
         group_by_key=group_by_key,
         method='PATCH',
         max_parallel_requests=max_parallel_requests,
+        client=client_manager.get_async_client(sisu_config.get_integration_auth()) if client_manager else None,
+        concurrency_limiter=concurrency_limiter,
+        retry_policy=retry_policy,
+        parallel_sub_search=parallel_sub_search,
     )
     return responses
 
@@ -0,0 +1,177 @@
+#  Copyright (c) 2025 Funidata Oy.
+#  All rights reserved.
+# ------------------------------------------------------------------------------
+
+import asyncio
+import logging
+from typing import AsyncGenerator
+
+import httpx
+
+from .checkpoints import CheckpointStore, get_checkpoint_key, resolve_since_ordinal
+from .protocols import SisExportable, SupportsExportAuthentication
+from ..request_utils.async_httpx_requests import send_get_httpx
+from ..request_utils.client_manager import SisuClientManager, get_async_proxy_mounts
+from ..request_utils.concurrency import AdaptiveConcurrencyLimiter
+from ..request_utils.retries import RetryPolicy, DEFAULT_RETRY_POLICY
+
+
+logger = logging.getLogger(__name__)
+
+
+async def export_from_sisu_async(
+    sisu_config: SupportsExportAuthentication,
+    resource: SisExportable,
+    since_ordinal: int | None = None,
+    params: dict | None = None,
+    client_manager: SisuClientManager | None = None,
+    retry_policy: RetryPolicy | None = DEFAULT_RETRY_POLICY,
+    checkpoint_store: CheckpointStore | None = None,
+    prefetch_pages: int = 1,
+    concurrency_limiter: AdaptiveConcurrencyLimiter | asyncio.Semaphore | None = None,
+) -> AsyncGenerator[list[dict], None]:
+    async for entities in export_from_endpoint_async_generator(
+        sis_settings=sisu_config,
+        endpoint=resource.exports.endpoint,
+        since_ordinal=since_ordinal,
+        export_limit=resource.exports.default_export_limit,
+        since=resource.exports.since,
+        params=params,
+        client_manager=client_manager,
+        retry_policy=retry_policy,
+        checkpoint_store=checkpoint_store,
+        prefetch_pages=prefetch_pages,
+        concurrency_limiter=concurrency_limiter,
+    ):
+        yield entities
+
+
+async def export_from_endpoint_async_generator(
+    sis_settings: SupportsExportAuthentication,
+    endpoint: str,
+    since_ordinal: int | None = None,
+    export_limit: int = 1000,
+    since: str = 'since',
+    params: dict | None = None,
+    client_manager: SisuClientManager | None = None,
+    retry_policy: RetryPolicy | None = DEFAULT_RETRY_POLICY,
+    checkpoint_store: CheckpointStore | None = None,
+    prefetch_pages: int = 1,
+    concurrency_limiter: AdaptiveConcurrencyLimiter | asyncio.Semaphore | None = None,
+) -> AsyncGenerator[list[dict], None]:
+    """
+        Yields the export pages while the following pages are fetched in the background.
+
+        Up to `prefetch_pages` pages are fetched ahead of the page the consumer is processing, so the download of
+        the next page overlaps the processing of the current one. With `prefetch_pages=0` a page is only requested
+        once the consumer is done with the page before it. The download only progresses while the event loop
+        runs, so CPU heavy processing of a page should be offloaded (e.g. `asyncio.to_thread`) to get the overlap.
+        Checkpoints are committed for pages the consumer is done with, not for prefetched ones.
+    """
+    if client_manager is None:
+        # Keep one client for all the pages of this export, closed when the generator finishes
+        async with httpx.AsyncClient(
+            mounts=get_async_proxy_mounts(sis_settings.proxies),
+            auth=sis_settings.get_export_auth(),
+        ) as client:
+            async for entities in _export_pages_with_prefetch(
+                sis_settings=sis_settings,
+                endpoint=endpoint,
+                client=client,
+                since_ordinal=since_ordinal,
+                export_limit=export_limit,
+                since=since,
+                params=params,
+                retry_policy=retry_policy,
+                checkpoint_store=checkpoint_store,
+                prefetch_pages=prefetch_pages,
+                concurrency_limiter=concurrency_limiter,
+            ):
+                yield entities
+        return
+
+    async for entities in _export_pages_with_prefetch(
+        sis_settings=sis_settings,
+        endpoint=endpoint,
+        client=client_manager.get_async_client(sis_settings.get_export_auth()),
+        since_ordinal=since_ordinal,
+        export_limit=export_limit,
+        since=since,
+        params=params,
+        retry_policy=retry_policy,
+        checkpoint_store=checkpoint_store,
+        prefetch_pages=prefetch_pages,
+        concurrency_limiter=concurrency_limiter,
+    ):
+        yield entities
+
+
+async def _export_pages_with_prefetch(
+    sis_settings: SupportsExportAuthentication,
+    endpoint: str,
+    client: httpx.AsyncClient,
+    since_ordinal: int | None = None,
+    export_limit: int = 1000,
+    since: str = 'since',
+    params: dict | None = None,
+    retry_policy: RetryPolicy | None = DEFAULT_RETRY_POLICY,
+    checkpoint_store: CheckpointStore | None = None,
+    prefetch_pages: int = 1,
+    concurrency_limiter: AdaptiveConcurrencyLimiter | asyncio.Semaphore | None = None,
+) -> AsyncGenerator[list[dict], None]:
+    if not params:
+        params = {}
+
+    checkpoint_key = get_checkpoint_key(sis_settings.host, endpoint, params)
+    greatest_ordinal = resolve_since_ordinal(since_ordinal, checkpoint_store, checkpoint_key)
+
+    # A slot for the page being processed and one for each page fetched ahead of it, taken before each request
+    room = asyncio.Semaphore(max(prefetch_pages, 0) + 1)
+    pages: asyncio.Queue = asyncio.Queue()
+    _done = object()
+
+    async def _fetch_pages(ordinal: int):
+        try:
+            while True:
+                await room.acquire()
+                sis_response = await send_get_httpx(
+                    path=f"{sis_settings.host}{endpoint}",
+                    auth=sis_settings.get_export_auth(),
+                    params=params | {since: ordinal, 'limit': export_limit},
+                    client=client,
+                    retry_policy=retry_policy,
+                    concurrency_limiter=concurrency_limiter,
+                )
+                if sis_response.status_code != 200:
+                    raise Exception(f"Error in export: {sis_response.status_code} : {sis_response.content}")
+
+                response_json = sis_response.json()
+                entities: list[dict] = response_json.get("entities", [])
+                if response_json.get('greatestOrdinal') is not None:
+                    ordinal = response_json['greatestOrdinal']
+
+                await pages.put((entities, response_json.get('greatestOrdinal')))
+
+                if len(entities) == 0 or len(entities) < export_limit:
+                    break
+        except Exception as e:
+            await pages.put(e)
+        else:
+            await pages.put(_done)
+
+    fetcher = asyncio.create_task(_fetch_pages(greatest_ordinal))
+    try:
+        while (page := await pages.get()) is not _done:
+            if isinstance(page, Exception):
+                raise page
+
+            entities, page_greatest_ordinal = page
+            yield entities
+
+            # Execution continues here only once the consumer asks for the next page, so the page is committed
+            if checkpoint_store is not None and page_greatest_ordinal is not None:
+                checkpoint_store.save(checkpoint_key, page_greatest_ordinal)
+            room.release()
+    finally:
+        fetcher.cancel()
+        await asyncio.gather(fetcher, return_exceptions=True)
@@ -2,20 +2,160 @@
 #  All rights reserved.
 # ------------------------------------------------------------------------------
 
+import asyncio
 import logging
-from typing import IO, overload, Literal
+from contextlib import aclosing
+from itertools import groupby
+from operator import itemgetter
+from typing import IO, overload, Literal, Generator, Iterable, AsyncIterable, AsyncGenerator
 
 import httpx
 
+from .change_detection import ChangeDetector
+from .import_ledger import ImportLedger
+from .preflight_validation import PreflightValidator
 from .protocols import SisImportable, SisPatchable, SisLegacyImportable, SisLegacyPatchable
 from ..auth.sis_auth import SisuConfig
-from ..request_utils.async_httpx_requests import send_post_with_binary_err_search_httpx
+from ..json_tools.jsonl_utils import iter_jsonl, group_jsonl_by_key_on_disk
+from ..request_utils.async_httpx_requests import (
+    _iter_indexed_batch_results, _iter_batches_grouped_by_key, _payload_batches, collect_results_in_batch_order,
+)
+from ..request_utils.batch_planner import GroupPacking, OversizedGroupPolicy
+from ..request_utils.client_manager import SisuClientManager
+from ..request_utils.concurrency import AdaptiveConcurrencyLimiter
+from ..request_utils.import_report import ImportReport
+from ..request_utils.retries import RetryPolicy, DEFAULT_RETRY_POLICY
+from ..utils import batch_iterable
 
 
 logger = logging.getLogger(__name__)
 UNSET_BATCH_SIZE = -42
 
 
+def _iter_changed(entities: Iterable[dict], change_detector: ChangeDetector | None) -> Iterable[dict]:
+    return entities if change_detector is None else change_detector.filter(entities)
+
+
+def _iter_fp_batches(
+    fp: IO,
+    batch_size: int,
+    group_by_key: str | None = None,
+    group_fp_on_disk: bool = False,
+    change_detector: ChangeDetector | None = None,
+) -> Generator[list[dict] | list[list[dict]], None, None]:
+    """
+        Reads the batches from a JSON lines file. The file is read with blocking I/O on the event loop, a batch at
+        a time as the producer pulls the next one, and `group_fp_on_disk` reads through the whole file before the
+        first batch. For files on slow or network storage copy the file to local disk or pass the entities as
+        `data` from a reader of your own.
+    """
+    if not group_by_key:
+        yield from batch_iterable(_iter_changed(iter_jsonl(fp), change_detector), batch_size)
+        return
+
+    if group_fp_on_disk:
+        groups = group_jsonl_by_key_on_disk(fp, group_by_key)
+        if change_detector is not None:
+            # Only the changed entities of each group are sent
+            groups = (changed for group in groups if (changed := list(change_detector.filter(group))))
+    else:
+        # Without the on disk grouping step the file has to be sorted / grouped by group_by_key already
+        entities = _iter_changed(iter_jsonl(fp), change_detector)
+        groups = (list(group) for _, group in groupby(entities, key=itemgetter(group_by_key)))
+
+    yield from _iter_batches_grouped_by_key(groups, batch_size_trigger=batch_size)
+
+
+def _iter_sisu_results(
+    sisu_config: SisuConfig,
+    path: str,
+    method: Literal['POST', 'PATCH'],
+    fp: IO | None,
+    data: list[dict] | Iterable[dict] | AsyncIterable[dict] | None,
+    batch_size: int,
+    binary_search_max_depth: int | None,
+    group_by_key: str | None,
+    binary_err_search_sublists: bool,
+    max_parallel_requests: int,
+    params: dict | None,
+    client_manager: SisuClientManager | None,
+    concurrency_limiter: AdaptiveConcurrencyLimiter | asyncio.Semaphore | None,
+    parallel_sub_search: bool,
+    group_fp_on_disk: bool,
+    max_pending_batches: int | None,
+    report: ImportReport | None,
+    retry_policy: RetryPolicy | None,
+    change_detector: ChangeDetector | None,
+    import_ledger: ImportLedger | None,
+    validator: PreflightValidator | None,
+    max_batch_bytes: int | None,
+    group_packing: GroupPacking,
+    oversized_groups: OversizedGroupPolicy,
+) -> AsyncGenerator[tuple[int, list[httpx.Response]], None]:
+    import_report = report
+    if import_ledger is not None:
+        if change_detector is not None:
+            raise Exception("Give either a change_detector or an import_ledger, not both")
+        # The session drops the entities imported before as such, and records the accepted ones into the ledger
+        change_detector = report = import_ledger.session(path, report=report)
+
+    client = client_manager.get_async_client(sisu_config.get_integration_auth()) if client_manager else None
+    allow_empty_payload = change_detector is not None or validator is not None
+    if fp:
+        if group_packing != 'greedy':
+            raise Exception(f"group_packing '{group_packing}' needs all the groups up front, give the payload as data")
+        # Stream the file, only a bounded amount of batches is read into memory at a time. Batches over
+        # max_batch_bytes are split like the ones of a list payload.
+        batches = _iter_fp_batches(fp, batch_size, group_by_key, group_fp_on_disk, change_detector)
+    else:
+        if change_detector is not None:
+            # Only new or changed entities are sent
+            data = change_detector.filter_payload(data)
+
+        batches = _payload_batches(
+            path, data, group_by_key, batch_size, allow_empty_payload, group_packing, oversized_groups,
+        )
+
+    if validator is not None:
+        # Invalid entities go to the reject sink and the report instead of Sisu, the next batch is validated while
+        # one is sent
+        batches = validator.afilter_batches(batches, report=import_report)
+
+    return _iter_indexed_batch_results(
+        path=path,
+        batches=batches,
+        auth=sisu_config.get_integration_auth(),
+        proxies=sisu_config.proxies,
+        binary_search_max_depth=binary_search_max_depth,
+        binary_err_search_sublists=binary_err_search_sublists,
+        method=method,
+        max_parallel_requests=max_parallel_requests,
+        params=params,
+        client=client,
+        concurrency_limiter=concurrency_limiter,
+        parallel_sub_search=parallel_sub_search,
+        max_pending_batches=max_pending_batches,
+        report=report,
+        retry_policy=retry_policy,
+        max_batch_bytes=max_batch_bytes,
+        allow_empty_payload=allow_empty_payload,
+    )
+
+
+async def _iter_completed_results(
+    indexed_results: AsyncGenerator[tuple[int, list[httpx.Response]], None],
+) -> AsyncGenerator[list[httpx.Response], None]:
+    async with aclosing(indexed_results):
+        async for _, results in indexed_results:
+            yield results
+
+
+def _check_fp_outcomes_are_not_collected(fp: IO | None, report: ImportReport | None, as_generator: bool):
+    # Every response holds its request body, collecting them all from a file would grow with the file size
+    if fp and report is None and not as_generator:
+        raise Exception("Importing from fp needs a report or as_generator, otherwise the responses are all kept")
+
+
 @overload
 async def import_to_sisu(
     sisu_config: SisuConfig,
@@ -28,7 +168,21 @@ async def import_to_sisu(
     binary_err_search_sublists: bool = False,
     max_parallel_requests: int = 1,
     params: dict | None = None,
-) -> list[httpx.Response]:
+    client_manager: SisuClientManager | None = None,
+    concurrency_limiter: AdaptiveConcurrencyLimiter | asyncio.Semaphore | None = None,
+    parallel_sub_search: bool = False,
+    group_fp_on_disk: bool = False,
+    max_pending_batches: int | None = None,
+    as_generator: bool = False,
+    report: ImportReport | None = None,
+    retry_policy: RetryPolicy | None = DEFAULT_RETRY_POLICY,
+    change_detector: ChangeDetector | None = None,
+    import_ledger: ImportLedger | None = None,
+    validator: PreflightValidator | None = None,
+    max_batch_bytes: int | None = None,
+    group_packing: GroupPacking = 'greedy',
+    oversized_groups: OversizedGroupPolicy = 'alone',
+) -> list[httpx.Response] | AsyncGenerator[list[httpx.Response], None]:
     ...
 
 
@@ -44,7 +198,21 @@ async def import_to_sisu(
     binary_err_search_sublists: bool = False,
     max_parallel_requests: int = 1,
     params: dict | None = None,
-) -> list[httpx.Response]:
+    client_manager: SisuClientManager | None = None,
+    concurrency_limiter: AdaptiveConcurrencyLimiter | asyncio.Semaphore | None = None,
+    parallel_sub_search: bool = False,
+    group_fp_on_disk: bool = False,
+    max_pending_batches: int | None = None,
+    as_generator: bool = False,
+    report: ImportReport | None = None,
+    retry_policy: RetryPolicy | None = DEFAULT_RETRY_POLICY,
+    change_detector: ChangeDetector | None = None,
+    import_ledger: ImportLedger | None = None,
+    validator: PreflightValidator | None = None,
+    max_batch_bytes: int | None = None,
+    group_packing: GroupPacking = 'greedy',
+    oversized_groups: OversizedGroupPolicy = 'alone',
+) -> list[httpx.Response] | AsyncGenerator[list[httpx.Response], None]:
     ...
 
 
@@ -53,14 +221,28 @@ async def import_to_sisu(
     sisu_config: SisuConfig,
     resource: SisImportable,
     use_legacy_import: Literal[False],
-    data: list[dict],
+    data: list[dict] | Iterable[dict] | AsyncIterable[dict],
     batch_size: int | None = UNSET_BATCH_SIZE,
     binary_search_max_depth: int | None = 0,
     group_by_key: str | None = None,
     binary_err_search_sublists: bool = False,
     max_parallel_requests: int = 1,
     params: dict | None = None,
-) -> list[httpx.Response]:
+    client_manager: SisuClientManager | None = None,
+    concurrency_limiter: AdaptiveConcurrencyLimiter | asyncio.Semaphore | None = None,
+    parallel_sub_search: bool = False,
+    group_fp_on_disk: bool = False,
+    max_pending_batches: int | None = None,
+    as_generator: bool = False,
+    report: ImportReport | None = None,
+    retry_policy: RetryPolicy | None = DEFAULT_RETRY_POLICY,
+    change_detector: ChangeDetector | None = None,
+    import_ledger: ImportLedger | None = None,
+    validator: PreflightValidator | None = None,
+    max_batch_bytes: int | None = None,
+    group_packing: GroupPacking = 'greedy',
+    oversized_groups: OversizedGroupPolicy = 'alone',
+) -> list[httpx.Response] | AsyncGenerator[list[httpx.Response], None]:
     ...
 
 
@@ -69,14 +251,28 @@ async def import_to_sisu(
     sisu_config: SisuConfig,
     resource: SisLegacyImportable,
     use_legacy_import: Literal[True],
-    data: list[dict],
+    data: list[dict] | Iterable[dict] | AsyncIterable[dict],
     batch_size: int | None = UNSET_BATCH_SIZE,
     binary_search_max_depth: int | None = 0,
     group_by_key: str | None = None,
     binary_err_search_sublists: bool = False,
     max_parallel_requests: int = 1,
     params: dict | None = None,
-) -> list[httpx.Response]:
+    client_manager: SisuClientManager | None = None,
+    concurrency_limiter: AdaptiveConcurrencyLimiter | asyncio.Semaphore | None = None,
+    parallel_sub_search: bool = False,
+    group_fp_on_disk: bool = False,
+    max_pending_batches: int | None = None,
+    as_generator: bool = False,
+    report: ImportReport | None = None,
+    retry_policy: RetryPolicy | None = DEFAULT_RETRY_POLICY,
+    change_detector: ChangeDetector | None = None,
+    import_ledger: ImportLedger | None = None,
+    validator: PreflightValidator | None = None,
+    max_batch_bytes: int | None = None,
+    group_packing: GroupPacking = 'greedy',
+    oversized_groups: OversizedGroupPolicy = 'alone',
+) -> list[httpx.Response] | AsyncGenerator[list[httpx.Response], None]:
     ...
 
 
@@ -85,16 +281,29 @@ async def import_to_sisu(
     resource: SisImportable | SisLegacyImportable,
     use_legacy_import: Literal[True, False],
     fp: IO | None = None,
-    data: list[dict] | None = None,
+    data: list[dict] | Iterable[dict] | AsyncIterable[dict] | None = None,
     batch_size: int | None = UNSET_BATCH_SIZE,
     binary_search_max_depth: int | None = 0,
     group_by_key: str | None = None,
     binary_err_search_sublists: bool = False,
     max_parallel_requests: int = 1,
     params: dict | None = None,
-) -> list[httpx.Response]:
-    if fp:
-        raise NotImplementedError("Not yet implemented")
+    client_manager: SisuClientManager | None = None,
+    concurrency_limiter: AdaptiveConcurrencyLimiter | asyncio.Semaphore | None = None,
+    parallel_sub_search: bool = False,
+    group_fp_on_disk: bool = False,
+    max_pending_batches: int | None = None,
+    as_generator: bool = False,
+    report: ImportReport | None = None,
+    retry_policy: RetryPolicy | None = DEFAULT_RETRY_POLICY,
+    change_detector: ChangeDetector | None = None,
+    import_ledger: ImportLedger | None = None,
+    validator: PreflightValidator | None = None,
+    max_batch_bytes: int | None = None,
+    group_packing: GroupPacking = 'greedy',
+    oversized_groups: OversizedGroupPolicy = 'alone',
+) -> list[httpx.Response] | AsyncGenerator[list[httpx.Response], None]:
+    _check_fp_outcomes_are_not_collected(fp, report, as_generator)
 
     # Maximum theoretical import payload size
     if not batch_size or batch_size == UNSET_BATCH_SIZE:
@@ -106,21 +315,38 @@ async def import_to_sisu(
     _batch_size = min(batch_size, 10000)
 
     _path_postfix = resource.legacy_imports.endpoint if use_legacy_import else resource.imports.endpoint
-    responses = await send_post_with_binary_err_search_httpx(
+    results = _iter_sisu_results(
+        sisu_config=sisu_config,
         path=f"{sisu_config.host}{_path_postfix}",
-        payload=data,
-        auth=sisu_config.get_integration_auth(),
-        proxies=sisu_config.proxies,
+        method='POST',
+        fp=fp,
+        data=data,
         batch_size=_batch_size,
         binary_search_max_depth=binary_search_max_depth,
-        binary_err_search_sublists=binary_err_search_sublists,
         group_by_key=group_by_key,
-        method='POST',
+        binary_err_search_sublists=binary_err_search_sublists,
         max_parallel_requests=max_parallel_requests,
         params=params,
+        client_manager=client_manager,
+        concurrency_limiter=concurrency_limiter,
+        parallel_sub_search=parallel_sub_search,
+        group_fp_on_disk=group_fp_on_disk,
+        max_pending_batches=max_pending_batches,
+        report=report,
+        retry_policy=retry_policy,
+        change_detector=change_detector,
+        import_ledger=import_ledger,
+        validator=validator,
+        max_batch_bytes=max_batch_bytes,
+        group_packing=group_packing,
+        oversized_groups=oversized_groups,
     )
+    # With a report the outcomes are recorded into it, and the responses are not returned
+    if as_generator:
+        # Responses of each batch as soon as it is done, for persisting the outcomes incrementally
+        return _iter_completed_results(results)
 
-    return responses
+    return await collect_results_in_batch_order(results)
 
 
 async def patch_to_sisu(
@@ -128,16 +354,28 @@ async def patch_to_sisu(
     resource: SisPatchable | SisLegacyPatchable,
     use_legacy_import: Literal[True, False],
     fp: IO | None = None,
-    data: list[dict] | None = None,
+    data: list[dict] | Iterable[dict] | AsyncIterable[dict] | None = None,
     batch_size: int | None = UNSET_BATCH_SIZE,
     binary_search_max_depth: int | None = 0,
     group_by_key: str | None = None,
     binary_err_search_sublists: bool = False,
     max_parallel_requests: int = 1,
     params: dict | None = None,
-) -> list[httpx.Response]:
-    if fp:
-        raise NotImplementedError("Not yet implemented")
+    client_manager: SisuClientManager | None = None,
+    concurrency_limiter: AdaptiveConcurrencyLimiter | asyncio.Semaphore | None = None,
+    parallel_sub_search: bool = False,
+    group_fp_on_disk: bool = False,
+    max_pending_batches: int | None = None,
+    as_generator: bool = False,
+    report: ImportReport | None = None,
+    retry_policy: RetryPolicy | None = DEFAULT_RETRY_POLICY,
+    change_detector: ChangeDetector | None = None,
+    import_ledger: ImportLedger | None = None,
+    max_batch_bytes: int | None = None,
+    group_packing: GroupPacking = 'greedy',
+    oversized_groups: OversizedGroupPolicy = 'alone',
+) -> list[httpx.Response] | AsyncGenerator[list[httpx.Response], None]:
+    _check_fp_outcomes_are_not_collected(fp, report, as_generator)
 
     # Maximum theoretical import payload size
     if not batch_size or batch_size == UNSET_BATCH_SIZE:
@@ -149,18 +387,35 @@ async def patch_to_sisu(
     _batch_size = min(batch_size, 10000)
 
     _path_postfix = resource.legacy_patches.endpoint if use_legacy_import else resource.patches.endpoint
-    responses = await send_post_with_binary_err_search_httpx(
+    results = _iter_sisu_results(
+        sisu_config=sisu_config,
         path=f"{sisu_config.host}{_path_postfix}",
-        payload=data,
-        auth=sisu_config.get_integration_auth(),
-        proxies=sisu_config.proxies,
+        method='PATCH',
+        fp=fp,
+        data=data,
         batch_size=_batch_size,
         binary_search_max_depth=binary_search_max_depth,
-        binary_err_search_sublists=binary_err_search_sublists,
         group_by_key=group_by_key,
-        method='PATCH',
+        binary_err_search_sublists=binary_err_search_sublists,
         max_parallel_requests=max_parallel_requests,
         params=params,
+        client_manager=client_manager,
+        concurrency_limiter=concurrency_limiter,
+        parallel_sub_search=parallel_sub_search,
+        group_fp_on_disk=group_fp_on_disk,
+        max_pending_batches=max_pending_batches,
+        report=report,
+        retry_policy=retry_policy,
+        change_detector=change_detector,
+        import_ledger=import_ledger,
+        validator=None,
+        max_batch_bytes=max_batch_bytes,
+        group_packing=group_packing,
+        oversized_groups=oversized_groups,
     )
+    # With a report the outcomes are recorded into it, and the responses are not returned
+    if as_generator:
+        # Responses of each batch as soon as it is done, for persisting the outcomes incrementally
+        return _iter_completed_results(results)
 
-    return responses
+    return await collect_results_in_batch_order(results)
@@ -0,0 +1,92 @@
+#  Copyright (c) 2025 Funidata Oy.
+#  All rights reserved.
+# ------------------------------------------------------------------------------
+import logging
+from typing import Any, AsyncGenerator, AsyncIterable, Callable, Collection, Generator, Iterable, Mapping, Sequence
+
+from ..json_tools.content_hash import DEFAULT_IGNORED_FIELDS, content_hash
+from ..utils import batch_iterable
+
+
+logger = logging.getLogger(__name__)
+
+KnownHashes = Mapping[Any, str] | Callable[[Sequence[Any]], Mapping[Any, str]]
+
+
+class ChangeDetector:
+    """
+        Drops the entities whose content hash equals the hash of the known state, so only new or changed entities
+        get sent to Sisu.
+
+        The known state is a mapping of id -> content hash, or a callable returning the hashes for a list of ids,
+        e.g. `partial(mirror.get_content_hashes, StudyRights)` to compare against a local export mirror. The ids are
+        looked up `lookup_batch_size` at a time while the entities stream through.
+    """
+
+    def __init__(
+        self,
+        known_hashes: KnownHashes,
+        ignored_fields: Collection[str] = DEFAULT_IGNORED_FIELDS,
+        lookup_batch_size: int = 1000,
+    ):
+        self.known_hashes = known_hashes
+        self.ignored_fields = ignored_fields
+        self.lookup_batch_size = lookup_batch_size
+        self.forwarded_count = 0
+        self.skipped_count = 0
+
+    def __repr__(self):
+        return f'{type(self).__name__}(forwarded={self.forwarded_count}, skipped={self.skipped_count})'
+
+    def _lookup(self, ids: Sequence[Any]) -> Mapping[Any, str]:
+        if isinstance(self.known_hashes, Mapping):
+            return self.known_hashes
+
+        return self.known_hashes(ids)
+
+    def _on_changed(self, _id: Any, entity_hash: str):
+        pass
+
+    def _changed(self, entities: list[dict]) -> list[dict]:
+        known_hashes = self._lookup([entity['id'] for entity in entities])
+        changed = []
+        for entity in entities:
+            entity_hash = content_hash(entity, self.ignored_fields)
+            if known_hashes.get(entity['id']) != entity_hash:
+                changed.append(entity)
+                self._on_changed(entity['id'], entity_hash)
+
+        self.forwarded_count += len(changed)
+        self.skipped_count += len(entities) - len(changed)
+        return changed
+
+    def filter(self, entities: Iterable[dict]) -> Generator[dict, None, None]:
+        for entities_batch in batch_iterable(entities, self.lookup_batch_size):
+            yield from self._changed(entities_batch)
+
+    async def afilter(self, entities: AsyncIterable[dict]) -> AsyncGenerator[dict, None]:
+        entities_batch = []
+        async for entity in entities:
+            entities_batch.append(entity)
+            if len(entities_batch) >= self.lookup_batch_size:
+                for changed in self._changed(entities_batch):
+                    yield changed
+                entities_batch = []
+
+        for changed in self._changed(entities_batch):
+            yield changed
+
+    def filter_payload(
+        self,
+        data: list[dict] | Iterable[dict] | AsyncIterable[dict],
+    ) -> list[dict] | Generator[dict, None, None] | AsyncGenerator[dict, None]:
+        # Lists stay lists, so the import keeps grouping them in memory, other iterables are filtered lazily
+        if isinstance(data, list):
+            changed = list(self.filter(data))
+            logger.info("Forwarding %d of %d entities, the rest are unchanged", len(changed), len(data))
+            return changed
+
+        if isinstance(data, AsyncIterable):
+            return self.afilter(data)
+
+        return self.filter(data)
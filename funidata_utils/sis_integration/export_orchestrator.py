@@ -0,0 +1,168 @@
+#  Copyright (c) 2025 Funidata Oy.
+#  All rights reserved.
+# ------------------------------------------------------------------------------
+
+import asyncio
+import inspect
+import json
+import logging
+import time
+from typing import IO, Awaitable, Callable, Mapping, Sequence
+
+from pydantic import BaseModel
+
+from .async_exports import export_from_sisu_async
+from .checkpoints import CheckpointStore
+from .protocols import SisExportable, SupportsExportAuthentication
+from ..json_tools.jsonl_writer import JsonlWriter
+from ..request_utils.client_manager import SisuClientManager
+from ..request_utils.concurrency import AdaptiveConcurrencyLimiter
+from ..request_utils.retries import RetryPolicy, DEFAULT_RETRY_POLICY
+
+
+logger = logging.getLogger(__name__)
+
+ExportSink = IO | JsonlWriter | Callable[[list[dict]], Awaitable[None] | None]
+
+
+class ResourceExportStats(BaseModel):
+    resource: str
+    entities: int = 0
+    pages: int = 0
+    seconds: float = 0.0
+    error: str | None = None
+
+    @property
+    def entities_per_second(self) -> float:
+        return self.entities / self.seconds if self.seconds else 0.0
+
+
+def _write_jsonl_page(fp: IO, entities: list[dict]):
+    fp.write(''.join(json.dumps(entity) + '\n' for entity in entities))
+
+
+async def _write_page(sink: ExportSink, entities: list[dict]):
+    if isinstance(sink, JsonlWriter):
+        await asyncio.to_thread(sink.write_entities, entities)
+        return
+
+    if callable(sink):
+        if inspect.iscoroutinefunction(sink):
+            await sink(entities)
+        else:
+            # Sync sinks run in a thread, so the other exports keep downloading meanwhile
+            await asyncio.to_thread(sink, entities)
+        return
+
+    await asyncio.to_thread(_write_jsonl_page, sink, entities)
+
+
+async def _export_resource(
+    sisu_config: SupportsExportAuthentication,
+    resource: SisExportable,
+    sink: ExportSink,
+    stats: ResourceExportStats,
+    since_ordinal: int | None,
+    params: dict | None,
+    client_manager: SisuClientManager,
+    retry_policy: RetryPolicy | None,
+    checkpoint_store: CheckpointStore | None,
+    prefetch_pages: int,
+    concurrency_limiter: AdaptiveConcurrencyLimiter | asyncio.Semaphore,
+):
+    started = time.perf_counter()
+    try:
+        async for entities in export_from_sisu_async(
+            sisu_config=sisu_config,
+            resource=resource,
+            since_ordinal=since_ordinal,
+            params=params,
+            client_manager=client_manager,
+            retry_policy=retry_policy,
+            checkpoint_store=checkpoint_store,
+            prefetch_pages=prefetch_pages,
+            concurrency_limiter=concurrency_limiter,
+        ):
+            await _write_page(sink, entities)
+            stats.entities += len(entities)
+            stats.pages += 1
+    except Exception as e:
+        stats.error = str(e)
+        logger.exception("Export of %s failed after %d entities", stats.resource, stats.entities)
+    finally:
+        stats.seconds = time.perf_counter() - started
+
+    logger.info(
+        "Exported %d %s in %.1f s (%.0f entities/s)",
+        stats.entities, stats.resource, stats.seconds, stats.entities_per_second,
+    )
+
+
+async def export_resources_from_sisu(
+    sisu_config: SupportsExportAuthentication,
+    resources: Sequence[SisExportable],
+    sinks: Mapping[SisExportable, ExportSink],
+    max_parallel_requests: int = 4,
+    prefetch_pages: int = 1,
+    since_ordinals: Mapping[SisExportable, int] | None = None,
+    params: Mapping[SisExportable, dict] | None = None,
+    client_manager: SisuClientManager | None = None,
+    retry_policy: RetryPolicy | None = DEFAULT_RETRY_POLICY,
+    checkpoint_store: CheckpointStore | None = None,
+    concurrency_limiter: AdaptiveConcurrencyLimiter | asyncio.Semaphore | None = None,
+    raise_on_error: bool = True,
+) -> dict[str, ResourceExportStats]:
+    """
+        Exports the resources concurrently, writing the pages of each resource to its own sink.
+
+        A sink is a text file or a JsonlWriter (pages are written as JSON lines), or a callable receiving each page.
+        All the exports share one client and at most `max_parallel_requests` requests are in flight in total (or as
+        many as the given `concurrency_limiter` allows), while `prefetch_pages` caps how far a single export runs
+        ahead of its sink. An ordinal in `since_ordinals` takes precedence over the stored checkpoint of the resource.
+        Pages of one resource are fetched one after another, so the wall-clock time is bounded by the largest
+        resource instead of the sum of all of them. Returns the stats of every export by resource name.
+    """
+    if concurrency_limiter is None:
+        concurrency_limiter = asyncio.Semaphore(max_parallel_requests)
+
+    if client_manager is None:
+        async with SisuClientManager(sisu_config) as _client_manager:
+            return await export_resources_from_sisu(
+                sisu_config=sisu_config,
+                resources=resources,
+                sinks=sinks,
+                prefetch_pages=prefetch_pages,
+                since_ordinals=since_ordinals,
+                params=params,
+                client_manager=_client_manager,
+                retry_policy=retry_policy,
+                checkpoint_store=checkpoint_store,
+                concurrency_limiter=concurrency_limiter,
+                raise_on_error=raise_on_error,
+            )
+
+    stats_by_resource = {repr(resource): ResourceExportStats(resource=repr(resource)) for resource in resources}
+    await asyncio.gather(*[
+        _export_resource(
+            sisu_config=sisu_config,
+            resource=resource,
+            sink=sinks[resource],
+            stats=stats_by_resource[repr(resource)],
+            since_ordinal=(since_ordinals or {}).get(resource),
+            params=(params or {}).get(resource),
+            client_manager=client_manager,
+            retry_policy=retry_policy,
+            checkpoint_store=checkpoint_store,
+            prefetch_pages=prefetch_pages,
+            concurrency_limiter=concurrency_limiter,
+        )
+        for resource in resources
+    ])
+
+    failed = [stats for stats in stats_by_resource.values() if stats.error is not None]
+    if failed and raise_on_error:
+        raise Exception(
+            "Export failed for: " + ", ".join(f"{stats.resource} ({stats.error})" for stats in failed)
+        )
+
+    return stats_by_resource
@@ -2,10 +2,45 @@
 #  All rights reserved.
 # ------------------------------------------------------------------------------
 import json
+import logging
 from typing import TextIO, overload, IO, Generator, Literal
 
+import httpx
+
+from .checkpoints import CheckpointStore, get_checkpoint_key, resolve_since_ordinal
 from .protocols import SisExportable, SupportsExportAuthentication
+from ..json_tools.jsonl_writer import JsonlWriter
+from ..request_utils.client_manager import SisuClientManager, get_proxy_mounts
 from ..request_utils.httpx_requests import send_get_httpx
+from ..request_utils.retries import RetryPolicy, DEFAULT_RETRY_POLICY
+
+
+logger = logging.getLogger(__name__)
+
+
+class _PendingCheckpoints:
+    """
+        Holds back the checkpoints of an export returned as a list, the pages are only delivered once the whole
+        list is, so a failed export must not commit any of them.
+    """
+
+    def __init__(self, checkpoint_store: CheckpointStore):
+        self.checkpoint_store = checkpoint_store
+        self._pending: dict[str, int] = {}
+
+    def load(self, key: str) -> int | None:
+        return self._pending[key] if key in self._pending else self.checkpoint_store.load(key)
+
+    def save(self, key: str, ordinal: int):
+        self._pending[key] = ordinal
+
+    def delete(self, key: str):
+        self._pending.pop(key, None)
+        self.checkpoint_store.delete(key)
+
+    def commit(self):
+        for key, ordinal in self._pending.items():
+            self.checkpoint_store.save(key, ordinal)
 
 
 @overload
@@ -13,10 +48,13 @@ def _export_from_endpoint(
     sis_settings: SupportsExportAuthentication,
     endpoint: str,
     fp: None,
-    since_ordinal: int = 0,
+    since_ordinal: int | None = None,
     export_limit: int = 1000,
     since: str = 'since',
     params: dict | None = None,
+    client_manager: SisuClientManager | None = None,
+    retry_policy: RetryPolicy | None = DEFAULT_RETRY_POLICY,
+    checkpoint_store: CheckpointStore | None = None,
 ) -> list[dict]:
     ...
 
@@ -25,11 +63,14 @@ def _export_from_endpoint(
 def _export_from_endpoint(
     sis_settings: SupportsExportAuthentication,
     endpoint: str,
-    fp: IO,
-    since_ordinal: int = 0,
+    fp: IO | JsonlWriter,
+    since_ordinal: int | None = None,
     export_limit: int = 1000,
     since: str = 'since',
     params: dict | None = None,
+    client_manager: SisuClientManager | None = None,
+    retry_policy: RetryPolicy | None = DEFAULT_RETRY_POLICY,
+    checkpoint_store: CheckpointStore | None = None,
 ) -> TextIO:
     ...
 
@@ -37,15 +78,23 @@ def _export_from_endpoint(
 def _export_from_endpoint(
     sis_settings: SupportsExportAuthentication,
     endpoint: str,
-    fp: IO | None,
-    since_ordinal: int = 0,
+    fp: IO | JsonlWriter | None,
+    since_ordinal: int | None = None,
     export_limit: int = 1000,
     since: str = 'since',
     params: dict | None = None,
-) -> IO | list[dict]:
+    client_manager: SisuClientManager | None = None,
+    retry_policy: RetryPolicy | None = DEFAULT_RETRY_POLICY,
+    checkpoint_store: CheckpointStore | None = None,
+) -> IO | JsonlWriter | list[dict]:
     if not params:
         params = {}
 
+    pending_checkpoints = None
+    if fp is None and checkpoint_store is not None:
+        # Only the final ordinal is saved, once the whole list has been built
+        checkpoint_store = pending_checkpoints = _PendingCheckpoints(checkpoint_store)
+
     exported_entities = []
     for entities in export_from_endpoint_generator(
         sis_settings=sis_settings,
@@ -54,18 +103,25 @@ def _export_from_endpoint(
         export_limit=export_limit,
         since=since,
         params=params,
+        client_manager=client_manager,
+        retry_policy=retry_policy,
+        checkpoint_store=checkpoint_store,
     ):
         if fp is None:
             exported_entities += entities
         else:
-            for json_entity in entities:
-                fp.write(json.dumps(json_entity))
-                fp.write('\n')
-
-        if len(entities) == 0 or len(entities) < export_limit:
-            break
+            if isinstance(fp, JsonlWriter):
+                fp.write_entities(entities)
+            else:
+                # One write call per page
+                fp.write(''.join(json.dumps(json_entity) + '\n' for json_entity in entities))
+            if checkpoint_store is not None:
+                # The page is committed when the next one is requested, make sure it is written by then
+                fp.flush()
 
     if fp is None:
+        if pending_checkpoints is not None:
+            pending_checkpoints.commit()
         return exported_entities
 
     return fp
@@ -74,22 +130,70 @@ def _export_from_endpoint(
 def export_from_endpoint_generator(
     sis_settings: SupportsExportAuthentication,
     endpoint: str,
-    since_ordinal: int = 0,
+    since_ordinal: int | None = None,
     export_limit: int = 1000,
     since: str = 'since',
     params: dict | None = None,
+    client_manager: SisuClientManager | None = None,
+    retry_policy: RetryPolicy | None = DEFAULT_RETRY_POLICY,
+    checkpoint_store: CheckpointStore | None = None,
+) -> Generator[list[dict], None, None]:
+    if client_manager is None:
+        # Keep one client for all the pages of this export, closed when the generator finishes
+        with httpx.Client(
+            mounts=get_proxy_mounts(sis_settings.proxies),
+            auth=sis_settings.get_export_auth(),
+        ) as client:
+            yield from _export_pages(
+                sis_settings=sis_settings,
+                endpoint=endpoint,
+                since_ordinal=since_ordinal,
+                export_limit=export_limit,
+                since=since,
+                params=params,
+                client=client,
+                retry_policy=retry_policy,
+                checkpoint_store=checkpoint_store,
+            )
+        return
+
+    yield from _export_pages(
+        sis_settings=sis_settings,
+        endpoint=endpoint,
+        since_ordinal=since_ordinal,
+        export_limit=export_limit,
+        since=since,
+        params=params,
+        client=client_manager.get_client(sis_settings.get_export_auth()),
+        retry_policy=retry_policy,
+        checkpoint_store=checkpoint_store,
+    )
+
+
+def _export_pages(
+    sis_settings: SupportsExportAuthentication,
+    endpoint: str,
+    client: httpx.Client,
+    since_ordinal: int | None = None,
+    export_limit: int = 1000,
+    since: str = 'since',
+    params: dict | None = None,
+    retry_policy: RetryPolicy | None = DEFAULT_RETRY_POLICY,
+    checkpoint_store: CheckpointStore | None = None,
 ) -> Generator[list[dict], None, None]:
-    greatest_ordinal = since_ordinal
-    export_limit = export_limit
     if not params:
         params = {}
 
+    checkpoint_key = get_checkpoint_key(sis_settings.host, endpoint, params)
+    greatest_ordinal = resolve_since_ordinal(since_ordinal, checkpoint_store, checkpoint_key)
+
     while True:
         sis_response = send_get_httpx(
             path=f"{sis_settings.host}{endpoint}",
             auth=sis_settings.get_export_auth(),
             params=params | {since: greatest_ordinal, 'limit': export_limit},
-            proxies=sis_settings.proxies,
+            client=client,
+            retry_policy=retry_policy,
         )
         if sis_response.status_code == 200:
             response_json = sis_response.json()
@@ -97,10 +201,14 @@ def export_from_endpoint_generator(
 
             yield entities
 
+            # Execution continues here only once the consumer asks for the next page, so the page is committed
+            if response_json.get('greatestOrdinal') is not None:
+                greatest_ordinal = response_json['greatestOrdinal']
+                if checkpoint_store is not None:
+                    checkpoint_store.save(checkpoint_key, greatest_ordinal)
+
             if len(entities) == 0 or len(entities) < export_limit:
                 break
-
-            greatest_ordinal = response_json['greatestOrdinal']
         else:
             raise Exception(f"Error in export: {sis_response.status_code} : {sis_response.content}")
 
@@ -109,8 +217,11 @@ def export_from_endpoint_generator(
 def export_from_sisu(
     sisu_config: SupportsExportAuthentication,
     resource: SisExportable,
-    since_ordinal: int,
+    since_ordinal: int | None,
     params: dict | None = None,
+    client_manager: SisuClientManager | None = None,
+    retry_policy: RetryPolicy | None = DEFAULT_RETRY_POLICY,
+    checkpoint_store: CheckpointStore | None = None,
 ) -> list[dict]:
     # Regular call, no generator or FP reference
     ...
@@ -120,9 +231,12 @@ def export_from_sisu(
 def export_from_sisu(
     sisu_config: SupportsExportAuthentication,
     resource: SisExportable,
-    since_ordinal: int,
+    since_ordinal: int | None,
     as_generator: Literal[False],
     params: dict | None = None,
+    client_manager: SisuClientManager | None = None,
+    retry_policy: RetryPolicy | None = DEFAULT_RETRY_POLICY,
+    checkpoint_store: CheckpointStore | None = None,
 ) -> list[dict]:
     # Regular call, generator explicit false, no FP reference
     ...
@@ -132,9 +246,12 @@ def export_from_sisu(
 def export_from_sisu(
     sisu_config: SupportsExportAuthentication,
     resource: SisExportable,
-    since_ordinal: int,
+    since_ordinal: int | None,
     as_generator: Literal[True],
     params: dict | None = None,
+    client_manager: SisuClientManager | None = None,
+    retry_policy: RetryPolicy | None = DEFAULT_RETRY_POLICY,
+    checkpoint_store: CheckpointStore | None = None,
 ) -> Generator[list[dict], None, None]:
     # Call with as_generator does not allow FP reference
     ...
@@ -144,9 +261,12 @@ def export_from_sisu(
 def export_from_sisu(
     sisu_config: SupportsExportAuthentication,
     resource: SisExportable,
-    fp: IO,
-    since_ordinal: int,
+    fp: IO | JsonlWriter,
+    since_ordinal: int | None,
     params: dict | None = None,
+    client_manager: SisuClientManager | None = None,
+    retry_policy: RetryPolicy | None = DEFAULT_RETRY_POLICY,
+    checkpoint_store: CheckpointStore | None = None,
 ) -> IO:
     # Call with FP reference does not allow as_generator
     ...
@@ -155,11 +275,14 @@ def export_from_sisu(
 def export_from_sisu(
     sisu_config: SupportsExportAuthentication,
     resource: SisExportable,
-    fp: IO | None = None,
-    since_ordinal: int = 0,
+    fp: IO | JsonlWriter | None = None,
+    since_ordinal: int | None = None,
     as_generator: bool = False,
     params: dict | None = None,
-) -> list[dict] | IO | Generator[list[dict], None, None]:
+    client_manager: SisuClientManager | None = None,
+    retry_policy: RetryPolicy | None = DEFAULT_RETRY_POLICY,
+    checkpoint_store: CheckpointStore | None = None,
+) -> list[dict] | IO | JsonlWriter | Generator[list[dict], None, None]:
     if as_generator:
         return export_from_endpoint_generator(
             endpoint=resource.exports.endpoint,
@@ -168,6 +291,9 @@ def export_from_sisu(
             since_ordinal=since_ordinal,
             since=resource.exports.since,
             params=params,
+            client_manager=client_manager,
+            retry_policy=retry_policy,
+            checkpoint_store=checkpoint_store,
         )
 
     if fp:
@@ -179,6 +305,9 @@ def export_from_sisu(
             since=resource.exports.since,
             fp=fp,
             params=params,
+            client_manager=client_manager,
+            retry_policy=retry_policy,
+            checkpoint_store=checkpoint_store,
         )
 
     return _export_from_endpoint(
@@ -188,5 +317,8 @@ def export_from_sisu(
         since_ordinal=since_ordinal,
         since=resource.exports.since,
         fp=None,
-        params=params
+        params=params,
+        client_manager=client_manager,
+        retry_policy=retry_policy,
+        checkpoint_store=checkpoint_store,
     )
@@ -0,0 +1,182 @@
+#  Copyright (c) 2025 Funidata Oy.
+#  All rights reserved.
+# ------------------------------------------------------------------------------
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Any, Collection, Iterable, Mapping, Sequence
+
+import httpx
+
+from .change_detection import ChangeDetector
+from ..json_tools.content_hash import DEFAULT_IGNORED_FIELDS
+from ..request_utils.import_report import ACCEPTED_RESPONSE_CODES, ResponseRecorder
+
+
+logger = logging.getLogger(__name__)
+
+_RESOURCE_IMPORT_ATTRIBUTES = ('imports', 'legacy_imports', 'patches', 'legacy_patches')
+
+
+class ImportLedgerSession(ChangeDetector):
+    """
+        Change detector of a single import against the ledger. The hashes of the forwarded entities are kept
+        until their final response arrives, and written to the ledger when Sisu accepted them.
+    """
+
+    def __init__(
+        self,
+        ledger: 'ImportLedger',
+        endpoint: str,
+        report: ResponseRecorder | None = None,
+        ignored_fields: Collection[str] = DEFAULT_IGNORED_FIELDS,
+        lookup_batch_size: int = 1000,
+    ):
+        super().__init__(
+            known_hashes=lambda ids: ledger.get_content_hashes(endpoint, ids),
+            ignored_fields=ignored_fields,
+            lookup_batch_size=lookup_batch_size,
+        )
+        self.ledger = ledger
+        self.endpoint = endpoint
+        self.report = report
+        self.keep_responses = report is None or report.keep_responses
+        self._pending: dict[Any, str] = {}
+
+    def _on_changed(self, _id: Any, entity_hash: str):
+        self._pending[_id] = entity_hash
+
+    def add_response(self, response: httpx.Response, ids: Iterable[Any], err_json: dict | None = None):
+        ids = list(ids)
+        if self.report is not None:
+            self.report.add_response(response, ids, err_json)
+
+        # The response is final for these ids, whatever the outcome
+        content_hashes = {_id: self._pending.pop(_id) for _id in ids if _id in self._pending}
+        if response.status_code in ACCEPTED_RESPONSE_CODES:
+            self.ledger.record(self.endpoint, content_hashes)
+
+
+class ImportLedger:
+    """
+        Local record of what has been imported: the content hash of every entity Sisu accepted, by endpoint.
+
+        Pass the ledger to `import_to_sisu` / `patch_to_sisu` to skip the entities whose content is unchanged since
+        their last accepted import, and to record the newly accepted ones. Entities changed in Sisu by others are
+        not noticed, so `invalidate` or `invalidate_resource` when the data in Sisu may have diverged, e.g. after a
+        manual fix or a restore, and `compact` now and then to drop entries older than the given age.
+    """
+
+    def __init__(self, path: str | os.PathLike, table: str = 'import_ledger'):
+        self.table = table
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                f'CREATE TABLE IF NOT EXISTS {table} ('
+                f'endpoint TEXT NOT NULL, id TEXT NOT NULL, content_hash TEXT NOT NULL, imported_at TEXT NOT NULL, '
+                f'PRIMARY KEY (endpoint, id)) WITHOUT ROWID'
+            )
+
+    def session(
+        self,
+        endpoint: str,
+        report: ResponseRecorder | None = None,
+        ignored_fields: Collection[str] = DEFAULT_IGNORED_FIELDS,
+    ) -> ImportLedgerSession:
+        return ImportLedgerSession(self, endpoint, report=report, ignored_fields=ignored_fields)
+
+    def get_content_hashes(self, endpoint: str, ids: Sequence[Any]) -> dict[Any, str]:
+        content_hashes = {}
+        for index in range(0, len(ids), 500):
+            _ids = ids[index:index + 500]
+            with self._lock:
+                rows = self._connection.execute(
+                    f'SELECT id, content_hash FROM {self.table} '
+                    f'WHERE endpoint = ? AND id IN ({", ".join("?" * len(_ids))})',
+                    (endpoint, *_ids),
+                ).fetchall()
+
+            content_hashes.update(rows)
+
+        return content_hashes
+
+    def record(self, endpoint: str, content_hashes: Mapping[Any, str]):
+        if not content_hashes:
+            return
+
+        imported_at = datetime.now(timezone.utc).isoformat()
+        with self._lock, self._connection:
+            self._connection.executemany(
+                f'INSERT INTO {self.table} (endpoint, id, content_hash, imported_at) VALUES (?, ?, ?, ?) '
+                f'ON CONFLICT (endpoint, id) DO UPDATE SET '
+                f'content_hash = excluded.content_hash, imported_at = excluded.imported_at',
+                [(endpoint, _id, entity_hash, imported_at) for _id, entity_hash in content_hashes.items()],
+            )
+
+    def count(self, endpoint: str | None = None) -> int:
+        with self._lock:
+            if endpoint is None:
+                return self._connection.execute(f'SELECT COUNT(*) FROM {self.table}').fetchone()[0]
+
+            return self._connection.execute(
+                f'SELECT COUNT(*) FROM {self.table} WHERE endpoint = ?', (endpoint,),
+            ).fetchone()[0]
+
+    def invalidate(self, endpoint: str, ids: Sequence[Any] | None = None) -> int:
+        # Forgotten entities are sent again on the next import
+        with self._lock, self._connection:
+            if ids is None:
+                return self._connection.execute(f'DELETE FROM {self.table} WHERE endpoint = ?', (endpoint,)).rowcount
+
+            deleted = 0
+            for index in range(0, len(ids), 500):
+                _ids = ids[index:index + 500]
+                deleted += self._connection.execute(
+                    f'DELETE FROM {self.table} WHERE endpoint = ? AND id IN ({", ".join("?" * len(_ids))})',
+                    (endpoint, *_ids),
+                ).rowcount
+
+            return deleted
+
+    def invalidate_resource(self, resource: Any) -> int:
+        # All the import and patch endpoints of the resource, on any host
+        endpoints = {
+            getattr(resource, attribute).endpoint
+            for attribute in _RESOURCE_IMPORT_ATTRIBUTES if hasattr(resource, attribute)
+        }
+        deleted = 0
+        with self._lock, self._connection:
+            for endpoint in endpoints:
+                deleted += self._connection.execute(
+                    f'DELETE FROM {self.table} WHERE substr(endpoint, -length(?)) = ?', (endpoint, endpoint),
+                ).rowcount
+
+        logger.info("Invalidated %d ledger entries of %s", deleted, repr(resource))
+        return deleted
+
+    def compact(self, max_age: timedelta | None = None) -> int:
+        deleted = 0
+        with self._lock:
+            if max_age is not None:
+                with self._connection:
+                    deleted = self._connection.execute(
+                        f'DELETE FROM {self.table} WHERE imported_at < ?',
+                        ((datetime.now(timezone.utc) - max_age).isoformat(),),
+                    ).rowcount
+
+            self._connection.execute('VACUUM')
+
+        logger.info("Compacted the import ledger, %d entries dropped", deleted)
+        return deleted
+
+    def close(self):
+        self._connection.close()
+
+    def __enter__(self) -> 'ImportLedger':
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,233 @@
+#  Copyright (c) 2025 Funidata Oy.
+#  All rights reserved.
+# ------------------------------------------------------------------------------
+
+import asyncio
+import logging
+import time
+from typing import IO, AsyncIterable, Collection, Iterable, Mapping
+
+from pydantic import BaseModel
+
+from .async_imports import import_to_sisu
+from .protocols import SisImportable
+from .resources import (
+    OriPersons, AccessRolePersonAssignments, Attainments, StudyRights, TermRegistrations, Thesis, MobilityPeriods,
+    StudyRightPrimalities, Organisations, CourseUnits, CourseUnitRealisations, Educations, Modules,
+    CurriculumPeriods, AssessmentItems, Qualifications, GradeScales, AdmissionTargets, TermRegistrationRequirements,
+    CooperationNetworks, EnrolmentCalculationConfigs,
+)
+from ..auth.sis_auth import SisuConfig
+from ..request_utils.client_manager import SisuClientManager
+from ..request_utils.concurrency import AdaptiveConcurrencyLimiter
+from ..request_utils.import_report import ImportReport
+from ..request_utils.retries import RetryPolicy, DEFAULT_RETRY_POLICY
+
+
+logger = logging.getLogger(__name__)
+
+ImportPayload = IO | list[dict] | Iterable[dict] | AsyncIterable[dict]
+
+# Resources that have to exist in Sisu before a resource referring to them can be imported
+DEFAULT_IMPORT_DEPENDENCIES: dict[SisImportable, tuple[SisImportable, ...]] = {
+    AccessRolePersonAssignments: (OriPersons,),
+    Educations: (Organisations,),
+    CurriculumPeriods: (Organisations,),
+    Qualifications: (Organisations,),
+    CooperationNetworks: (Organisations,),
+    CourseUnits: (Organisations, CurriculumPeriods, GradeScales),
+    Modules: (Organisations, CurriculumPeriods, GradeScales),
+    AssessmentItems: (CourseUnits,),
+    CourseUnitRealisations: (AssessmentItems, Organisations),
+    EnrolmentCalculationConfigs: (CourseUnitRealisations,),
+    AdmissionTargets: (Educations, Organisations),
+    TermRegistrationRequirements: (Educations,),
+    StudyRights: (OriPersons, Educations, Organisations),
+    StudyRightPrimalities: (StudyRights,),
+    TermRegistrations: (StudyRights,),
+    MobilityPeriods: (StudyRights,),
+    Thesis: (OriPersons, StudyRights),
+    Attainments: (
+        OriPersons, StudyRights, CourseUnits, AssessmentItems, CourseUnitRealisations, Modules, GradeScales,
+    ),
+}
+
+# import_to_sisu arguments the scheduler sets itself, so they cannot be given in import_options
+RESERVED_IMPORT_OPTIONS = frozenset({
+    'sisu_config', 'resource', 'fp', 'data', 'as_generator', 'max_parallel_requests', 'client_manager',
+    'concurrency_limiter', 'report', 'retry_policy',
+})
+
+
+class ResourceImportStats(BaseModel):
+    resource: str
+    accepted: int = 0
+    rejected: int = 0
+    final_responses: int = 0
+    seconds: float = 0.0
+    error: str | None = None
+    skipped: bool = False
+
+
+def get_import_order(
+    resources: Collection[SisImportable],
+    dependencies: Mapping[SisImportable, Collection[SisImportable]],
+) -> list[SisImportable]:
+    """
+        The resources in an order where every resource comes after its prerequisites. Prerequisites that are not
+        among `resources` are ignored.
+    """
+    ordered = []
+    visiting = set()
+
+    def _visit(resource: SisImportable, path: tuple):
+        if resource in ordered:
+            return
+        if resource in visiting:
+            raise Exception("Circular import dependency: " + " -> ".join(repr(x) for x in path + (resource,)))
+
+        visiting.add(resource)
+        for prerequisite in dependencies.get(resource, ()):
+            if prerequisite in resources:
+                _visit(prerequisite, path + (resource,))
+        visiting.discard(resource)
+        ordered.append(resource)
+
+    for _resource in resources:
+        _visit(_resource, ())
+
+    return ordered
+
+
+async def _import_resource(
+    sisu_config: SisuConfig,
+    resource: SisImportable,
+    payload: ImportPayload,
+    prerequisites: list[asyncio.Task],
+    stats: ResourceImportStats,
+    report: ImportReport,
+    import_options: dict,
+    max_parallel_requests: int,
+    client_manager: SisuClientManager,
+    retry_policy: RetryPolicy | None,
+    concurrency_limiter: AdaptiveConcurrencyLimiter | asyncio.Semaphore,
+) -> bool:
+    if not all(await asyncio.gather(*prerequisites)):
+        stats.skipped = True
+        stats.error = "A prerequisite import failed"
+        logger.warning("Skipping the import of %s, a prerequisite import failed", stats.resource)
+        return False
+
+    if isinstance(payload, list) and not payload:
+        # Nothing to import, the dependent imports can go ahead
+        return True
+
+    # File objects are iterable too, so files are told apart by read
+    _payload = {'fp': payload} if hasattr(payload, 'read') else {'data': payload}
+    started = time.perf_counter()
+    final_responses = report.final_responses
+    try:
+        await import_to_sisu(**(
+            {'use_legacy_import': False}
+            | import_options
+            | _payload
+            | {
+                'sisu_config': sisu_config,
+                'resource': resource,
+                'max_parallel_requests': max_parallel_requests,
+                'client_manager': client_manager,
+                'concurrency_limiter': concurrency_limiter,
+                'report': report,
+                'retry_policy': retry_policy,
+            }
+        ))
+    except Exception as e:
+        stats.error = str(e)
+        logger.exception("Import of %s failed", stats.resource)
+    finally:
+        stats.seconds = time.perf_counter() - started
+        stats.accepted = report.accepted_count
+        stats.rejected = report.rejected_count
+        stats.final_responses = report.final_responses - final_responses
+
+    logger.info(
+        "Imported %s in %.1f s: %d accepted, %d rejected",
+        stats.resource, stats.seconds, stats.accepted, stats.rejected,
+    )
+    return stats.error is None
+
+
+async def import_resources_to_sisu(
+    sisu_config: SisuConfig,
+    payloads: Mapping[SisImportable, ImportPayload],
+    dependencies: Mapping[SisImportable, Collection[SisImportable]] = DEFAULT_IMPORT_DEPENDENCIES,
+    max_parallel_requests: int = 4,
+    import_options: Mapping[SisImportable, dict] | None = None,
+    reports: Mapping[SisImportable, ImportReport] | None = None,
+    client_manager: SisuClientManager | None = None,
+    retry_policy: RetryPolicy | None = DEFAULT_RETRY_POLICY,
+    concurrency_limiter: AdaptiveConcurrencyLimiter | asyncio.Semaphore | None = None,
+    raise_on_error: bool = True,
+) -> dict[str, ResourceImportStats]:
+    """
+        Imports several resources, each as soon as the imports of its prerequisites in `dependencies` are done.
+
+        A payload is a JSON lines file or the entities (a list, an iterable or an async iterable). Resources that do
+        not depend on each other, e.g. Buildings and GradeScales, are imported concurrently, and all the imports share
+        one client and a budget of `max_parallel_requests` requests in flight (or the given `concurrency_limiter`).
+        `import_options` holds further `import_to_sisu` arguments by resource, e.g. `batch_size`, `group_by_key` or
+        `use_legacy_import` (False by default). The arguments in `RESERVED_IMPORT_OPTIONS` are set by the scheduler
+        and are rejected in `import_options`.
+        The outcomes are recorded into the given `reports`, or into reports of their own. When an import fails, the
+        imports depending on it are skipped. Rejected entities do not fail an import.
+    """
+    for resource, options in (import_options or {}).items():
+        if reserved := sorted(RESERVED_IMPORT_OPTIONS.intersection(options)):
+            raise Exception(
+                f"import_options of {resource!r} cannot set {', '.join(reserved)}, they are set by the scheduler"
+            )
+
+    if concurrency_limiter is None:
+        concurrency_limiter = asyncio.Semaphore(max_parallel_requests)
+
+    if client_manager is None:
+        async with SisuClientManager(sisu_config) as _client_manager:
+            return await import_resources_to_sisu(
+                sisu_config=sisu_config,
+                payloads=payloads,
+                dependencies=dependencies,
+                max_parallel_requests=max_parallel_requests,
+                import_options=import_options,
+                reports=reports,
+                client_manager=_client_manager,
+                retry_policy=retry_policy,
+                concurrency_limiter=concurrency_limiter,
+                raise_on_error=raise_on_error,
+            )
+
+    stats_by_resource = {repr(resource): ResourceImportStats(resource=repr(resource)) for resource in payloads}
+    tasks: dict[SisImportable, asyncio.Task] = {}
+    for resource in get_import_order(list(payloads), dependencies):
+        tasks[resource] = asyncio.create_task(_import_resource(
+            sisu_config=sisu_config,
+            resource=resource,
+            payload=payloads[resource],
+            prerequisites=[tasks[x] for x in dependencies.get(resource, ()) if x in tasks],
+            stats=stats_by_resource[repr(resource)],
+            report=reports[resource] if reports and resource in reports else ImportReport(),
+            import_options=(import_options or {}).get(resource, {}),
+            max_parallel_requests=max_parallel_requests,
+            client_manager=client_manager,
+            retry_policy=retry_policy,
+            concurrency_limiter=concurrency_limiter,
+        ))
+
+    await asyncio.gather(*tasks.values())
+
+    failed = [stats for stats in stats_by_resource.values() if stats.error is not None]
+    if failed and raise_on_error:
+        raise Exception(
+            "Import failed for: " + ", ".join(f"{stats.resource} ({stats.error})" for stats in failed)
+        )
+
+    return stats_by_resource
@@ -0,0 +1,267 @@
+#  Copyright (c) 2025 Funidata Oy.
+#  All rights reserved.
+# ------------------------------------------------------------------------------
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from concurrent.futures import Executor, ProcessPoolExecutor
+from functools import partial
+from typing import IO, AsyncGenerator, AsyncIterable, Awaitable, Callable, Iterable, Sequence
+
+from pydantic import TypeAdapter, ValidationError
+
+from .schema_registry import get_type_adapter, validate_page
+from ..json_tools.jsonl_writer import JsonlWriter
+from ..request_utils.encoded_payload import encode_entity
+from ..request_utils.import_report import ImportReport
+from ..utils import as_async_iterable
+
+
+logger = logging.getLogger(__name__)
+
+RejectSink = IO | JsonlWriter | Callable[[list[dict]], None]
+
+# How the entities rejected before sending show in an ImportReport
+PREFLIGHT_STATUS_CODE = 422
+PREFLIGHT_ERROR_CODE = 'PreflightValidation'
+# The errors of a valid entity rejected with the invalid entities of its group
+_GROUP_MEMBER_ERRORS = [{'type': 'invalid_group', 'loc': (), 'msg': 'Another entity of the group is invalid'}]
+
+
+def get_validation_errors(adapter: TypeAdapter, entity: dict) -> list[dict]:
+    try:
+        adapter.validate_python(entity)
+    except ValidationError as e:
+        return e.errors(include_url=False, include_context=False, include_input=False)
+    except Exception as e:
+        # e.g. SisBase refusing an unknown documentState
+        return [{'type': 'exception', 'loc': [], 'msg': str(e)}]
+
+    return []
+
+
+def get_page_errors(resource: type, entities: list[dict] | bytes) -> dict[int, list[dict]]:
+    """
+        The validation errors of the invalid entities of the page by their index. The page, a list of entities or
+        a JSON array, is validated in one call.
+    """
+    try:
+        validate_page(resource, entities)
+    except ValidationError as e:
+        errors_by_index = defaultdict(list)
+        for error in e.errors(include_url=False, include_context=False, include_input=False):
+            index, *loc = error['loc']
+            errors_by_index[index].append(error | {'loc': tuple(loc)})
+        return errors_by_index
+    except Exception:
+        # Anything else than a ValidationError fails the whole page, so the entities are validated one by one
+        adapter = get_type_adapter(resource)
+        if isinstance(entities, bytes):
+            entities = json.loads(entities)
+        return {
+            index: errors for index, entity in enumerate(entities) if (errors := get_validation_errors(adapter, entity))
+        }
+
+    return {}
+
+
+def encode_page(entities: Sequence[dict]) -> bytes:
+    return b'[' + b','.join([encode_entity(entity) for entity in entities]) + b']'
+
+
+def bulk_validate(
+    resource: type,
+    entities: Sequence[dict],
+    executor: Executor | None = None,
+    shard_size: int = 2000,
+    max_workers: int | None = None,
+) -> list[list[dict]]:
+    """
+        Validates the entities in worker processes, returning the validation errors of each entity in the input
+        order (an empty list for a valid entity).
+
+        The entities are sharded `shard_size` at a time, and each shard is shipped to a worker as one encoded JSON
+        array, which is cheaper to pickle than the dicts and is validated straight from JSON. Without an `executor`
+        a ProcessPoolExecutor of `max_workers` processes is used for the call. Schemas registered at runtime are
+        only seen by forked workers.
+    """
+    if executor is None:
+        with ProcessPoolExecutor(max_workers=max_workers) as _executor:
+            return bulk_validate(resource, entities, _executor, shard_size)
+
+    shards = (encode_page(entities[i:i + shard_size]) for i in range(0, len(entities), shard_size))
+    # map yields the results in the order of the shards
+    return _errors_by_entity(len(entities), shard_size, executor.map(partial(get_page_errors, resource), shards))
+
+
+async def bulk_validate_async(
+    resource: type,
+    entities: Sequence[dict],
+    executor: Executor | None = None,
+    shard_size: int = 2000,
+    max_workers: int | None = None,
+) -> list[list[dict]]:
+    """
+        bulk_validate without blocking the event loop.
+    """
+    if executor is None:
+        with ProcessPoolExecutor(max_workers=max_workers) as _executor:
+            return await bulk_validate_async(resource, entities, _executor, shard_size)
+
+    shard_errors = await asyncio.gather(*[
+        asyncio.wrap_future(executor.submit(get_page_errors, resource, encode_page(entities[i:i + shard_size])))
+        for i in range(0, len(entities), shard_size)
+    ])
+    return _errors_by_entity(len(entities), shard_size, shard_errors)
+
+
+def _errors_by_entity(
+    entity_count: int,
+    shard_size: int,
+    shard_errors: Iterable[dict[int, list[dict]]],
+) -> list[list[dict]]:
+    errors = []
+    for shard_index, errors_by_index in enumerate(shard_errors):
+        shard_length = min(shard_size, entity_count - shard_index * shard_size)
+        errors += [errors_by_index.get(index, []) for index in range(shard_length)]
+
+    return errors
+
+
+def _is_grouped(_batch: list[dict] | list[list[dict]]) -> bool:
+    return bool(_batch) and isinstance(_batch[0], list)
+
+
+def _flatten(_batch: list[dict] | list[list[dict]]) -> list[dict]:
+    return [entity for group in _batch for entity in group] if _is_grouped(_batch) else _batch
+
+
+def _write_rejects(sink: RejectSink, rejects: list[dict]):
+    if isinstance(sink, JsonlWriter):
+        sink.write_entities(rejects)
+    elif callable(sink):
+        sink(rejects)
+    else:
+        sink.write(''.join(json.dumps(reject, default=str) + '\n' for reject in rejects))
+
+
+class PreflightValidator:
+    """
+        Validates the entities against their schema before the import, so only the valid ones get sent to Sisu and
+        the invalid ones are not searched out of the batches request by request.
+
+        The entities are validated against the schema of the resource in the schema registry, a batch at a time.
+        Invalid entities go to `reject_sink` as {"id": ..., "errors": [...], "entity": {...}}, a sink is a text file
+        or a JsonlWriter (rejects are written as JSON lines), or a callable receiving the rejects of each batch.
+        The entities themselves are sent as they are, the validated models are not dumped.
+
+        An entity sharing a group with an invalid one is rejected along with it, as a group is sent to Sisu whole
+        or not at all. In an import the rejected entities are also recorded into the import's report, with a 422
+        status and the error code 'PreflightValidation', where only the invalid ones count as failing ids.
+
+        In an import the batches are validated as they are about to be sent, and the next batch is validated while
+        the one before it is being sent. The validation never runs on the event loop: by default it runs in the
+        loop's default thread pool, which keeps the loop responsive but holds the GIL while validating. For CPU
+        heavy schemas give a ProcessPoolExecutor as `executor`, the batches are then shipped to it as encoded JSON.
+    """
+
+    def __init__(
+        self,
+        resource: type,
+        reject_sink: RejectSink | None = None,
+        executor: Executor | None = None,
+    ):
+        # Fails early for a resource without a schema
+        get_type_adapter(resource)
+        self.resource = resource
+        self.reject_sink = reject_sink
+        self.executor = executor
+        self.valid_count = 0
+        self.rejected_count = 0
+
+    def __repr__(self):
+        return f'{type(self).__name__}(valid={self.valid_count}, rejected={self.rejected_count})'
+
+    def _drop_invalid(
+        self,
+        entities: list[dict],
+        errors_by_index: dict[int, list[dict]],
+        report: ImportReport | None = None,
+    ) -> list[dict]:
+        valid = []
+        rejects = []
+        for index, entity in enumerate(entities):
+            if index in errors_by_index:
+                rejects.append({'id': entity.get('id'), 'errors': errors_by_index[index], 'entity': entity})
+            else:
+                valid.append(entity)
+
+        self.valid_count += len(valid)
+        self.rejected_count += len(rejects)
+        if rejects:
+            if report is not None:
+                report.add(
+                    ids=[reject['id'] for reject in rejects],
+                    status_code=PREFLIGHT_STATUS_CODE,
+                    error_code=PREFLIGHT_ERROR_CODE,
+                    failing_ids=[reject['id'] for reject in rejects if reject['errors'] is not _GROUP_MEMBER_ERRORS],
+                )
+            if self.reject_sink is not None:
+                _write_rejects(self.reject_sink, rejects)
+            else:
+                logger.warning("Dropped %d invalid entities: %s", len(rejects), [x['id'] for x in rejects])
+
+        return valid
+
+    def _validate_later(self, entities: list[dict]) -> Awaitable[dict[int, list[dict]]]:
+        if self.executor is None:
+            # Threads share the entities, no need to encode them
+            return asyncio.get_running_loop().run_in_executor(None, get_page_errors, self.resource, entities)
+
+        return asyncio.wrap_future(self.executor.submit(get_page_errors, self.resource, encode_page(entities)))
+
+    async def _valid_batch(
+        self,
+        _batch: list[dict] | list[list[dict]],
+        errors: Awaitable[dict[int, list[dict]]],
+        report: ImportReport | None = None,
+    ) -> list[dict] | list[list[dict]]:
+        if not _is_grouped(_batch):
+            return self._drop_invalid(_batch, await errors, report)
+
+        # A group with an invalid entity is dropped whole
+        errors_by_index = dict(await errors)
+        valid_groups = []
+        offset = 0
+        for group in _batch:
+            group_indexes = range(offset, offset + len(group))
+            if any(index in errors_by_index for index in group_indexes):
+                for index in group_indexes:
+                    errors_by_index.setdefault(index, _GROUP_MEMBER_ERRORS)
+            else:
+                valid_groups.append(group)
+            offset += len(group)
+
+        self._drop_invalid(_flatten(_batch), errors_by_index, report)
+        return valid_groups
+
+    async def afilter_batches(
+        self,
+        batches: Iterable[list[dict] | list[list[dict]]] | AsyncIterable[list[dict] | list[list[dict]]],
+        report: ImportReport | None = None,
+    ) -> AsyncGenerator[list[dict] | list[list[dict]], None]:
+        """
+            Filters flat or grouped batches, dropping the batches left without valid entities. A batch is yielded
+            only once the validation of the next one has been started. The rejected entities are recorded into
+            `report` when given.
+        """
+        pending = None
+        async for _batch in as_async_iterable(batches):
+            started = (_batch, self._validate_later(_flatten(_batch)))
+            if pending is not None and (valid := await self._valid_batch(*pending, report)):
+                yield valid
+            pending = started
+
+        if pending is not None and (valid := await self._valid_batch(*pending, report)):
+            yield valid
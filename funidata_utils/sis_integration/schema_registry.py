@@ -0,0 +1,104 @@
+#  Copyright (c) 2025 Funidata Oy.
+#  All rights reserved.
+# ------------------------------------------------------------------------------
+import logging
+from typing import Any
+
+from pydantic import TypeAdapter
+
+from .resources import (
+    OriPersons, KoriPersons, Attainments, StudyRights, TermRegistrations, Thesis, MobilityPeriods, Organisations,
+    CourseUnits, CourseUnitRealisations, Educations, Modules, StudyYearTemplates, CodeBooks, CurriculumPeriods,
+    AssessmentItems, Buildings, Qualifications, GradeScales, CooperationNetworks, EnrolmentCalculationConfigs,
+)
+from ..schemas.sisu import (
+    PrivatePerson, PublicPerson, StudyRight, StudyRightTermRegistrations, Thesis as ThesisModel, MobilityPeriod,
+    Organisation, CourseUnit, CourseUnitRealisation, Education, StudyYearTemplate, CodeBook, CurriculumPeriod,
+    AssessmentItem, Building, Qualification, GradeScale, CooperationNetwork, EnrolmentCalculationConfig,
+)
+from ..schemas.sisu.attainment import attainment
+from ..schemas.sisu.module import module
+
+
+logger = logging.getLogger(__name__)
+
+# The schema of an entity of the resource, Attainments and Modules are unions discriminated by type
+RESOURCE_MODELS: dict[type, Any] = {
+    OriPersons: PrivatePerson,
+    KoriPersons: PublicPerson,
+    Attainments: attainment,
+    StudyRights: StudyRight,
+    TermRegistrations: StudyRightTermRegistrations,
+    Thesis: ThesisModel,
+    MobilityPeriods: MobilityPeriod,
+    Organisations: Organisation,
+    CourseUnits: CourseUnit,
+    CourseUnitRealisations: CourseUnitRealisation,
+    Educations: Education,
+    Modules: module,
+    StudyYearTemplates: StudyYearTemplate,
+    CodeBooks: CodeBook,
+    CurriculumPeriods: CurriculumPeriod,
+    AssessmentItems: AssessmentItem,
+    Buildings: Building,
+    Qualifications: Qualification,
+    GradeScales: GradeScale,
+    CooperationNetworks: CooperationNetwork,
+    EnrolmentCalculationConfigs: EnrolmentCalculationConfig,
+}
+
+# Building an adapter compiles the validator and the serializer, so it is done once per resource and process
+_type_adapters: dict[type, TypeAdapter] = {}
+_list_adapters: dict[type, TypeAdapter] = {}
+
+
+def register_resource_model(resource: type, model: Any):
+    """
+        Sets the schema of the resource, e.g. a stricter model of an organisation's own.
+    """
+    RESOURCE_MODELS[resource] = model
+    _type_adapters.pop(resource, None)
+    _list_adapters.pop(resource, None)
+
+
+def get_resource_model(resource: type) -> Any:
+    if resource not in RESOURCE_MODELS:
+        raise Exception(f'No schema registered for {resource}')
+
+    return RESOURCE_MODELS[resource]
+
+
+def get_type_adapter(resource: type) -> TypeAdapter:
+    if resource not in _type_adapters:
+        _type_adapters[resource] = TypeAdapter(get_resource_model(resource))
+
+    return _type_adapters[resource]
+
+
+def get_list_adapter(resource: type) -> TypeAdapter:
+    """
+        TypeAdapter of a list of the resource's entities, for validating and serialising whole pages in one call.
+    """
+    if resource not in _list_adapters:
+        _list_adapters[resource] = TypeAdapter(list[get_resource_model(resource)])
+
+    return _list_adapters[resource]
+
+
+def validate_page(resource: type, entities: list[dict] | bytes | str) -> list:
+    """
+        Validates a page of entities, given as dicts or as a JSON array, into models. Raises a ValidationError
+        where the location of each error starts with the index of the entity.
+    """
+    if isinstance(entities, (bytes, str)):
+        return get_list_adapter(resource).validate_json(entities)
+
+    return get_list_adapter(resource).validate_python(entities)
+
+
+def dump_page(resource: type, models: list, **kwargs) -> list[dict]:
+    return get_list_adapter(resource).dump_python(models, mode='json', **kwargs)
+
+
+def dump_page_json(resource: type, models: list, **kwargs) -> bytes:
+    return get_list_adapter(resource).dump_json(models, **kwargs)
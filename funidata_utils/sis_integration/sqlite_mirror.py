@@ -0,0 +1,195 @@
+#  Copyright (c) 2025 Funidata Oy.
+#  All rights reserved.
+# ------------------------------------------------------------------------------
+import json
+import logging
+import os
+import re
+from typing import Any, Collection, Iterable, Sequence
+
+from .async_exports import export_from_sisu_async
+from .checkpoints import SqliteCheckpointStore
+from .exports import export_from_sisu
+from .protocols import SisExportable, SupportsExportAuthentication
+from ..json_tools.content_hash import DEFAULT_IGNORED_FIELDS, content_hash
+from ..request_utils.client_manager import SisuClientManager
+from ..request_utils.retries import RetryPolicy, DEFAULT_RETRY_POLICY
+
+
+logger = logging.getLogger(__name__)
+
+_IDENTIFIER = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+_FIELD_PATH = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)*$')
+
+
+def _get_table(resource: SisExportable) -> str:
+    table = repr(resource)
+    if not _IDENTIFIER.match(table):
+        raise Exception(f'Cannot use {table} as a table name')
+
+    return table
+
+
+def _get_json_path(field: str) -> str:
+    if not _FIELD_PATH.match(field):
+        raise Exception(f'Invalid field: {field}')
+
+    return f'$.{field}'
+
+
+class SqliteExportMirror(SqliteCheckpointStore):
+    """
+        Local SQLite replica of exported Sisu resources, one table per resource keyed on entity id.
+
+        An entity is only replaced when its `metadata.modificationOrdinal` (or `revision`, when there is no ordinal)
+        is newer than the stored one. The mirror is its own checkpoint store, so `sync` only pulls the changes since
+        the previous run. Lookups by other fields use expression indexes created with `create_index`.
+
+            with SqliteExportMirror('sisu.db') as mirror:
+                mirror.create_index(Attainments, 'personId')
+                mirror.sync(sisu_config, Attainments)
+                attainments = mirror.find(Attainments, 'personId', person_id)
+    """
+
+    def __init__(self, path: str | os.PathLike):
+        super().__init__(path)
+        self._tables: set[str] = set()
+
+    def _ensure_table(self, resource: SisExportable) -> str:
+        table = _get_table(resource)
+        if table not in self._tables:
+            with self._lock, self._connection:
+                self._connection.execute(
+                    f'CREATE TABLE IF NOT EXISTS {table} ('
+                    f'id TEXT PRIMARY KEY, modification_ordinal INTEGER, revision INTEGER, document TEXT NOT NULL)'
+                )
+            self._tables.add(table)
+
+        return table
+
+    def create_index(self, resource: SisExportable, field: str):
+        table = self._ensure_table(resource)
+        index = f'ix_{table}_{field.replace(".", "_")}'
+        with self._lock, self._connection:
+            self._connection.execute(
+                f"CREATE INDEX IF NOT EXISTS {index} ON {table} (json_extract(document, '{_get_json_path(field)}'))"
+            )
+
+    def upsert(self, resource: SisExportable, entities: Iterable[dict]) -> int:
+        table = self._ensure_table(resource)
+        rows = []
+        for entity in entities:
+            metadata = entity.get('metadata') or {}
+            rows.append((
+                entity['id'], metadata.get('modificationOrdinal'), metadata.get('revision'), json.dumps(entity),
+            ))
+
+        with self._lock, self._connection:
+            changes_before = self._connection.total_changes
+            self._connection.executemany(
+                f'INSERT INTO {table} (id, modification_ordinal, revision, document) VALUES (?, ?, ?, ?) '
+                f'ON CONFLICT (id) DO UPDATE SET '
+                f'modification_ordinal = excluded.modification_ordinal, '
+                f'revision = excluded.revision, '
+                f'document = excluded.document '
+                f'WHERE CASE WHEN excluded.modification_ordinal IS NOT NULL '
+                f'THEN excluded.modification_ordinal > COALESCE({table}.modification_ordinal, -1) '
+                f'ELSE COALESCE(excluded.revision, -1) > COALESCE({table}.revision, -1) END',
+                rows,
+            )
+            return self._connection.total_changes - changes_before
+
+    def get(self, resource: SisExportable, _id: str) -> dict | None:
+        table = self._ensure_table(resource)
+        with self._lock:
+            row = self._connection.execute(f'SELECT document FROM {table} WHERE id = ?', (_id,)).fetchone()
+
+        return None if row is None else json.loads(row[0])
+
+    def find(self, resource: SisExportable, field: str, value: Any) -> list[dict]:
+        table = self._ensure_table(resource)
+        with self._lock:
+            rows = self._connection.execute(
+                f"SELECT document FROM {table} WHERE json_extract(document, '{_get_json_path(field)}') = ?",
+                (value,),
+            ).fetchall()
+
+        return [json.loads(row[0]) for row in rows]
+
+    def get_many(self, resource: SisExportable, ids: Sequence[str]) -> dict[str, dict]:
+        table = self._ensure_table(resource)
+        entities = {}
+        for index in range(0, len(ids), 500):
+            _ids = ids[index:index + 500]
+            with self._lock:
+                rows = self._connection.execute(
+                    f'SELECT id, document FROM {table} WHERE id IN ({", ".join("?" * len(_ids))})', _ids,
+                ).fetchall()
+
+            for _id, document in rows:
+                entities[_id] = json.loads(document)
+
+        return entities
+
+    def get_content_hashes(
+        self,
+        resource: SisExportable,
+        ids: Sequence[str],
+        ignored_fields: Collection[str] = DEFAULT_IGNORED_FIELDS,
+    ) -> dict[str, str]:
+        # Known state for a ChangeDetector: content hashes of the mirrored entities
+        return {
+            _id: content_hash(entity, ignored_fields) for _id, entity in self.get_many(resource, ids).items()
+        }
+
+    def count(self, resource: SisExportable) -> int:
+        table = self._ensure_table(resource)
+        with self._lock:
+            return self._connection.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+
+    def sync(
+        self,
+        sisu_config: SupportsExportAuthentication,
+        resource: SisExportable,
+        params: dict | None = None,
+        client_manager: SisuClientManager | None = None,
+        retry_policy: RetryPolicy | None = DEFAULT_RETRY_POLICY,
+    ) -> int:
+        changed = 0
+        for entities in export_from_sisu(
+            sisu_config,
+            resource,
+            as_generator=True,
+            params=params,
+            client_manager=client_manager,
+            retry_policy=retry_policy,
+            checkpoint_store=self,
+        ):
+            changed += self.upsert(resource, entities)
+
+        logger.info("Mirrored %d changed %s", changed, repr(resource))
+        return changed
+
+    async def async_sync(
+        self,
+        sisu_config: SupportsExportAuthentication,
+        resource: SisExportable,
+        params: dict | None = None,
+        client_manager: SisuClientManager | None = None,
+        retry_policy: RetryPolicy | None = DEFAULT_RETRY_POLICY,
+        prefetch_pages: int = 1,
+    ) -> int:
+        changed = 0
+        async for entities in export_from_sisu_async(
+            sisu_config,
+            resource,
+            params=params,
+            client_manager=client_manager,
+            retry_policy=retry_policy,
+            checkpoint_store=self,
+            prefetch_pages=prefetch_pages,
+        ):
+            changed += self.upsert(resource, entities)
+
+        logger.info("Mirrored %d changed %s", changed, repr(resource))
+        return changed
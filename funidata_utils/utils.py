@@ -1,19 +1,22 @@
 #  Copyright (c) 2025 Funidata Oy.
 #  All rights reserved.
 # ------------------------------------------------------------------------------
+import asyncio
 import sys
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from functools import reduce
+from itertools import islice
 from statistics import mean, stdev
-from typing import Any, Generator, Callable
+from typing import Any, Generator, Callable, Iterable, AsyncIterable, AsyncGenerator
 
 import httpx
 
 
 if sys.version_info >= (3, 12):
-    from .compat.utils_312 import group_by  # noqa: F401 ("Unused import")
+    from .compat.utils_312 import group_by, override  # noqa: F401 ("Unused import")
 else:
-    from .compat.utils_legacy import group_by  # noqa: F401 ("Unused import")
+    from .compat.utils_legacy import group_by, override  # noqa: F401 ("Unused import")
 
 
 def _recursive_flatten(
@@ -69,3 +72,50 @@ def batch(iterable, steps=1):
     length = len(iterable)
     for index in range(0, length, steps):
         yield iterable[index:min(index + steps, length)]
+
+
+def batch_iterable(iterable: Iterable, steps=1) -> Generator[list, None, None]:
+    # Like batch, but consumes the iterable lazily instead of requiring len() and slicing
+    iterator = iter(iterable)
+    while _batch := list(islice(iterator, steps)):
+        yield _batch
+
+
+async def as_async_iterable(iterable: Iterable | AsyncIterable) -> AsyncGenerator:
+    if isinstance(iterable, AsyncIterable):
+        async for item in iterable:
+            yield item
+    else:
+        # Runs on the event loop, a blocking iterable should go through aiter_in_thread instead
+        for item in iterable:
+            yield item
+
+
+async def aiter_in_thread(iterable: Iterable, chunk_size: int = 1000) -> AsyncGenerator:
+    """
+        Iterates a blocking iterable, e.g. a database cursor, in a thread of its own so the event loop is not
+        blocked while fetching. The items are fetched `chunk_size` at a time, and the iterable is only ever used
+        from that one thread, which also closes it when the iteration stops early.
+    """
+    loop = asyncio.get_running_loop()
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        iterator = await loop.run_in_executor(executor, iter, iterable)
+        try:
+            while _batch := await loop.run_in_executor(executor, list, islice(iterator, chunk_size)):
+                for item in _batch:
+                    yield item
+        finally:
+            if hasattr(iterator, 'close'):
+                await loop.run_in_executor(executor, iterator.close)
+
+
+async def abatch_iterable(iterable: Iterable | AsyncIterable, steps=1) -> AsyncGenerator[list, None]:
+    _batch = []
+    async for item in as_async_iterable(iterable):
+        _batch.append(item)
+        if len(_batch) >= steps:
+            yield _batch
+            _batch = []
+
+    if _batch:
+        yield _batch
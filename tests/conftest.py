@@ -0,0 +1,20 @@
+import pytest
+
+
+class SisuSettings:
+    """
+        Stands in for a SisuConfig in the tests, the requests go to mock transports.
+    """
+    host = "http://sisu.localhost"
+    proxies = None
+
+    def get_integration_auth(self):
+        return "user", "password"
+
+    def get_export_auth(self):
+        return "user", "password"
+
+
+@pytest.fixture
+def sisu_settings() -> SisuSettings:
+    return SisuSettings()
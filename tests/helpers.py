@@ -2,14 +2,15 @@ import json
 from collections import defaultdict
 
 import httpx
-import pytest
+import pytest_asyncio
 
 
-@pytest.fixture
-def mock_client():
-    return httpx.AsyncClient(
+@pytest_asyncio.fixture
+async def mock_client():
+    async with httpx.AsyncClient(
         transport=httpx.MockTransport(invalid_handler)
-    )
+    ) as client:
+        yield client
 
 
 def invalid_handler(request: httpx.Request):
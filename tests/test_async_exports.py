@@ -0,0 +1,50 @@
+import asyncio
+
+import httpx
+import pytest
+
+from funidata_utils.request_utils.client_manager import SisuClientManager
+from funidata_utils.sis_integration.async_exports import export_from_sisu_async
+from funidata_utils.sis_integration.resources import Attainments
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("prefetch_pages", [0, 2])
+async def test_next_pages_are_prefetched_while_consumer_processes(sisu_settings, prefetch_pages: int):
+    limit = Attainments.exports.default_export_limit
+    entity_count = limit * 4 + 1
+    requested_ordinals = []
+
+    async def handler(request: httpx.Request):
+        since = int(request.url.params["since"])
+        requested_ordinals.append(since)
+        entities = [{"id": ordinal} for ordinal in range(since + 1, min(since + limit, entity_count) + 1)]
+        return httpx.Response(200, json={"entities": entities, "greatestOrdinal": since + len(entities)})
+
+    exported = []
+    fetched_ahead = []
+    async with SisuClientManager(sisu_settings, async_transport=httpx.MockTransport(handler)) as client_manager:
+        async for entities in export_from_sisu_async(
+            sisu_settings,
+            Attainments,
+            client_manager=client_manager,
+            prefetch_pages=prefetch_pages,
+        ):
+            await asyncio.sleep(0.01)
+            # Pages requested beyond the one being processed
+            fetched_ahead.append(len(requested_ordinals) - len(exported) // limit - 1)
+            exported += entities
+
+    assert [x["id"] for x in exported] == list(range(1, entity_count + 1))
+    assert requested_ordinals == [0, limit, 2 * limit, 3 * limit, 4 * limit]
+    assert max(fetched_ahead) == prefetch_pages
+
+
+@pytest.mark.asyncio
+async def test_export_error_is_raised_to_the_consumer(sisu_settings):
+    async with SisuClientManager(
+        sisu_settings, async_transport=httpx.MockTransport(lambda request: httpx.Response(400))
+    ) as client_manager:
+        with pytest.raises(Exception, match="Error in export: 400"):
+            async for _ in export_from_sisu_async(sisu_settings, Attainments, client_manager=client_manager):
+                pass
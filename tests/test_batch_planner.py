@@ -0,0 +1,121 @@
+import json
+
+import httpx
+import pytest
+
+from funidata_utils.request_utils.async_httpx_requests import send_post_with_binary_err_search_httpx
+from funidata_utils.request_utils.batch_planner import pack_groups_balanced, plan_encoded_batches
+from funidata_utils.request_utils.httpx_requests import (
+    send_post_with_binary_err_search_httpx as send_post_with_binary_err_search_httpx_sync,
+)
+from tests.helpers import invalid_handler, get_entity_counts_by_status_code
+
+
+def test_batches_are_split_by_request_body_size():
+    payload = [{"id": _id, "data": "x" * (1000 if _id == 5 else 10)} for _id in range(10)]
+
+    planned = plan_encoded_batches(payload, max_batch_bytes=200)
+    bodies = [encoded.body(view) for encoded, view in planned]
+    assert [len(json.loads(body)) for body in bodies] == [5, 1, 4]
+    assert all(len(body) <= 200 for body in bodies if len(json.loads(body)) > 1)
+    assert [_x for body in bodies for _x in json.loads(body)] == payload
+
+    # Groups are kept whole
+    grouped = [payload[:3], payload[3:5], payload[5:6], payload[6:]]
+    planned = plan_encoded_batches(grouped, max_batch_bytes=200)
+    assert [[len(group) for group in view] for _, view in planned] == [[3, 2], [1], [4]]
+
+    assert len(plan_encoded_batches(payload)) == 1
+
+    # The envelope counts towards the limit
+    ids = [f"otm-{_id:05d}" for _id in range(20)]
+    planned = plan_encoded_batches(ids, max_batch_bytes=100, envelope="ids")
+    bodies = [encoded.body(view) for encoded, view in planned]
+    assert all(len(body) <= 100 for body in bodies)
+    assert [_id for body in bodies for _id in json.loads(body)["ids"]] == ids
+
+
+def _too_large_handler(request: httpx.Request):
+    if len(request.content) > 150:
+        return httpx.Response(413)
+
+    return invalid_handler(request)
+
+
+@pytest.mark.asyncio
+async def test_too_large_requests_are_split_whatever_the_search_depth():
+    payload = [{"id": _id, "data": "x" * 20} for _id in range(20)]
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(_too_large_handler)) as client:
+        responses = await send_post_with_binary_err_search_httpx(
+            path="http://localhost",
+            payload=payload,
+            batch_size=10,
+            binary_search_max_depth=0,
+            client=client,
+        )
+    assert get_entity_counts_by_status_code(responses) == {200: 20}
+
+    sent_bodies = []
+
+    def handler(request: httpx.Request):
+        sent_bodies.append(request.content)
+        return _too_large_handler(request)
+
+    with httpx.Client(transport=httpx.MockTransport(handler)) as client:
+        responses = send_post_with_binary_err_search_httpx_sync(
+            path="http://localhost",
+            payload=payload,
+            batch_size=10,
+            binary_search_max_depth=0,
+            client=client,
+            max_batch_bytes=150,
+        )
+
+    # Planned within the limit up front, nothing was rejected for its size
+    assert get_entity_counts_by_status_code(responses) == {200: 20}
+    assert all(len(body) <= 150 for body in sent_bodies)
+
+
+def test_balanced_packing_evens_out_the_batches():
+    sizes = [400, 3, 80, 120, 5, 250, 40]
+    groups = [[{"id": f"{index}-{_id}"} for _id in range(size)] for index, size in enumerate(sizes)]
+
+    packed = pack_groups_balanced(groups, max_batch_size=500)
+    # Greedy batching would give 603 and 295 items
+    assert sorted(sum(len(group) for group in _batch) for _batch in packed) == [448, 450]
+    # Groups are whole and in their original order within a batch
+    for _batch in packed:
+        indexes = [groups.index(group) for group in _batch]
+        assert indexes == sorted(indexes)
+
+    assert [len(_batch[0]) for _batch in pack_groups_balanced(groups, 300)[:1]] == [400]
+    split = pack_groups_balanced(groups, max_batch_size=300, oversized_groups="split")
+    assert max(sum(len(group) for group in _batch) for _batch in split) <= 300
+    assert sum(len(group) for _batch in split for group in _batch) == 898
+    with pytest.raises(Exception):
+        pack_groups_balanced(groups, 300, oversized_groups="raise")
+
+
+@pytest.mark.asyncio
+async def test_balanced_packing_is_used_for_grouped_imports():
+    data = [
+        {"id": f"{person}-{_id}", "personId": person}
+        for person, size in enumerate([30, 2, 8, 12, 25]) for _id in range(size)
+    ]
+    sent_sizes = []
+
+    def handler(request: httpx.Request):
+        sent_sizes.append(len(json.loads(request.content)))
+        return invalid_handler(request)
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        await send_post_with_binary_err_search_httpx(
+            path="http://localhost",
+            payload=data,
+            group_by_key="personId",
+            batch_size=40,
+            client=client,
+            group_packing="balanced",
+        )
+    assert sorted(sent_sizes) == [38, 39]
@@ -0,0 +1,113 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from funidata_utils.request_utils.async_httpx_requests import (
+    iter_post_with_binary_err_search_httpx, send_post_with_binary_err_search_httpx,
+)
+from tests.helpers import invalid_handler
+
+
+@pytest.mark.asyncio
+async def test_results_are_yielded_per_batch_with_bounded_pending_batches():
+    data = [{"id": _id, "invalid": _id == 42} for _id in range(100)]
+    in_flight = 0
+    max_in_flight = 0
+
+    async def handler(request: httpx.Request):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.001)
+        in_flight -= 1
+        return invalid_handler(request)
+
+    yielded = []
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        async for results in iter_post_with_binary_err_search_httpx(
+            path="http://localhost",
+            payload=data,
+            batch_size=10,
+            binary_search_max_depth=4,
+            client=client,
+            max_parallel_requests=3,
+        ):
+            # One list of responses per sent batch
+            yielded.append(sorted(_x["id"] for response in results for _x in json.loads(response.request.content)))
+            assert len(asyncio.all_tasks()) <= 1 + 1 + 3
+
+    assert len(yielded) == 10
+    assert sorted(_id for ids in yielded for _id in ids) == list(range(100))
+    assert max_in_flight <= 3
+
+
+@pytest.mark.asyncio
+async def test_worker_errors_are_raised_to_the_consumer():
+    def handler(request: httpx.Request):
+        raise httpx.ConnectError("Connection refused", request=request)
+
+    with pytest.raises(httpx.ConnectError):
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            async for _ in iter_post_with_binary_err_search_httpx(
+                path="http://localhost",
+                payload=[{"id": _id} for _id in range(10)],
+                batch_size=2,
+                client=client,
+                max_parallel_requests=2,
+            ):
+                pass
+
+
+@pytest.mark.asyncio
+async def test_list_results_keep_the_batch_order_and_the_iterator_the_completion_order():
+    data = [{"id": _id} for _id in range(8)]
+
+    async def handler(request: httpx.Request):
+        # The first batches are the slowest
+        first_id = json.loads(request.content)[0]["id"]
+        await asyncio.sleep(0.01 * (8 - first_id))
+        return httpx.Response(200)
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        responses = await send_post_with_binary_err_search_httpx(
+            path="http://localhost",
+            payload=data,
+            batch_size=2,
+            client=client,
+            max_parallel_requests=4,
+        )
+        assert [_x["id"] for response in responses for _x in json.loads(response.request.content)] == list(range(8))
+
+        completed = []
+        async for results in iter_post_with_binary_err_search_httpx(
+            path="http://localhost",
+            payload=data,
+            batch_size=2,
+            client=client,
+            max_parallel_requests=4,
+        ):
+            completed += [json.loads(response.request.content)[0]["id"] for response in results]
+    assert completed == [6, 4, 2, 0]
+
+
+@pytest.mark.asyncio
+async def test_stopping_early_leaves_no_tasks_behind():
+    async def handler(request: httpx.Request):
+        await asyncio.sleep(0.01)
+        return httpx.Response(200)
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        results = iter_post_with_binary_err_search_httpx(
+            path="http://localhost",
+            payload=[{"id": _id} for _id in range(20)],
+            batch_size=2,
+            client=client,
+            max_parallel_requests=3,
+        )
+        async for _ in results:
+            break
+        await results.aclose()
+
+    assert asyncio.all_tasks() == {asyncio.current_task()}
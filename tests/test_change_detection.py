@@ -0,0 +1,33 @@
+import pytest
+
+from funidata_utils.json_tools.content_hash import content_hash
+from funidata_utils.sis_integration.change_detection import ChangeDetector
+
+
+def test_content_hash_ignores_key_order_metadata_and_none_values():
+    entity = {"id": "a", "gradeId": 1, "nested": {"x": 1, "y": None}, "metadata": {"revision": 1}}
+    same = {"nested": {"x": 1}, "gradeId": 1, "id": "a", "metadata": {"revision": 7}, "extra": None}
+
+    assert content_hash(entity) == content_hash(same)
+    assert content_hash(entity) != content_hash(entity | {"gradeId": 2})
+    ignored_fields = {"metadata", "gradeId"}
+    assert content_hash(entity, ignored_fields) == content_hash(entity | {"gradeId": 2}, ignored_fields)
+
+
+@pytest.mark.asyncio
+async def test_change_detector_forwards_only_new_and_changed_entities():
+    known = [{"id": f"id-{_id}", "value": _id} for _id in range(10)]
+    detector = ChangeDetector(
+        lambda ids: {x["id"]: content_hash(x) for x in known if x["id"] in ids},
+        lookup_batch_size=4,
+    )
+
+    outgoing = [{"id": f"id-{_id}", "value": _id if _id != 3 else -3} for _id in range(12)]
+    assert [x["id"] for x in detector.filter_payload(outgoing)] == ["id-3", "id-10", "id-11"]
+    assert (detector.forwarded_count, detector.skipped_count) == (3, 9)
+
+    async def _outgoing():
+        for entity in outgoing:
+            yield entity
+
+    assert [x["id"] async for x in detector.filter_payload(_outgoing())] == ["id-3", "id-10", "id-11"]
@@ -0,0 +1,36 @@
+import httpx
+import pytest
+
+from funidata_utils.request_utils.async_httpx_requests import send_post_with_binary_err_search_httpx
+from funidata_utils.request_utils.client_manager import SisuClientManager
+from tests.helpers import invalid_handler
+
+
+@pytest.mark.asyncio
+async def test_client_manager_reuses_client_per_auth(sisu_settings):
+    timeouts = []
+
+    def handler(request: httpx.Request):
+        timeouts.append(request.extensions["timeout"]["read"])
+        return invalid_handler(request)
+
+    async with SisuClientManager(
+        sisu_settings, timeout=30, async_transport=httpx.MockTransport(handler),
+    ) as client_manager:
+        client = client_manager.get_async_client(('user', 'pwd'))
+        assert client_manager.get_async_client(('user', 'pwd')) is client
+        assert client_manager.get_async_client(('other', 'pwd')) is not client
+
+        results = await send_post_with_binary_err_search_httpx(
+            path="http://localhost",
+            payload=[{"id": _id} for _id in range(10)],
+            batch_size=3,
+            client=client,
+            max_parallel_requests=2,
+        )
+        assert [x.status_code for x in results] == [200] * 4
+        # The requests go with the timeout of the manager's clients
+        assert timeouts == [30] * 4
+        assert not client.is_closed
+
+    assert client.is_closed
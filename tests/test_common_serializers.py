@@ -0,0 +1,9 @@
+from funidata_utils.schemas.common_serializers import serialize_as_list
+
+
+def test_serialize_as_list_is_deterministic():
+    assert serialize_as_list({"c", "a", "b", "a"}) == ["a", "b", "c"]
+    # Not comparable, ordered by the canonical JSON of the elements whatever the input order
+    assert serialize_as_list([2, "a", 2]) == serialize_as_list(["a", 2]) == ["a", 2]
+    assert serialize_as_list({2, "a", (1, "b")}) == serialize_as_list({(1, "b"), "a", 2}) == ["a", 2, (1, "b")]
+    assert serialize_as_list([{"a": 1}]) == [{"a": 1}]
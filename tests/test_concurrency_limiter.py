@@ -0,0 +1,86 @@
+import asyncio
+
+import httpx
+import pytest
+
+from funidata_utils.request_utils.async_httpx_requests import send_post_with_binary_err_search_httpx
+from funidata_utils.request_utils.concurrency import AdaptiveConcurrencyLimiter
+
+
+def _respond(status_code: int):
+    async def _send():
+        await asyncio.sleep(0)
+        return httpx.Response(status_code)
+    return _send
+
+
+@pytest.mark.asyncio
+async def test_limiter_grows_on_healthy_responses():
+    limiter = AdaptiveConcurrencyLimiter(min_limit=1, max_limit=4)
+    for _ in range(20):
+        await limiter.run(_respond(200))
+
+    assert limiter.current_limit == 4
+    assert limiter.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_limiter_backs_off_once_per_burst():
+    limiter = AdaptiveConcurrencyLimiter(min_limit=1, max_limit=16, initial_limit=16)
+    await asyncio.gather(*[limiter.run(_respond(503)) for _ in range(16)])
+    assert limiter.current_limit == 8
+
+    await limiter.run(_respond(429))
+    assert limiter.current_limit == 4
+
+    await limiter.run(_respond(422))
+    assert limiter.current_limit == 4
+
+
+@pytest.mark.asyncio
+async def test_limiter_bounds_in_flight_requests():
+    limiter = AdaptiveConcurrencyLimiter(min_limit=2, max_limit=3)
+    max_seen = 0
+
+    async def handler(request: httpx.Request):
+        nonlocal max_seen
+        max_seen = max(max_seen, limiter.in_flight)
+        await asyncio.sleep(0.001)
+        return httpx.Response(200)
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        results = await send_post_with_binary_err_search_httpx(
+            path="http://localhost",
+            payload=[{"id": _id} for _id in range(40)],
+            batch_size=2,
+            client=client,
+            concurrency_limiter=limiter,
+        )
+    assert len(results) == 20
+    assert 2 <= max_seen <= 3
+
+
+@pytest.mark.asyncio
+async def test_semaphore_capacity_sets_the_parallel_requests():
+    in_flight = 0
+    max_in_flight = 0
+
+    async def handler(request: httpx.Request):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.001)
+        in_flight -= 1
+        return httpx.Response(200)
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        results = await send_post_with_binary_err_search_httpx(
+            path="http://localhost",
+            payload=[{"id": _id} for _id in range(40)],
+            batch_size=2,
+            client=client,
+            concurrency_limiter=asyncio.Semaphore(4),
+        )
+
+    assert len(results) == 20
+    assert max_in_flight == 4
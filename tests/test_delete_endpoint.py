@@ -0,0 +1,53 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from funidata_utils.request_utils.client_manager import SisuClientManager
+from funidata_utils.sis_integration.async_deletes import soft_delete_from_sisu, DeleteMethodOverride
+from funidata_utils.sis_integration.resources import Attainments
+
+
+@pytest.mark.asyncio
+async def test_delete_endpoint_batches_are_sent_in_parallel_and_bisected(sisu_settings):
+    in_flight = 0
+    max_in_flight = 0
+    bodies = []
+
+    async def handler(request: httpx.Request):
+        nonlocal in_flight, max_in_flight
+        assert request.url.path == Attainments.delete.endpoint
+        body = json.loads(request.content)
+        bodies.append(body)
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.005)
+        in_flight -= 1
+        failing_ids = [_id for _id in body["ids"] if _id == "id-13"]
+        if failing_ids:
+            return httpx.Response(422, json={"failingIds": failing_ids})
+        return httpx.Response(200)
+
+    data = [{"id": f"id-{_id}"} for _id in range(40)] + [{"id": "id-0"}]
+    async with SisuClientManager(sisu_settings, async_transport=httpx.MockTransport(handler)) as client_manager:
+        responses = await soft_delete_from_sisu(
+            sisu_settings,
+            Attainments,
+            use_legacy_import=False,
+            data=data,
+            batch_size=10,
+            binary_search_max_depth=5,
+            max_parallel_requests=3,
+            method_override=DeleteMethodOverride.Delete,
+            client_manager=client_manager,
+        )
+
+    assert all(set(body) == {"ids"} for body in bodies)
+    assert max_in_flight == 3
+    # Four batches, and the failing id split apart from the rest of its batch
+    assert len(bodies) == 6
+    assert sorted(response.status_code for response in responses) == [200] * 4 + [422]
+    assert [json.loads(response.request.content)["ids"] for response in responses if response.status_code == 422] \
+        == [["id-13"]]
+    assert sum(len(json.loads(response.request.content)["ids"]) for response in responses) == 40
@@ -0,0 +1,26 @@
+import json
+
+from funidata_utils.request_utils.encoded_payload import EncodedPayload, flatten_view, is_grouped_view
+
+
+def test_encode_flat_payload():
+    payload = [{"id": 1, "name": "ä"}, {"id": 2}, {"id": 3}]
+    encoded, view = EncodedPayload.encode(payload)
+
+    assert view == range(3)
+    assert not is_grouped_view(view)
+    assert encoded.ids == [1, 2, 3]
+    assert json.loads(encoded.body(view)) == payload
+    assert json.loads(encoded.body(view[::2])) == [payload[0], payload[2]]
+    assert encoded.size(view) == len(encoded.body(view))
+    assert encoded.size([]) == len(encoded.body([]))
+
+
+def test_encode_grouped_payload():
+    payload = [[{"id": 1}, {"id": 2}], [{"id": 3}]]
+    encoded, view = EncodedPayload.encode(payload)
+
+    assert view == [range(0, 2), range(2, 3)]
+    assert is_grouped_view(view)
+    assert flatten_view(view) == [0, 1, 2]
+    assert json.loads(encoded.body(flatten_view(view[1:]))) == [{"id": 3}]
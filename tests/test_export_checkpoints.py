@@ -0,0 +1,124 @@
+import io
+import logging
+from typing import Callable, Generator
+
+import httpx
+import pytest
+
+from funidata_utils.request_utils.client_manager import SisuClientManager
+from funidata_utils.sis_integration.checkpoints import (
+    JsonFileCheckpointStore, SqliteCheckpointStore, get_checkpoint_key,
+)
+from funidata_utils.sis_integration.exports import export_from_sisu
+from funidata_utils.sis_integration.resources import Attainments
+
+
+@pytest.fixture
+def get_export_client_manager(sisu_settings) -> Generator[Callable[..., SisuClientManager], None, None]:
+    limit = Attainments.exports.default_export_limit
+    client_managers = []
+
+    def _get_export_client_manager(entity_count: int, fail_after: int | None = None) -> SisuClientManager:
+        def handler(request: httpx.Request):
+            since = int(request.url.params["since"])
+            if fail_after is not None and since >= fail_after:
+                return httpx.Response(503)
+
+            entities = [{"id": ordinal} for ordinal in range(since + 1, min(since + limit, entity_count) + 1)]
+            return httpx.Response(200, json={
+                "entities": entities,
+                "greatestOrdinal": entities[-1]["id"] if entities else since,
+            })
+
+        client_managers.append(SisuClientManager(sisu_settings, transport=httpx.MockTransport(handler)))
+        return client_managers[-1]
+
+    yield _get_export_client_manager
+    for client_manager in client_managers:
+        client_manager.close()
+
+
+@pytest.mark.parametrize("store_class", [JsonFileCheckpointStore, SqliteCheckpointStore])
+def test_failed_export_resumes_from_last_committed_page(
+    sisu_settings, get_export_client_manager, tmp_path, store_class,
+):
+    limit = Attainments.exports.default_export_limit
+    entity_count = limit * 3 + 10
+    store = store_class(tmp_path / "checkpoints")
+    key = get_checkpoint_key(sisu_settings.host, Attainments.exports.endpoint)
+
+    # A failed list export delivered nothing, so nothing is committed
+    with pytest.raises(Exception, match="503"):
+        export_from_sisu(
+            sisu_settings,
+            Attainments,
+            client_manager=get_export_client_manager(entity_count, fail_after=2 * limit),
+            retry_policy=None,
+            checkpoint_store=store,
+        )
+    assert store.load(key) is None
+
+    # The pages written to the file before the failure are committed
+    fp = io.StringIO()
+    with pytest.raises(Exception, match="503"):
+        export_from_sisu(
+            sisu_settings,
+            Attainments,
+            fp=fp,
+            client_manager=get_export_client_manager(entity_count, fail_after=2 * limit),
+            retry_policy=None,
+            checkpoint_store=store,
+        )
+    assert len(fp.getvalue().splitlines()) == 2 * limit
+    assert store.load(key) == 2 * limit
+
+    entities = export_from_sisu(
+        sisu_settings,
+        Attainments,
+        client_manager=get_export_client_manager(entity_count),
+        checkpoint_store=store,
+    )
+    assert [x["id"] for x in entities] == list(range(2 * limit + 1, entity_count + 1))
+    assert store.load(key) == entity_count
+
+    # Next run is incremental and finds nothing new
+    assert export_from_sisu(
+        sisu_settings,
+        Attainments,
+        client_manager=get_export_client_manager(entity_count),
+        checkpoint_store=store,
+    ) == []
+
+
+def test_explicit_since_ordinal_takes_precedence_over_the_checkpoint(
+    sisu_settings, get_export_client_manager, tmp_path, caplog,
+):
+    entity_count = Attainments.exports.default_export_limit + 10
+    store = JsonFileCheckpointStore(tmp_path / "checkpoints")
+    key = get_checkpoint_key(sisu_settings.host, Attainments.exports.endpoint)
+    store.save(key, entity_count - 5)
+
+    caplog.set_level(logging.INFO)
+    resumed = export_from_sisu(
+        sisu_settings,
+        Attainments,
+        client_manager=get_export_client_manager(entity_count),
+        checkpoint_store=store,
+    )
+    assert [x["id"] for x in resumed] == list(range(entity_count - 4, entity_count + 1))
+    assert "from the checkpoint ordinal" in caplog.text
+
+    # A full re-export
+    assert len(export_from_sisu(
+        sisu_settings,
+        Attainments,
+        since_ordinal=0,
+        client_manager=get_export_client_manager(entity_count),
+        checkpoint_store=store,
+    )) == entity_count
+    assert "from the given ordinal 0" in caplog.text
+
+
+def test_checkpoint_key_includes_params():
+    assert get_checkpoint_key("http://host", "/export") == "http://host/export"
+    assert get_checkpoint_key("http://host", "/export", {"b": 2, "a": 1}) == "http://host/export?a=1&b=2"
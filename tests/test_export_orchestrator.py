@@ -0,0 +1,63 @@
+import asyncio
+import io
+import json
+
+import httpx
+import pytest
+
+from funidata_utils.request_utils.client_manager import SisuClientManager
+from funidata_utils.sis_integration.export_orchestrator import export_resources_from_sisu
+from funidata_utils.sis_integration.resources import Attainments, StudyRights, Organisations
+
+
+ENTITY_COUNTS = {
+    Attainments.exports.endpoint: Attainments.exports.default_export_limit * 3,
+    StudyRights.exports.endpoint: 10,
+    Organisations.exports.endpoint: 0,
+}
+
+
+@pytest.mark.asyncio
+async def test_resources_are_exported_concurrently_to_own_sinks(sisu_settings):
+    in_flight = 0
+    max_in_flight = 0
+
+    async def handler(request: httpx.Request):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.005)
+        in_flight -= 1
+
+        since = int(request.url.params["since"])
+        limit = int(request.url.params["limit"])
+        entity_count = ENTITY_COUNTS[request.url.path]
+        entities = [{"id": ordinal} for ordinal in range(since + 1, min(since + limit, entity_count) + 1)]
+        return httpx.Response(200, json={"entities": entities, "greatestOrdinal": since + len(entities)})
+
+    attainments_fp = io.StringIO()
+    study_rights = []
+    organisations = []
+
+    async def _collect_study_rights(entities):
+        study_rights.extend(entities)
+
+    async with SisuClientManager(sisu_settings, async_transport=httpx.MockTransport(handler)) as manager:
+        stats = await export_resources_from_sisu(
+            sisu_settings,
+            [Attainments, StudyRights, Organisations],
+            sinks={
+                Attainments: attainments_fp, StudyRights: _collect_study_rights, Organisations: organisations.extend,
+            },
+            max_parallel_requests=2,
+            client_manager=manager,
+        )
+
+    assert len(attainments_fp.getvalue().splitlines()) == ENTITY_COUNTS[Attainments.exports.endpoint]
+    assert json.loads(attainments_fp.getvalue().splitlines()[0]) == {"id": 1}
+    assert len(study_rights) == 10
+    assert organisations == []
+    assert max_in_flight == 2
+    assert stats["attainments"].entities == ENTITY_COUNTS[Attainments.exports.endpoint]
+    assert stats["attainments"].pages == 4
+    assert stats["study_rights"].entities_per_second > 0
@@ -0,0 +1,70 @@
+import json
+from datetime import timedelta
+
+import httpx
+import pytest
+
+from funidata_utils.request_utils.async_httpx_requests import iter_post_with_binary_err_search_httpx
+from funidata_utils.request_utils.import_report import ImportReport
+from funidata_utils.sis_integration.import_ledger import ImportLedger
+from funidata_utils.sis_integration.resources import Attainments
+from tests.helpers import invalid_handler
+
+
+async def _import(ledger: ImportLedger, data: list[dict], sent: list, report: ImportReport | None = None):
+    def handler(request: httpx.Request):
+        sent.extend(_x["id"] for _x in json.loads(request.content))
+        return invalid_handler(request)
+
+    session = ledger.session(f"http://localhost{Attainments.imports.endpoint}", report=report)
+    responses = []
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        async for results in iter_post_with_binary_err_search_httpx(
+            path=f"http://localhost{Attainments.imports.endpoint}",
+            payload=session.filter_payload(data),
+            batch_size=5,
+            binary_search_max_depth=4,
+            client=client,
+            report=session,
+            allow_empty_payload=True,
+        ):
+            responses += results
+
+    return responses
+
+
+@pytest.mark.asyncio
+async def test_only_changed_or_rejected_entities_are_sent_again(tmp_path):
+    data = [{"id": f"id-{_id}", "invalid": _id == 3} for _id in range(10)]
+    with ImportLedger(tmp_path / "ledger.db") as ledger:
+        sent = []
+        responses = await _import(ledger, data, sent)
+        # Without a report the responses are still returned
+        assert responses
+        assert ledger.count() == 9
+
+        sent = []
+        report = ImportReport()
+        data[5]["value"] = 5
+        assert await _import(ledger, data, sent, report) == []
+        assert sorted(set(sent)) == ["id-3", "id-5"]
+        assert report.rejected_ids() == ["id-3"]
+
+        assert ledger.invalidate_resource(Attainments) == 9
+        sent = []
+        await _import(ledger, data, sent)
+        assert len(set(sent)) == 10
+
+
+@pytest.mark.asyncio
+async def test_invalidate_and_compact(tmp_path):
+    with ImportLedger(tmp_path / "ledger.db") as ledger:
+        ledger.record("http://localhost/a", {"id-1": "x", "id-2": "y"})
+        ledger.record("http://localhost/b", {"id-1": "z"})
+
+        assert ledger.get_content_hashes("http://localhost/a", ["id-1", "id-3"]) == {"id-1": "x"}
+        assert ledger.invalidate("http://localhost/a", ["id-1"]) == 1
+        assert ledger.compact(max_age=timedelta(days=1)) == 0
+        assert ledger.compact(max_age=timedelta(0)) == 2
+        assert ledger.count() == 0
+
@@ -0,0 +1,59 @@
+import httpx
+import pytest
+
+from funidata_utils.request_utils.async_httpx_requests import send_post_with_binary_err_search_httpx
+from funidata_utils.request_utils.import_report import ImportReport
+from tests.helpers import mock_client
+
+
+@pytest.mark.asyncio
+async def test_report_records_final_status_per_entity(mock_client):
+    data = [{"id": f"id-{_id}", "invalid": _id in (3, 17)} for _id in range(40)]
+    report = ImportReport()
+
+    responses = await send_post_with_binary_err_search_httpx(
+        path="http://localhost",
+        payload=data,
+        batch_size=10,
+        binary_search_max_depth=10,
+        client=mock_client,
+        report=report,
+    )
+
+    assert responses == []
+    assert len(report) == 40
+    assert report.counts_by_status_code == {200: 38, 422: 2}
+    assert sorted(report.rejected_ids()) == ["id-17", "id-3"]
+    assert report.failing_ids() == ["id-3", "id-17"]
+    assert report.status("id-4") == 200
+    assert report.error_code("id-4") is None
+
+
+def test_report_keeps_latest_outcome_and_error_codes():
+    report = ImportReport()
+    request = httpx.Request("POST", "http://localhost")
+
+    report.add_response(httpx.Response(500, json={"reason": "HV000029"}, request=request), ["a", "b"])
+    report.add_response(httpx.Response(200, json={}, request=request), ["b"])
+
+    assert report.status("a") == 500
+    assert report.error_code("a") == "HV000029"
+    assert report.status("b") == 200
+    assert report.counts_by_status_code == {500: 1, 200: 1}
+    assert report.counts_by_error_code == {"HV000029": 1}
+    assert report.final_responses == 2
+    assert list(report.items()) == [("a", 500, "HV000029"), ("b", 200, None)]
+
+
+def test_entities_without_an_id_keep_outcomes_of_their_own():
+    report = ImportReport()
+    request = httpx.Request("POST", "http://localhost")
+
+    report.add_response(httpx.Response(200, json={}, request=request), [None, "a", None])
+    report.add_response(httpx.Response(422, json={}, request=request), [None])
+
+    assert len(report) == 4
+    assert report.counts_by_status_code == {200: 3, 422: 1}
+    assert (report.accepted_count, report.rejected_count) == (3, 1)
+    assert report.rejected_ids() == [None]
+    assert None not in report
@@ -0,0 +1,117 @@
+import asyncio
+import io
+import json
+
+import httpx
+import pytest
+
+from funidata_utils.request_utils.client_manager import SisuClientManager
+from funidata_utils.sis_integration.import_scheduler import (
+    import_resources_to_sisu, get_import_order, DEFAULT_IMPORT_DEPENDENCIES,
+)
+from funidata_utils.sis_integration.resources import (
+    Buildings, GradeScales, OriPersons, StudyRights, TermRegistrations, Educations, Organisations,
+)
+from tests.helpers import invalid_handler
+
+
+def test_import_order_follows_the_dependencies():
+    resources = [TermRegistrations, StudyRights, Organisations, OriPersons, Buildings]
+    order = get_import_order(resources, DEFAULT_IMPORT_DEPENDENCIES)
+
+    assert sorted(order, key=repr) == sorted(resources, key=repr)
+    assert order.index(OriPersons) < order.index(StudyRights) < order.index(TermRegistrations)
+    assert order.index(Organisations) < order.index(StudyRights)
+
+    with pytest.raises(Exception, match="Circular"):
+        get_import_order([Buildings, GradeScales], {Buildings: [GradeScales], GradeScales: [Buildings]})
+
+
+@pytest.mark.asyncio
+async def test_imports_start_when_prerequisites_finish_and_share_the_budget(sisu_settings):
+    resources = [Buildings, GradeScales, OriPersons, StudyRights, TermRegistrations, Educations]
+    endpoints = {resource.imports.endpoint: repr(resource) for resource in resources}
+    events = []
+    in_flight = 0
+    max_in_flight = 0
+
+    async def handler(request: httpx.Request):
+        nonlocal in_flight, max_in_flight
+        resource = endpoints[request.url.path]
+        events.append(("start", resource))
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        events.append(("end", resource))
+        return invalid_handler(request)
+
+    def entities(prefix: str, count: int, invalid: int | None = None):
+        return [{"id": f"{prefix}-{_id}", "invalid": _id == invalid} for _id in range(count)]
+
+    persons_fp = io.StringIO("".join(json.dumps(entity) + "\n" for entity in entities("person", 6)))
+    async with SisuClientManager(sisu_settings, async_transport=httpx.MockTransport(handler)) as client_manager:
+        stats = await import_resources_to_sisu(
+            sisu_settings,
+            payloads={
+                TermRegistrations: entities("term-registration", 4),
+                StudyRights: entities("study-right", 4, invalid=2),
+                OriPersons: persons_fp,
+                Buildings: entities("building", 6),
+                GradeScales: entities("grade-scale", 6),
+                Educations: [],
+            },
+            max_parallel_requests=3,
+            import_options={
+                resource: {"batch_size": 6 if resource in (Buildings, GradeScales) else 2, "binary_search_max_depth": 2}
+                for resource in resources
+            },
+            client_manager=client_manager,
+        )
+
+    def first(kind: str, resource: str) -> int:
+        return events.index((kind, resource))
+
+    def last(kind: str, resource: str) -> int:
+        return len(events) - 1 - events[::-1].index((kind, resource))
+
+    assert last("end", "ori_persons") < first("start", "study_rights")
+    assert last("end", "study_rights") < first("start", "term_registrations")
+    # Independent imports overlap
+    assert first("start", "grade_scales") < first("end", "buildings")
+    assert max_in_flight == 3
+    assert stats["study_rights"].accepted == 3
+    assert stats["study_rights"].rejected == 1
+    assert stats["term_registrations"].accepted == 4
+    assert stats["educations"].final_responses == 0
+
+
+@pytest.mark.asyncio
+async def test_dependents_of_a_failed_import_are_skipped(sisu_settings):
+    def handler(request: httpx.Request):
+        if request.url.path == OriPersons.imports.endpoint:
+            raise httpx.ConnectError("Connection refused", request=request)
+        return httpx.Response(200)
+
+    async with SisuClientManager(sisu_settings, async_transport=httpx.MockTransport(handler)) as client_manager:
+        stats = await import_resources_to_sisu(
+            sisu_settings,
+            payloads={StudyRights: [{"id": "a"}], OriPersons: [{"id": "b"}], Buildings: [{"id": "c"}]},
+            client_manager=client_manager,
+            retry_policy=None,
+            raise_on_error=False,
+        )
+
+    assert stats["ori_persons"].error
+    assert stats["study_rights"].skipped
+    assert stats["buildings"].accepted == 1
+
+
+@pytest.mark.asyncio
+async def test_import_options_cannot_set_what_the_scheduler_sets(sisu_settings):
+    with pytest.raises(Exception, match="cannot set data, report"):
+        await import_resources_to_sisu(
+            sisu_settings,
+            payloads={Buildings: [{"id": "a"}]},
+            import_options={Buildings: {"batch_size": 10, "report": None, "data": []}},
+        )
@@ -0,0 +1,60 @@
+import gzip
+import json
+
+import pytest
+
+from funidata_utils.json_tools.jsonl_writer import JsonlWriter, zstandard
+
+
+def _read_lines(path, compression=None):
+    match compression:
+        case 'gzip':
+            with gzip.open(path, 'rt', encoding='utf-8') as fp:
+                return [json.loads(line) for line in fp]
+        case 'zstd':
+            with open(path, 'rb') as fp:
+                data = zstandard.ZstdDecompressor().stream_reader(fp).read()
+                return [json.loads(line) for line in data.decode('utf-8').splitlines()]
+        case _:
+            with open(path, encoding='utf-8') as fp:
+                return [json.loads(line) for line in fp]
+
+
+@pytest.mark.parametrize("compression", [None, "gzip"])
+def test_writer_writes_json_lines(tmp_path, compression):
+    entities = [{"id": f"id-{_id}", "name": "Äänekoski"} for _id in range(100)]
+
+    with JsonlWriter(tmp_path / "attainments.jsonl", compression=compression) as writer:
+        writer.write_entities(entities[:60])
+        writer.write_entities(entities[60:])
+
+    assert writer.paths == [tmp_path / "attainments.jsonl"]
+    assert writer.entities_written == 100
+    assert _read_lines(writer.paths[0], compression) == entities
+
+
+@pytest.mark.skipif(zstandard is None, reason="zstandard is not installed")
+def test_writer_zstd(tmp_path):
+    with JsonlWriter(tmp_path / "attainments.jsonl.zst", compression="zstd") as writer:
+        writer.write_entities([{"id": _id} for _id in range(10)])
+
+    assert _read_lines(writer.paths[0], "zstd") == [{"id": _id} for _id in range(10)]
+
+
+def test_writer_rotates_by_entity_count_and_size(tmp_path):
+    entities = [{"id": _id} for _id in range(25)]
+
+    with JsonlWriter(tmp_path / "attainments.jsonl.gz", compression="gzip", max_entities_per_file=10) as writer:
+        writer.write_entities(entities[:7])
+        writer.write_entities(entities[7:])
+
+    assert [path.name for path in writer.paths] == [
+        "attainments.00000.jsonl.gz", "attainments.00001.jsonl.gz", "attainments.00002.jsonl.gz",
+    ]
+    assert [len(_read_lines(path, "gzip")) for path in writer.paths] == [10, 10, 5]
+
+    with JsonlWriter(tmp_path / "sized.jsonl", max_bytes_per_file=50) as writer:
+        writer.write_entities(entities)
+
+    assert all(path.stat().st_size <= 50 for path in writer.paths)
+    assert [x for path in writer.paths for x in _read_lines(path)] == entities
@@ -0,0 +1,75 @@
+import asyncio
+
+import httpx
+import pytest
+
+from funidata_utils.request_utils.async_httpx_requests import (
+    _binary_search_enabled_post_httpx, send_post_with_binary_err_search_httpx,
+)
+from tests.helpers import mock_client, invalid_handler, get_entity_counts_by_status_code
+
+
+def _test_data():
+    return [
+        [{"id": 1, "person": 1, "exception": True}, {"id": 2, "person": 1}],
+        [{"id": 3, "person": 2}, {"id": 4, "person": 2, "exception": True}],
+        [{"id": 5, "person": 3}, {"id": 6, "person": 3}],
+        [{"id": 7, "person": 4, "exception": True}, {"id": 8, "person": 4}],
+    ]
+
+
+@pytest.mark.asyncio
+async def test_parallel_sub_search_finds_same_results_as_sequential(mock_client):
+    _sequential_state = {'max_seen_depth': 0}
+    sequential_results = await _binary_search_enabled_post_httpx(
+        path="http://localhost",
+        payload=_test_data(),
+        client=mock_client,
+        binary_err_search_sublists=True,
+        _state=_sequential_state,
+    )
+
+    _parallel_state = {'max_seen_depth': 0}
+    parallel_results = await _binary_search_enabled_post_httpx(
+        path="http://localhost",
+        payload=_test_data(),
+        client=mock_client,
+        binary_err_search_sublists=True,
+        parallel_sub_search=True,
+        _state=_parallel_state,
+    )
+
+    assert _parallel_state['sent_requests'] == _sequential_state['sent_requests']
+    assert _parallel_state['max_seen_depth'] == _sequential_state['max_seen_depth']
+    assert get_entity_counts_by_status_code(parallel_results) == get_entity_counts_by_status_code(sequential_results)
+    assert get_entity_counts_by_status_code(parallel_results)[500] == 3
+    assert 'wall_clock_saved_seconds' in _parallel_state
+
+
+@pytest.mark.asyncio
+async def test_parallel_sub_search_respects_max_parallel_requests():
+    in_flight = 0
+    max_seen = 0
+
+    async def handler(request: httpx.Request):
+        nonlocal in_flight, max_seen
+        in_flight += 1
+        max_seen = max(max_seen, in_flight)
+        await asyncio.sleep(0.001)
+        in_flight -= 1
+        return invalid_handler(request)
+
+    payload = [{"id": _id, "exception": _id % 5 == 0} for _id in range(40)]
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        results = await send_post_with_binary_err_search_httpx(
+            path="http://localhost",
+            payload=payload,
+            batch_size=20,
+            client=client,
+            max_parallel_requests=2,
+            parallel_sub_search=True,
+        )
+
+    assert max_seen == 2
+    assert get_entity_counts_by_status_code(results)[500] == 8
+    assert get_entity_counts_by_status_code(results)[200] == 32
@@ -0,0 +1,37 @@
+import pytest
+
+from funidata_utils.json_tools.patch_diff import aiter_patch_payloads, get_patch_payload, iter_patch_payloads
+
+
+def test_patch_payload_has_only_the_changed_top_level_fields():
+    current = {"id": "a", "name": {"fi": "x", "en": "y"}, "state": "ACTIVE", "code": None, "metadata": {"revision": 3}}
+    desired = {"id": "a", "name": {"fi": "x", "en": "z"}, "state": "ACTIVE", "metadata": {"revision": 1}}
+
+    assert get_patch_payload(current, desired) == {"id": "a", "name": {"fi": "x", "en": "z"}}
+    assert get_patch_payload(current, current | {"code": None}) is None
+    assert get_patch_payload(current, desired | {"state": None}) == {"id": "a", "name": desired["name"], "state": None}
+    assert get_patch_payload(current, {"id": "a"}, clear_missing_fields=True) == {
+        "id": "a", "name": None, "state": None,
+    }
+    assert get_patch_payload(None, desired) == desired
+
+
+@pytest.mark.asyncio
+async def test_unchanged_entities_are_dropped():
+    current = {f"id-{_id}": {"id": f"id-{_id}", "value": _id} for _id in range(10)}
+    lookups = []
+
+    def known_entities(ids):
+        lookups.append(len(ids))
+        return {_id: current[_id] for _id in ids if _id in current}
+
+    desired = [{"id": f"id-{_id}", "value": _id if _id != 4 else 40} for _id in range(12)]
+    expected = [{"id": "id-4", "value": 40}, {"id": "id-10", "value": 10}, {"id": "id-11", "value": 11}]
+    assert list(iter_patch_payloads(desired, known_entities, lookup_batch_size=5)) == expected
+    assert lookups == [5, 5, 2]
+
+    async def _desired():
+        for entity in desired:
+            yield entity
+
+    assert [patch async for patch in aiter_patch_payloads(_desired(), current)] == expected
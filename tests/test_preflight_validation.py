@@ -0,0 +1,168 @@
+import io
+import json
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import httpx
+import pytest
+
+from funidata_utils.request_utils.client_manager import SisuClientManager
+from funidata_utils.request_utils.import_report import ImportReport
+from funidata_utils.sis_integration import import_to_sisu, PreflightValidator
+from funidata_utils.sis_integration import preflight_validation
+from funidata_utils.sis_integration.preflight_validation import bulk_validate, bulk_validate_async
+from funidata_utils.sis_integration.resources import Attainments, Buildings, OsuvaPlans
+from funidata_utils.sis_integration.schema_registry import get_type_adapter
+from tests.helpers import invalid_handler
+
+
+def _building(_id: int, valid: bool = True) -> dict:
+    return {
+        "id": f"otm-building-{_id}" if valid else f"building {_id}",
+        "documentState": "ACTIVE",
+        "universityOrgIds": ["hy-university-root-id"],
+        "name": {"fi": f"Rakennus {_id}"},
+        "addresss": {"countryUrn": "urn:code:country:246", "isUserEditable": False},
+    }
+
+
+def test_attainments_are_validated_by_type():
+    def errors(entity: dict):
+        try:
+            get_type_adapter(Attainments).validate_python(entity)
+        except Exception as e:
+            return e.errors()
+
+    assert errors({"type": "CourseUnitAttainment"})[0]["loc"][0] == "CourseUnitAttainment"
+    # Types without a model of their own are validated as plain Attainments
+    assert errors({"type": "ModuleAttainment"})[0]["loc"][0] == "Attainment"
+
+    with pytest.raises(Exception):
+        PreflightValidator(OsuvaPlans)
+
+
+@pytest.mark.asyncio
+async def test_only_valid_entities_are_sent(sisu_settings):
+    sent_ids = []
+
+    def handler(request: httpx.Request):
+        sent_ids.extend(entity["id"] for entity in json.loads(request.content))
+        return invalid_handler(request)
+
+    data = [_building(_id, valid=_id not in (3, 7)) for _id in range(10)]
+    rejects = []
+    validator = PreflightValidator(Buildings, reject_sink=rejects.extend)
+    async with SisuClientManager(sisu_settings, async_transport=httpx.MockTransport(handler)) as manager:
+        responses = await import_to_sisu(
+            sisu_settings,
+            Buildings,
+            use_legacy_import=False,
+            data=data,
+            binary_search_max_depth=10,
+            client_manager=manager,
+            validator=validator,
+        )
+
+        assert len(responses) == 1
+        assert sent_ids == [f"otm-building-{_id}" for _id in range(10) if _id not in (3, 7)]
+        assert [reject["id"] for reject in rejects] == ["building 3", "building 7"]
+        assert rejects[0]["errors"][0]["loc"] == ("id",)
+        assert rejects[0]["entity"] == data[3]
+        assert (validator.valid_count, validator.rejected_count) == (8, 2)
+
+        sent_ids.clear()
+        reject_fp = io.StringIO()
+        report = ImportReport()
+        await import_to_sisu(
+            sisu_settings,
+            Buildings,
+            use_legacy_import=False,
+            fp=io.StringIO("".join(json.dumps(_building(_id, valid=_id > 0)) + "\n" for _id in range(4))),
+            client_manager=manager,
+            validator=PreflightValidator(Buildings, reject_sink=reject_fp),
+            report=report,
+        )
+
+    assert sent_ids == ["otm-building-1", "otm-building-2", "otm-building-3"]
+    assert report.rejected_ids() == ["building 0"]
+    assert [json.loads(line)["id"] for line in reject_fp.getvalue().splitlines()] == ["building 0"]
+
+
+@pytest.mark.asyncio
+async def test_batches_are_not_validated_on_the_event_loop(monkeypatch):
+    validating_threads = []
+    _get_page_errors = preflight_validation.get_page_errors
+
+    def get_page_errors(resource, entities):
+        validating_threads.append(threading.current_thread())
+        return _get_page_errors(resource, entities)
+
+    monkeypatch.setattr(preflight_validation, "get_page_errors", get_page_errors)
+
+    batches = [[_building(_id, valid=_id != 1) for _id in range(3)]]
+    valid = [_batch async for _batch in PreflightValidator(Buildings).afilter_batches(batches)]
+
+    assert [[entity["id"] for entity in _batch] for _batch in valid] == [["otm-building-0", "otm-building-2"]]
+    assert validating_threads and threading.main_thread() not in validating_threads
+
+
+def test_bulk_validation_keeps_the_input_order():
+    data = [_building(_id, valid=_id % 4 != 1) for _id in range(10)]
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        errors = bulk_validate(Buildings, data, executor=executor, shard_size=3)
+
+    assert [bool(_errors) for _errors in errors] == [_id % 4 == 1 for _id in range(10)]
+    assert errors[5][0]["loc"] == ("id",)
+
+
+@pytest.mark.asyncio
+async def test_bulk_validation_does_not_block_the_loop():
+    data = [_building(_id, valid=_id != 2) for _id in range(5)]
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        errors = await bulk_validate_async(Buildings, data, executor=executor, shard_size=2)
+
+    assert [bool(_errors) for _errors in errors] == [False, False, True, False, False]
+
+
+@pytest.mark.asyncio
+async def test_next_batch_is_validated_while_one_is_sent(sisu_settings):
+    events = []
+
+    class RecordingExecutor(ThreadPoolExecutor):
+        def submit(self, fn, resource, shard, *args, **kwargs):
+            events.append(("validate", json.loads(shard)[0]["id"]))
+            return super().submit(fn, resource, shard, *args, **kwargs)
+
+    def handler(request: httpx.Request):
+        events.append(("send", json.loads(request.content)[0]["id"]))
+        return invalid_handler(request)
+
+    data = [_building(_id, valid=_id != 4) | {"group": _id // 2} for _id in range(8)]
+    rejects = []
+    report = ImportReport()
+    with RecordingExecutor(max_workers=1) as executor:
+        async with SisuClientManager(sisu_settings, async_transport=httpx.MockTransport(handler)) as manager:
+            await import_to_sisu(
+                sisu_settings,
+                Buildings,
+                use_legacy_import=False,
+                data=data,
+                batch_size=4,
+                group_by_key="group",
+                client_manager=manager,
+                report=report,
+                validator=PreflightValidator(Buildings, reject_sink=rejects.extend, executor=executor),
+            )
+
+    assert events == [
+        ("validate", "otm-building-0"),
+        ("validate", "building 4"),
+        ("send", "otm-building-0"),
+        ("send", "otm-building-6"),
+    ]
+    # The group of the invalid entity is not sent at all
+    assert [reject["id"] for reject in rejects] == ["building 4", "otm-building-5"]
+    assert report.rejected_ids() == ["building 4", "otm-building-5"]
+    assert report.failing_ids() == ["building 4"]
+    assert report.error_code("otm-building-5") == "PreflightValidation"
+    assert (report.accepted_count, report.rejected_count) == (6, 2)
@@ -0,0 +1,87 @@
+import httpx
+import pytest
+
+from funidata_utils.request_utils.async_httpx_requests import send_post_with_binary_err_search_httpx
+from funidata_utils.request_utils.retries import RetryPolicy, parse_retry_after
+from tests.helpers import invalid_handler, get_entity_counts_by_status_code
+
+
+NO_WAIT_RETRY_POLICY = RetryPolicy(max_attempts=3, backoff_base=0, respect_retry_after=False)
+
+
+@pytest.mark.asyncio
+async def test_transient_failures_are_retried_before_binary_search():
+    data = [{"id": _id, "invalid": _id == 3} for _id in range(10)]
+    sent_requests = 0
+
+    def handler(request: httpx.Request):
+        nonlocal sent_requests
+        sent_requests += 1
+        if sent_requests <= 2:
+            return httpx.Response(503, headers={"Retry-After": "0"})
+        return invalid_handler(request)
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        responses = await send_post_with_binary_err_search_httpx(
+            path="http://localhost",
+            payload=data,
+            binary_search_max_depth=10,
+            client=client,
+            retry_policy=NO_WAIT_RETRY_POLICY,
+        )
+
+    assert get_entity_counts_by_status_code(responses) == {200: 9, 422: 1}
+
+
+@pytest.mark.asyncio
+async def test_exhausted_retries_do_not_split_the_batch():
+    sent_requests = 0
+
+    def handler(request: httpx.Request):
+        nonlocal sent_requests
+        sent_requests += 1
+        return httpx.Response(502)
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        responses = await send_post_with_binary_err_search_httpx(
+            path="http://localhost",
+            payload=[{"id": _id} for _id in range(10)],
+            binary_search_max_depth=10,
+            client=client,
+            retry_policy=NO_WAIT_RETRY_POLICY,
+        )
+
+    assert [response.status_code for response in responses] == [502]
+    assert sent_requests == 3
+
+
+@pytest.mark.asyncio
+async def test_timeouts_are_retried():
+    sent_requests = 0
+
+    def handler(request: httpx.Request):
+        nonlocal sent_requests
+        sent_requests += 1
+        if sent_requests == 1:
+            raise httpx.ReadTimeout("Timed out", request=request)
+        return invalid_handler(request)
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        responses = await send_post_with_binary_err_search_httpx(
+            path="http://localhost",
+            payload=[{"id": _id} for _id in range(10)],
+            client=client,
+            retry_policy=NO_WAIT_RETRY_POLICY,
+        )
+
+    assert get_entity_counts_by_status_code(responses) == {200: 10}
+
+
+def test_retry_delays():
+    policy = RetryPolicy(backoff_base=1, backoff_max=5, jitter=False, max_retry_after=60)
+
+    assert [policy.get_delay(attempt) for attempt in range(1, 6)] == [1, 2, 4, 5, 5]
+    assert policy.get_delay(1, httpx.Response(429, headers={"Retry-After": "12"})) == 12
+    assert policy.get_delay(1, httpx.Response(429, headers={"Retry-After": "3600"})) == 60
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0
+    assert parse_retry_after("soon") is None
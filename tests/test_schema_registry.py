@@ -0,0 +1,47 @@
+import pytest
+from pydantic import BaseModel, ValidationError
+
+from funidata_utils.schemas.sisu import Building
+from funidata_utils.sis_integration.resources import Buildings, Modules, OsuvaPlans
+from funidata_utils.sis_integration.schema_registry import (
+    get_list_adapter, validate_page, dump_page, dump_page_json, register_resource_model,
+)
+
+
+def test_list_adapters_are_built_once_and_validate_whole_pages():
+    assert get_list_adapter(Modules) is get_list_adapter(Modules)
+    with pytest.raises(Exception, match="No schema"):
+        get_list_adapter(OsuvaPlans)
+
+    buildings = [
+        {
+            "id": f"otm-building-{_id}",
+            "documentState": "ACTIVE",
+            "universityOrgIds": ["hy-university-root-id"],
+            "name": {"fi": f"Rakennus {_id}"},
+            "addresss": {"countryUrn": "urn:code:country:246", "isUserEditable": False},
+        }
+        for _id in range(3)
+    ]
+    models = validate_page(Buildings, buildings)
+    assert [type(model) for model in models] == [Building] * 3
+    assert validate_page(Buildings, dump_page_json(Buildings, models)) == models
+    assert dump_page(Buildings, models, exclude_none=True)[0]["name"] == {"fi": "Rakennus 0"}
+
+    # Unions are discriminated by type
+    with pytest.raises(ValidationError) as e:
+        validate_page(Modules, [{"type": "GroupingModule"}, {"type": "DegreeProgramme"}])
+    assert {error["loc"][:2] for error in e.value.errors()} == {(0, "GroupingModule"), (1, "DegreeProgramme")}
+
+
+def test_registered_models_replace_the_cached_adapters():
+    class StrictBuilding(BaseModel):
+        id: str
+
+    adapter = get_list_adapter(Buildings)
+    register_resource_model(Buildings, StrictBuilding)
+    try:
+        assert get_list_adapter(Buildings) is not adapter
+        assert validate_page(Buildings, b'[{"id": "a"}]') == [StrictBuilding(id="a")]
+    finally:
+        register_resource_model(Buildings, Building)
@@ -0,0 +1,52 @@
+import httpx
+
+from funidata_utils.request_utils.client_manager import SisuClientManager
+from funidata_utils.sis_integration.resources import Attainments
+from funidata_utils.sis_integration.sqlite_mirror import SqliteExportMirror
+
+
+def _attainment(_id: int, ordinal: int, person: int, grade: int = 1) -> dict:
+    return {
+        "id": f"att-{_id}",
+        "personId": f"person-{person}",
+        "gradeId": grade,
+        "metadata": {"revision": ordinal, "modificationOrdinal": ordinal},
+    }
+
+
+def get_client_manager(sisu_settings, entities: list[dict], requested_ordinals: list[int]) -> SisuClientManager:
+    def handler(request: httpx.Request):
+        since = int(request.url.params["since"])
+        requested_ordinals.append(since)
+        page = [x for x in entities if x["metadata"]["modificationOrdinal"] > since]
+        greatest_ordinal = max([x["metadata"]["modificationOrdinal"] for x in page], default=since)
+        return httpx.Response(200, json={"entities": page, "greatestOrdinal": greatest_ordinal})
+
+    return SisuClientManager(sisu_settings, transport=httpx.MockTransport(handler))
+
+
+def test_mirror_syncs_deltas_and_keeps_newest_revision(sisu_settings, tmp_path):
+    entities = [_attainment(_id, ordinal=_id, person=_id % 3) for _id in range(1, 11)]
+    requested_ordinals = []
+
+    with (
+        SqliteExportMirror(tmp_path / "sisu.db") as mirror,
+        get_client_manager(sisu_settings, entities, requested_ordinals) as client_manager,
+    ):
+        mirror.create_index(Attainments, "personId")
+        assert mirror.sync(sisu_settings, Attainments, client_manager=client_manager) == 10
+
+        # The mock serves the entities as they are at the time of the request
+        entities.append(_attainment(4, ordinal=11, person=0, grade=5))
+        assert mirror.sync(sisu_settings, Attainments, client_manager=client_manager) == 1
+        assert requested_ordinals == [0, 11 - 1]
+
+        # Older revisions never replace newer ones
+        assert mirror.upsert(Attainments, [_attainment(4, ordinal=3, person=1)]) == 0
+
+        assert mirror.count(Attainments) == 10
+        assert mirror.get(Attainments, "att-4")["gradeId"] == 5
+        assert mirror.get(Attainments, "missing") is None
+        assert sorted(x["id"] for x in mirror.find(Attainments, "personId", "person-0")) == [
+            "att-3", "att-4", "att-6", "att-9",
+        ]
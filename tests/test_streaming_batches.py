@@ -0,0 +1,146 @@
+import io
+import json
+import random
+
+import httpx
+import pytest
+
+from funidata_utils.json_tools.jsonl_utils import iter_jsonl, group_jsonl_by_key_on_disk
+from funidata_utils.request_utils.async_httpx_requests import (
+    _iter_batches_grouped_by_key, _collect_suitable_batches_grouped_by_key, send_batches_with_binary_err_search_httpx,
+    send_post_with_binary_err_search_httpx,
+)
+from funidata_utils.request_utils.client_manager import SisuClientManager
+from funidata_utils.request_utils.import_report import ImportReport
+from funidata_utils.sis_integration import import_to_sisu
+from funidata_utils.sis_integration.resources import Buildings
+from funidata_utils.utils import group_by, batch_iterable
+from tests.helpers import invalid_handler, get_entity_counts_by_status_code
+
+
+def test_lazy_grouped_batches_match_collected_batches():
+    data = [{"id": _id, "person": _id // 3} for _id in range(50)]
+    items_by_key = group_by(data, lambda x: x["person"])
+
+    assert list(_iter_batches_grouped_by_key(items_by_key.values(), batch_size_trigger=7)) == \
+        _collect_suitable_batches_grouped_by_key(items_by_key, batch_size_trigger=7)
+
+
+def test_group_jsonl_by_key_on_disk():
+    data = [{"id": _id, "person": _id % 7} for _id in range(100)]
+    random.shuffle(data)
+    fp = io.StringIO("\n".join(json.dumps(x) for x in data) + "\n")
+
+    groups = list(group_jsonl_by_key_on_disk(fp, "person", bucket_count=3))
+
+    assert len(groups) == 7
+    assert all(len({x["person"] for x in group}) == 1 for group in groups)
+    assert sorted(x["id"] for group in groups for x in group) == list(range(100))
+
+
+@pytest.mark.asyncio
+async def test_send_batches_pulls_batches_lazily():
+    pulled = 0
+    max_pending = 0
+    finished = 0
+
+    def _batches():
+        nonlocal pulled, max_pending
+        fp = io.StringIO("".join(json.dumps({"id": _id}) + "\n" for _id in range(100)))
+        for _batch in batch_iterable(iter_jsonl(fp), 10):
+            pulled += 1
+            max_pending = max(max_pending, pulled - finished)
+            yield _batch
+
+    def handler(request: httpx.Request):
+        nonlocal finished
+        finished += 1
+        return invalid_handler(request)
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        results = await send_batches_with_binary_err_search_httpx(
+            path="http://localhost",
+            batches=_batches(),
+            client=client,
+            max_parallel_requests=2,
+            max_pending_batches=3,
+        )
+
+    assert pulled == 10
+    assert max_pending <= 3
+    assert get_entity_counts_by_status_code(results)[200] == 100
+
+
+@pytest.mark.asyncio
+async def test_send_post_accepts_grouped_async_iterable():
+    sent_batches = []
+
+    async def _entities():
+        for _id in range(30):
+            yield {"id": _id, "person": _id // 4, "invalid": _id == 9}
+
+    def handler(request: httpx.Request):
+        sent_batches.append([x["person"] for x in json.loads(request.content)])
+        return invalid_handler(request)
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        results = await send_post_with_binary_err_search_httpx(
+            path="http://localhost",
+            payload=_entities(),
+            group_by_key="person",
+            batch_size=10,
+            binary_search_max_depth=None,
+            binary_err_search_sublists=True,
+            client=client,
+        )
+
+    # Groups of 4 are never split between the top level batches
+    assert [len(x) for x in sent_batches[:1]] == [12]
+    assert get_entity_counts_by_status_code(results)[422] == 1
+    assert get_entity_counts_by_status_code(results)[200] == 29
+
+
+@pytest.mark.asyncio
+async def test_streamed_imports_are_split_by_size_but_not_balanced(sisu_settings):
+    sent_bodies = []
+
+    def handler(request: httpx.Request):
+        sent_bodies.append(request.content)
+        return invalid_handler(request)
+
+    settings = sisu_settings
+    lines = "".join(json.dumps({"id": _id, "data": "x" * 20}) + "\n" for _id in range(30))
+    async with SisuClientManager(settings, async_transport=httpx.MockTransport(handler)) as manager:
+        await import_to_sisu(
+            settings, Buildings, use_legacy_import=False, fp=io.StringIO(lines), batch_size=30,
+            max_batch_bytes=200, client_manager=manager, report=ImportReport(),
+        )
+        assert len(sent_bodies) > 1
+        assert all(len(body) <= 200 for body in sent_bodies)
+
+        with pytest.raises(Exception, match="needs all the groups"):
+            await import_to_sisu(
+                settings, Buildings, use_legacy_import=False, fp=io.StringIO(lines), group_by_key="id",
+                group_packing="balanced", client_manager=manager, report=ImportReport(),
+            )
+        with pytest.raises(Exception, match="needs all the groups"):
+            await import_to_sisu(
+                settings, Buildings, use_legacy_import=False, data=iter([{"id": 1}]), group_by_key="id",
+                group_packing="balanced", client_manager=manager,
+            )
+
+
+@pytest.mark.asyncio
+async def test_streamed_imports_need_a_report_or_a_generator(sisu_settings):
+    lines = "".join(json.dumps({"id": _id}) + "\n" for _id in range(3))
+    async with SisuClientManager(sisu_settings, async_transport=httpx.MockTransport(invalid_handler)) as manager:
+        with pytest.raises(Exception, match="needs a report or as_generator"):
+            await import_to_sisu(
+                sisu_settings, Buildings, use_legacy_import=False, fp=io.StringIO(lines), client_manager=manager,
+            )
+
+        results = await import_to_sisu(
+            sisu_settings, Buildings, use_legacy_import=False, fp=io.StringIO(lines), client_manager=manager,
+            as_generator=True,
+        )
+        assert sum([len(responses) async for responses in results]) == 1
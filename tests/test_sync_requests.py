@@ -0,0 +1,75 @@
+import json
+import threading
+import time
+
+import httpx
+
+from funidata_utils.request_utils.httpx_requests import send_post_with_binary_err_search_httpx
+from funidata_utils.request_utils.import_report import ImportReport
+from tests.helpers import invalid_handler, get_entity_counts_by_status_code
+
+
+def test_failing_ids_guide_the_split():
+    sent_requests = 0
+
+    def handler(request: httpx.Request):
+        nonlocal sent_requests
+        sent_requests += 1
+        return invalid_handler(request)
+
+    data = [{"id": _id, "invalid": _id in (3, 7)} for _id in range(10)]
+    with httpx.Client(transport=httpx.MockTransport(handler)) as client:
+        responses = send_post_with_binary_err_search_httpx(
+            path="http://localhost",
+            payload=data,
+            binary_search_max_depth=10,
+            client=client,
+        )
+
+    # The whole batch, then the two failing entities apart from the eight passing ones
+    assert sent_requests == 3
+    assert get_entity_counts_by_status_code(responses) == {200: 8, 422: 2}
+
+
+def test_batches_are_sent_from_a_thread_pool_in_order():
+    in_flight = 0
+    max_in_flight = 0
+    lock = threading.Lock()
+
+    def handler(request: httpx.Request):
+        nonlocal in_flight, max_in_flight
+        with lock:
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+        time.sleep(0.01)
+        with lock:
+            in_flight -= 1
+        return invalid_handler(request)
+
+    data = [{"id": _id, "invalid": _id == 42} for _id in range(100)]
+    with httpx.Client(transport=httpx.MockTransport(handler)) as client:
+        responses = send_post_with_binary_err_search_httpx(
+            path="http://localhost",
+            payload=data,
+            batch_size=10,
+            binary_search_max_depth=10,
+            client=client,
+            max_parallel_requests=4,
+        )
+
+        report = ImportReport()
+        assert send_post_with_binary_err_search_httpx(
+            path="http://localhost",
+            payload=data,
+            batch_size=10,
+            binary_search_max_depth=10,
+            client=client,
+            max_parallel_requests=4,
+            report=report,
+        ) == []
+
+    assert 1 < max_in_flight <= 4
+    assert [json.loads(response.request.content)[0]["id"] for response in responses][:4] == [0, 10, 20, 30]
+    assert get_entity_counts_by_status_code(responses) == {200: 99, 422: 1}
+    assert report.rejected_ids() == [42]
+    assert report.accepted_count == 99
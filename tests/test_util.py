@@ -1,5 +1,7 @@
+import threading
+
 import pytest
-from funidata_utils.utils import group_by
+from funidata_utils.utils import group_by, aiter_in_thread
 
 
 def test_group_by():
@@ -8,3 +10,29 @@ def test_group_by():
     grouping = group_by(data, lambda x: x['type'] == 1)
 
     assert grouping[1] == [dict(id=1, type=1), dict(id=2, type=1)]
+
+
+@pytest.mark.asyncio
+async def test_aiter_in_thread_fetches_off_the_loop_in_one_thread():
+    fetching_threads = set()
+    closed_in = []
+
+    def rows():
+        try:
+            for _id in range(10):
+                fetching_threads.add(threading.current_thread())
+                yield {"id": _id}
+        finally:
+            closed_in.append(threading.current_thread())
+
+    assert [row["id"] async for row in aiter_in_thread(rows(), chunk_size=3)] == list(range(10))
+    assert len(fetching_threads) == 1 and threading.main_thread() not in fetching_threads
+
+    fetching_threads.clear()
+    closed_in.clear()
+    stopped_early = aiter_in_thread(rows(), chunk_size=3)
+    async for row in stopped_early:
+        break
+    await stopped_early.aclose()
+    # The rows were closed in the thread that fetched them
+    assert closed_in == list(fetching_threads)